@@ -0,0 +1,41 @@
+import os
+import shutil
+import sys
+import tempfile
+
+# Workers write their metrics to files in this directory and /metrics
+# merges them, so a scrape sees every worker and not just the one that
+# served it. It has to be set before the app imports prometheus_client.
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(tempfile.gettempdir(), 'task-manager-metrics'),
+)
+
+
+def on_starting(server):
+    check_shared_cache(server)
+    # Files left over from a previous run would be merged into the totals.
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def check_shared_cache(server):
+    # Refuse to start several workers on the local-memory cache rather
+    # than have them serve each other's stale pages.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_manager.settings')
+    from django.core.exceptions import ImproperlyConfigured
+
+    from task_manager import cache_versions
+
+    try:
+        cache_versions.check_shared_cache(server.cfg.workers)
+    except ImproperlyConfigured as error:
+        server.log.error(str(error))
+        sys.exit(1)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class TaskManagerConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'task_manager'
+
+    def ready(self):
+        # Connects the signals that invalidate the reference-data cache.
+        from task_manager import reference_data  # noqa: F401
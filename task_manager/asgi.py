@@ -0,0 +1,8 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_manager.settings')
+# Route the read-heavy task views to their async versions.
+os.environ.setdefault('ROOT_URLCONF', 'task_manager.asgi_urls')
+
+application = get_asgi_application()
@@ -0,0 +1,11 @@
+from django.urls import include, path
+from task_manager.urls import urlpatterns as sync_urlpatterns
+
+# The URLs task_manager.asgi serves: the same as task_manager.urls, but the
+# task list, detail, export and JSON API resolve to their async views
+# first. Names and paths are unchanged, so reverse() and the query
+# budgets work the same.
+urlpatterns = [
+    path('tasks/', include('task_manager.tasks.async_urls')),
+    *sync_urlpatterns,
+]
@@ -0,0 +1,287 @@
+import math
+import random
+import time
+import tracemalloc
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from task_manager import reference_data
+from task_manager.labels.models import Label
+from task_manager.statuses.models import Status
+from task_manager.tasks.models import Task
+from task_manager.tasks.summary import rebuild_task_counts
+from task_manager.tasks.versions import tasks_changed
+from task_manager.users.models import User
+
+DATASET = {
+    'tasks': 100_000,
+    'users': 5_000,
+    'labels': 200,
+    'statuses': 20,
+}
+SEED_BATCH_SIZE = 5000
+WORDS = (
+    'отчет', 'релиз', 'ошибка', 'дизайн', 'миграция', 'поиск', 'оплата',
+    'документация', 'интеграция', 'профиль', 'уведомления', 'экспорт',
+)
+PERCENTILES = (50, 95, 99)
+TIME_METRICS = tuple('p%d' % p for p in PERCENTILES)
+# Too slow to run by default; run() only includes them when named.
+OPT_IN_SCENARIOS = {'task_list_all'}
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def seed(tasks, users, labels, statuses, random_seed=0,
+         batch_size=SEED_BATCH_SIZE):
+    """
+    Fill an empty database with a reproducible dataset using bulk inserts.
+    The same counts and seed always produce the same rows.
+    """
+    rng = random.Random(random_seed)
+    Status.objects.bulk_create(
+        Status(name='Статус %d' % i) for i in range(statuses)
+    )
+    Label.objects.bulk_create(
+        Label(name='Метка %d' % i) for i in range(labels)
+    )
+    password = make_password(None)
+    User.objects.bulk_create(
+        (
+            User(
+                username='user%d' % i,
+                first_name='Имя%d' % i,
+                last_name='Фамилия%d' % i,
+                password=password,
+            )
+            for i in range(users)
+        ),
+        batch_size=batch_size,
+    )
+    status_ids = list(Status.objects.order_by('pk').values_list(
+        'pk', flat=True
+    ))
+    label_ids = list(Label.objects.order_by('pk').values_list(
+        'pk', flat=True
+    ))
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+
+    def task_rows():
+        for i in range(tasks):
+            word = rng.choice(WORDS)
+            yield Task(
+                name='%s %d' % (word.capitalize(), i),
+                description='Задача про %s номер %d' % (word, i),
+                status_id=rng.choice(status_ids),
+                author_id=rng.choice(user_ids),
+                assignee_id=(
+                    rng.choice(user_ids) if rng.random() < 0.8 else None
+                ),
+            )
+
+    through = Task.labels.through
+    for batch in _batches(task_rows(), batch_size):
+        with transaction.atomic():
+            created = Task.objects.bulk_create(batch)
+            if label_ids:
+                through.objects.bulk_create(
+                    through(task_id=task.pk, label_id=label_id)
+                    for task in created
+                    for label_id in rng.sample(
+                        label_ids, rng.randint(0, min(3, len(label_ids)))
+                    )
+                )
+    reference_data.invalidate()
+    tasks_changed()
+    rebuild_task_counts()
+
+
+def get_scenarios():
+    """
+    Return ``(name, method, url, data)`` for every benchmarked request.
+    The ids come from the seeded data, so run seed() first.
+    """
+    user = User.objects.order_by('pk').first()
+    status = Status.objects.order_by('pk').first()
+    label_ids = list(Label.objects.order_by('pk').values_list(
+        'pk', flat=True
+    )[:2])
+    task = Task.objects.filter(author=user).order_by('pk').first()
+    task_list = reverse('task_list')
+    task_data = {
+        'name': task.name,
+        'description': task.description,
+        'status': task.status_id,
+        'assignee': task.assignee_id or '',
+        'labels': list(task.labels.values_list('pk', flat=True)),
+    }
+    return user, [
+        ('task_list', 'GET', task_list, None),
+        ('task_list_status', 'GET', task_list, {'status': status.pk}),
+        ('task_list_own', 'GET', task_list, {'own_tasks': 'on'}),
+        ('task_list_labels_any', 'GET', task_list, {'labels': label_ids}),
+        ('task_list_labels_all', 'GET', task_list,
+         {'labels': label_ids, 'labels_mode': 'all'}),
+        ('task_list_search', 'GET', task_list, {'q': WORDS[0]}),
+        ('task_list_combined', 'GET', task_list,
+         {'status': status.pk, 'assignee': user.pk, 'q': WORDS[1]}),
+        # What filtering and scrolling fetch from the task list page.
+        ('task_list_rows', 'GET', task_list, {'partial': 'rows'}),
+        ('task_list_status_rows', 'GET', task_list,
+         {'status': status.pk, 'partial': 'rows'}),
+        # Every task on one page, streamed.
+        ('task_list_all', 'GET', task_list, {'show': 'all'}),
+        ('task_detail', 'GET', reverse('task_detail', args=[task.pk]), None),
+        ('task_dashboard', 'GET', reverse('task_dashboard'), None),
+        ('task_create_form', 'GET', reverse('task_create'), None),
+        ('task_create', 'POST', reverse('task_create'),
+         {**task_data, 'name': 'Новая задача'}),
+        ('task_update_form', 'GET',
+         reverse('task_update', args=[task.pk]), None),
+        ('task_update', 'POST',
+         reverse('task_update', args=[task.pk]), task_data),
+        ('status_list', 'GET', reverse('status_list'), None),
+        ('label_list', 'GET', reverse('label_list'), None),
+        ('label_autocomplete', 'GET', reverse('label_autocomplete'),
+         {'q': 'Метка 1'}),
+        ('user_list', 'GET', reverse('user_list'), None),
+        ('user_list_search', 'GET', reverse('user_list'), {'q': 'user1'}),
+        ('user_autocomplete', 'GET', reverse('user_autocomplete'),
+         {'q': 'user1'}),
+    ]
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def measure(client, method, url, data):
+    """
+    Make one request and return ``(elapsed, ttfb, queries, bytes)``. A
+    streaming response is read to the end; ``ttfb`` is the time until
+    its first chunk, and the queries made after that are not counted.
+    """
+    request = client.post if method == 'POST' else client.get
+    # Writes are rolled back so that every run sees the same dataset.
+    with transaction.atomic():
+        started = time.perf_counter()
+        response = request(url, data)
+        if response.streaming:
+            chunks = iter(response.streaming_content)
+            size = len(next(chunks, b''))
+            ttfb = time.perf_counter() - started
+            size += sum(len(chunk) for chunk in chunks)
+        else:
+            size = len(response.content)
+            ttfb = None
+        elapsed = time.perf_counter() - started
+        transaction.set_rollback(True)
+    # A flash message would otherwise be rendered by the next request.
+    client.cookies.pop(CookieStorage.cookie_name, None)
+    if response.status_code >= 400:
+        raise RuntimeError('%s %s returned %d.' % (
+            method, url, response.status_code
+        ))
+    return (
+        elapsed,
+        elapsed if ttfb is None else ttfb,
+        response.wsgi_request.query_counter.count,
+        size,
+    )
+
+
+def measure_peak_memory(client, method, url, data):
+    """
+    Return the most memory, in bytes, Python allocated at once during one
+    request. Tracing slows everything down, so this is a run of its own.
+    """
+    tracemalloc.start()
+    try:
+        measure(client, method, url, data)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+def run(repeat=30, warmup=3, only=None):
+    """
+    Time every scenario and return ``{name: {p50, p95, p99, ttfb_p50,
+    queries, bytes, peak_kb, runs}}`` with times in milliseconds.
+    Responses are sized as sent to a browser that accepts gzip.
+    """
+    user, scenarios = get_scenarios()
+    client = Client(headers={'Accept-Encoding': 'gzip'})
+    client.force_login(user)
+    if not only:
+        only = {scenario[0] for scenario in scenarios} - OPT_IN_SCENARIOS
+    results = {}
+    for name, method, url, data in scenarios:
+        if name not in only:
+            continue
+        for _ in range(warmup):
+            measure(client, method, url, data)
+        timings = []
+        first_bytes = []
+        queries = set()
+        sizes = set()
+        for _ in range(repeat):
+            elapsed, ttfb, count, size = measure(client, method, url, data)
+            timings.append(elapsed * 1000)
+            first_bytes.append(ttfb * 1000)
+            queries.add(count)
+            sizes.add(size)
+        peak = measure_peak_memory(client, method, url, data)
+        results[name] = {
+            **{
+                metric: round(percentile(timings, p), 3)
+                for metric, p in zip(TIME_METRICS, PERCENTILES)
+            },
+            'ttfb_p50': round(percentile(first_bytes, 50), 3),
+            'queries': max(queries),
+            'bytes': max(sizes),
+            'peak_kb': round(peak / 1024),
+            'runs': repeat,
+        }
+    return results
+
+
+def compare(baseline, results, threshold):
+    """
+    Return messages for every metric that got worse than the baseline.
+    Times may grow by ``threshold`` (a fraction) to absorb noise; query
+    counts are deterministic and may not grow at all.
+    """
+    regressions = []
+    for name, old in sorted(baseline.items()):
+        new = results.get(name)
+        if new is None:
+            continue
+        for metric in TIME_METRICS:
+            limit = old[metric] * (1 + threshold)
+            if new[metric] > limit:
+                regressions.append(
+                    '%s %s: %.2fms -> %.2fms (+%.0f%%)' % (
+                        name, metric, old[metric], new[metric],
+                        (new[metric] / old[metric] - 1) * 100
+                        if old[metric] else math.inf,
+                    )
+                )
+        if new['queries'] > old['queries']:
+            regressions.append('%s queries: %d -> %d' % (
+                name, old['queries'], new['queries']
+            ))
+    return regressions
@@ -0,0 +1,43 @@
+from django.core.cache.backends import (
+    filebased,
+    locmem,
+    memcached,
+    redis,
+)
+
+from task_manager.metrics import CACHE_REQUESTS
+
+_MISSING = object()
+
+
+class CacheMetricsMixin:
+    """Count hits and misses of get() in the cache metrics."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._hits = CACHE_REQUESTS.labels('hit')
+        self._misses = CACHE_REQUESTS.labels('miss')
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            self._misses.inc()
+            return default
+        self._hits.inc()
+        return value
+
+
+class LocMemCache(CacheMetricsMixin, locmem.LocMemCache):
+    pass
+
+
+class FileBasedCache(CacheMetricsMixin, filebased.FileBasedCache):
+    pass
+
+
+class RedisCache(CacheMetricsMixin, redis.RedisCache):
+    pass
+
+
+class PyMemcacheCache(CacheMetricsMixin, memcached.PyMemcacheCache):
+    pass
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+VERSION_KEY = 'version:%s'
+
+
+def get_version(namespace):
+    """Return the current version of a cached namespace."""
+    key = VERSION_KEY % namespace
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def _incr(namespace):
+    key = VERSION_KEY % namespace
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The key was evicted or never set; anything but the old value
+        # would do, so restart the counter.
+        cache.add(key, 2, timeout=None)
+        return cache.get(key, 2)
+
+
+def bump_version(namespace):
+    """
+    Invalidate everything cached under the namespace.
+
+    The version is bumped right away, so the writing request sees fresh
+    data, and again after the commit, so a concurrent request that cached
+    the pre-commit rows under the new version does not keep them.
+    """
+    _incr(namespace)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _incr(namespace))
+
+
+def check_shared_cache(workers):
+    """
+    Raise ImproperlyConfigured if ``workers`` processes would each keep
+    the versions in their own memory: a bump in one would leave the
+    others serving what they cached before it.
+    """
+    backend = import_string(settings.CACHES['default']['BACKEND'])
+    if workers > 1 and issubclass(backend, LocMemCache):
+        raise ImproperlyConfigured(
+            'The default cache is local to each process, so %d workers '
+            'would not see each other\'s invalidations. Set CACHE_BACKEND '
+            'and CACHE_LOCATION to a shared cache such as Redis or '
+            'Memcached.' % workers
+        )
@@ -7,3 +7,19 @@ class LabelForm(forms.ModelForm):
     class Meta:
         model = Label
         fields = ['name']
+
+
+class LabelMergeForm(forms.Form):
+    target = forms.ModelChoiceField(
+        queryset=Label.objects.none(),
+        label='Объединить с меткой',
+        widget=forms.Select(
+            attrs={'class': 'form-select bg-secondary text-light'}
+        ),
+    )
+
+    def __init__(self, *args, source, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['target'].queryset = Label.objects.exclude(
+            pk=source.pk
+        ).order_by('name')
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from task_manager.migration_operations import RunSQLForVendor
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labels', '0002_label_name_search_index'),
+    ]
+
+    # Databases that indexed unicode_lower(name) get back the lower(name)
+    # index of 0002_label_name_search_index; on the others this does nothing.
+    operations = [
+        RunSQLForVendor(
+            'sqlite',
+            sql=[
+                'DROP INDEX IF EXISTS label_name_unicode_lower_idx;',
+                'CREATE INDEX IF NOT EXISTS label_name_lower_idx '
+                'ON labels_label (lower(name));',
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
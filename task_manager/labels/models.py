@@ -8,9 +8,6 @@ class Label(models.Model):
     def __str__(self):
         return self.name
 
-    def has_related_tasks(self):
-        return self.task_set.exists()
-
     class Meta:
         verbose_name = 'Метка'
         verbose_name_plural = 'Метки'
@@ -1,5 +1,8 @@
 import unittest
+from unittest.mock import patch
 from django.test import TestCase, Client
+from django.db import IntegrityError, connection, transaction
+from django.db.models import ProtectedError
 from django.urls import reverse
 from task_manager.users.models import User
 from task_manager.labels.models import Label
@@ -43,6 +46,16 @@ class LabelTests(TestCase):
         self.assertTemplateUsed(response, 'labels/label_list.html')
         self.assertContains(response, 'Тестовая метка')
 
+    def test_label_list_task_counts(self):
+        unused = Label.objects.create(name='Свободная метка')
+        self.client.login(username='testuser', password='TestPass123')
+        response = self.client.get(self.label_list_url)
+        counts = {
+            label.pk: label.task_count
+            for label in response.context['labels']
+        }
+        self.assertEqual(counts, {self.label.pk: 1, unused.pk: 0})
+
     def test_label_list_unauthorized(self):
         response = self.client.get(self.label_list_url)
         self.assertEqual(response.status_code, 302)
@@ -117,6 +130,53 @@ class LabelTests(TestCase):
         )
         self.assertTrue(Label.objects.filter(pk=self.label.pk).exists())
 
+    def test_label_in_use_is_protected(self):
+        with self.assertRaises(ProtectedError):
+            self.label.delete()
+
+    def test_label_in_use_is_protected_by_the_database(self):
+        # A DELETE that skips Django's check fails the foreign key: right
+        # away on PostgreSQL, at commit on SQLite.
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'DELETE FROM labels_label WHERE id = %s', [self.label.pk]
+                )
+            connection.check_constraints()
+
+    def test_label_delete_racing_a_new_task(self):
+        self.client.login(username='testuser', password='TestPass123')
+        label = Label.objects.create(name='Метка гонки')
+        delete_url = reverse('label_delete', kwargs={'pk': label.pk})
+        with patch.object(Label, 'delete', side_effect=IntegrityError):
+            response = self.client.post(delete_url, {'confirm': True})
+        self.assertRedirects(response, self.label_list_url)
+        self.assertIn(
+            'Невозможно удалить метку, связанную с задачами.',
+            str(list(get_messages(response.wsgi_request))[0])
+        )
+
+    def test_label_merge(self):
+        target = Label.objects.create(name='Целевая')
+        merge_url = reverse('label_merge', kwargs={'pk': self.label.pk})
+        self.client.login(username='testuser', password='TestPass123')
+        response = self.client.get(merge_url)
+        self.assertContains(response, 'Целевая')
+        self.assertNotContains(response, 'option value="%d"' % self.label.pk)
+        response = self.client.post(merge_url, {'target': target.pk})
+        self.assertRedirects(response, self.label_list_url)
+        self.assertFalse(Label.objects.filter(pk=self.label.pk).exists())
+        self.assertEqual(
+            str(list(get_messages(response.wsgi_request))[0]),
+            'Метки объединены, перенесено задач: 1'
+        )
+
+    def test_label_merge_unauthorized(self):
+        merge_url = reverse('label_merge', kwargs={'pk': self.label.pk})
+        response = self.client.post(merge_url, {'target': self.label.pk})
+        self.assertRedirects(response, self.index_url)
+        self.assertTrue(Label.objects.filter(pk=self.label.pk).exists())
+
     def test_label_delete_unauthorized(self):
         response = self.client.post(self.label_delete_url, {'confirm': True})
         self.assertEqual(response.status_code, 302)
@@ -126,6 +186,22 @@ class LabelTests(TestCase):
         self.assertIn('Необходима авторизация пользователя', str(messages[0]))
         self.assertTrue(Label.objects.filter(pk=self.label.pk).exists())
 
+    def test_label_autocomplete(self):
+        Label.objects.bulk_create(
+            Label(name='Тест %02d' % i) for i in range(25)
+        )
+        url = reverse('label_autocomplete')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.login(username='testuser', password='TestPass123')
+        results = self.client.get(url, {'q': 'Тест'}).json()['results']
+        self.assertEqual(len(results), 20)
+        self.assertEqual(results[0]['text'], 'Тест 00')
+        response = self.client.get(url, {'q': 'Тестовая метка'})
+        results = response.json()['results']
+        self.assertEqual(
+            results, [{'id': self.label.pk, 'text': 'Тестовая метка'}]
+        )
+
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
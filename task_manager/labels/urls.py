@@ -4,12 +4,19 @@ from .views import (
     LabelListView,
     LabelCreateView,
     LabelUpdateView,
-    LabelDeleteView
+    LabelDeleteView,
+    LabelMergeView,
+    LabelAutocompleteView,
 )
 
 urlpatterns = [
     path('', LabelListView.as_view(), name='label_list'),
     path('create/', LabelCreateView.as_view(), name='label_create'),
+    path(
+        'autocomplete/',
+        LabelAutocompleteView.as_view(),
+        name='label_autocomplete'
+        ),
     path(
         '<int:pk>/update/',
         LabelUpdateView.as_view(),
@@ -20,4 +27,9 @@ urlpatterns = [
         LabelDeleteView.as_view(),
         name='label_delete'
         ),
+    path(
+        '<int:pk>/merge/',
+        LabelMergeView.as_view(),
+        name='label_merge'
+        ),
 ]
@@ -1,5 +1,7 @@
 from django.contrib import messages
-from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError
+from django.db.models import Count, ProtectedError
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.utils import timezone
@@ -7,8 +9,14 @@ from django.views.generic import (
     ListView,
     CreateView,
     UpdateView,
-    DeleteView
+    DeleteView,
+    FormView,
 )
+from django.views.generic.detail import SingleObjectMixin
+from task_manager.mixins import SingleFetchObjectMixin
+from task_manager.tasks.merge import merge_label
+from task_manager.views import AutocompleteView
+from .forms import LabelMergeForm
 from .models import Label
 
 
@@ -18,7 +26,7 @@ class LabelListView(LoginRequiredMixin, ListView):
     context_object_name = 'labels'
 
     def get_queryset(self):
-        return Label.objects.all()
+        return Label.objects.annotate(task_count=Count('task')).order_by('pk')
 
     def get_context_data(self, **kwargs):
         return super().get_context_data(**kwargs)
@@ -70,7 +78,7 @@ class LabelCreateView(LoginRequiredMixin, CreateView):
         return super().get_context_data(**kwargs)
 
 
-class LabelUpdateView(LoginRequiredMixin, UpdateView):
+class LabelUpdateView(LoginRequiredMixin, SingleFetchObjectMixin, UpdateView):
     model = Label
     template_name = 'labels/label_update.html'
     fields = ['name']
@@ -102,43 +110,77 @@ class LabelUpdateView(LoginRequiredMixin, UpdateView):
         return redirect('index')
 
 
-class LabelDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class LabelDeleteView(LoginRequiredMixin, SingleFetchObjectMixin, DeleteView):
     model = Label
     template_name = 'labels/label_delete.html'
     success_url = reverse_lazy('label_list')
 
-    def test_func(self):
-        if self.request.method == 'POST':
-            label = self.get_object()
-            return not label.has_related_tasks()
-        return True
-
     def handle_no_permission(self):
-        if not self.request.user.is_authenticated:
-            messages.error(
-                self.request,
-                'Необходима авторизация пользователя.'
-            )
-            return redirect('index')
-        if self.request.method == 'POST':
-            messages.error(
-                self.request,
-                'Невозможно удалить метку, связанную с задачами.'
-            )
-            return redirect(self.success_url)
-        return super().get(self.request)
+        messages.error(
+            self.request,
+            'Необходима авторизация пользователя.'
+        )
+        return redirect('index')
 
     def post(self, request, *args, **kwargs):
-        self.object = self.get_object()
-        if not self.test_func():
+        # delete() raises ProtectedError while tasks still use the object,
+        # so there is no separate check to run, or to go stale, first. A
+        # task given the label after that check fails the foreign key when
+        # delete() commits.
+        try:
+            self.get_object().delete()
+        except (ProtectedError, IntegrityError):
             messages.error(
                 request,
                 'Невозможно удалить метку, связанную с задачами.'
             )
             return redirect(self.success_url)
-        self.object.delete()
         messages.success(
             request,
             'Метка успешно удалена'
         )
         return redirect(self.success_url)
+
+
+class LabelMergeView(
+    LoginRequiredMixin,
+    SingleFetchObjectMixin,
+    SingleObjectMixin,
+    FormView,
+):
+    """Move all tasks to another label and delete this one."""
+
+    model = Label
+    template_name = 'labels/label_merge.html'
+    form_class = LabelMergeForm
+    success_url = reverse_lazy('label_list')
+
+    def handle_no_permission(self):
+        messages.error(
+            self.request,
+            'Необходима авторизация пользователя.'
+        )
+        return redirect('index')
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['source'] = self.get_object()
+        return kwargs
+
+    def get_context_data(self, **kwargs):
+        self.object = self.get_object()
+        return super().get_context_data(**kwargs)
+
+    def form_valid(self, form):
+        moved = merge_label(self.get_object(), form.cleaned_data['target'])
+        messages.success(
+            self.request,
+            'Метки объединены, перенесено задач: %d' % moved
+        )
+        return redirect(self.success_url)
+
+
+class LabelAutocompleteView(AutocompleteView):
+    queryset = Label.objects.only('id', 'name')
+    search_fields = ('name',)
+    ordering = ('name',)
@@ -0,0 +1,157 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from task_manager import benchmark
+from task_manager.tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database with a large dataset, time the main '
+        'pages with the test client and write p50/p95/p99 and query counts '
+        'as JSON. With --compare, fail if anything regressed against a '
+        'baseline file.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in benchmark.DATASET.items():
+            parser.add_argument(
+                '--%s' % name,
+                type=int,
+                default=default,
+                help='Number of %s to seed (default %d).' % (name, default),
+            )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed of the dataset.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=30,
+            help='Timed requests per scenario.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=3,
+            help='Untimed requests per scenario before the timed ones.',
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            help='Only run this scenario (can be repeated). Scenarios '
+                 'too slow for every run, such as task_list_all, only run '
+                 'when named.',
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Keep the test database, and its data, between runs.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the results to this file instead of stdout.',
+        )
+        parser.add_argument(
+            '--results',
+            help='Do not run anything, read the results from this file.',
+        )
+        parser.add_argument(
+            '--compare',
+            metavar='BASELINE',
+            help='Results file to compare against.',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help='Allowed slowdown as a fraction of the baseline times.',
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be positive.')
+        baseline = None
+        if options['compare']:
+            baseline = self.load(options['compare'])
+
+        if options['results']:
+            report = self.load(options['results'])
+        else:
+            report = self.run(options)
+            self.write(report, options['output'])
+
+        if baseline is None:
+            return
+        regressions = benchmark.compare(
+            baseline['results'], report['results'], options['threshold']
+        )
+        if regressions:
+            raise CommandError(
+                'Benchmark regressions:\n%s' % '\n'.join(regressions)
+            )
+        self.stderr.write(self.style.SUCCESS(
+            'No regressions against %s.' % options['compare']
+        ))
+
+    def run(self, options):
+        dataset = {name: options[name] for name in benchmark.DATASET}
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            keepdb=options['keepdb'],
+            serialize=False,
+        )
+        try:
+            if not Task.objects.exists():
+                started = time.monotonic()
+                benchmark.seed(random_seed=options['seed'], **dataset)
+                self.stderr.write('Seeded %d tasks in %.1fs.' % (
+                    dataset['tasks'], time.monotonic() - started
+                ))
+            results = benchmark.run(
+                options['repeat'], options['warmup'], options['scenario']
+            )
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb']
+            )
+        for name, result in results.items():
+            self.stderr.write(
+                '%-22s p50 %8.2fms  p95 %8.2fms  p99 %8.2fms  ttfb %8.2fms'
+                '  %3d queries  %8d bytes  %7d KB peak'
+                % (name, result['p50'], result['p95'], result['p99'],
+                   result['ttfb_p50'], result['queries'], result['bytes'],
+                   result['peak_kb'])
+            )
+        return {
+            'database': connection.vendor,
+            'dataset': dataset,
+            'seed': options['seed'],
+            'results': results,
+        }
+
+    def load(self, path):
+        try:
+            with open(path, encoding='utf-8') as stream:
+                report = json.load(stream)
+        except (OSError, ValueError) as error:
+            raise CommandError('Cannot read %s: %s' % (path, error))
+        if not isinstance(report.get('results'), dict):
+            raise CommandError('%s has no benchmark results.' % path)
+        return report
+
+    def write(self, report, path):
+        data = json.dumps(report, indent=2, sort_keys=True)
+        if not path:
+            self.stdout.write(data)
+            return
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(data + '\n')
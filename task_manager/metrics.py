@@ -0,0 +1,118 @@
+import hmac
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Requests that do not resolve to a URL name share one label value, so
+# random paths cannot blow up the number of series.
+UNRESOLVED = '<unresolved>'
+
+REQUEST_DURATION = Histogram(
+    'django_http_request_duration_seconds',
+    'Request latency by URL name.',
+    ['view', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+RESPONSES = Counter(
+    'django_http_responses_total',
+    'Responses by URL name and status code.',
+    ['view', 'method', 'status'],
+)
+DB_QUERIES = Counter(
+    'django_db_queries_total',
+    'Database queries by URL name.',
+    ['view'],
+)
+DB_DURATION = Histogram(
+    'django_db_request_duration_seconds',
+    'Time spent in the database per request, by URL name.',
+    ['view'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+CACHE_REQUESTS = Counter(
+    'django_cache_requests_total',
+    'Cache lookups by result (hit or miss).',
+    ['result'],
+)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else UNRESOLVED
+
+
+class MetricsMiddleware:
+    """
+    Record latency, status codes and database usage of every request.
+    Keep it first in MIDDLEWARE so the latency covers the whole stack and
+    QueryInstrumentationMiddleware has counted the queries.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, duration):
+        view = view_name(request)
+        REQUEST_DURATION.labels(view, request.method).observe(duration)
+        RESPONSES.labels(
+            view, request.method, str(response.status_code)
+        ).inc()
+        counter = getattr(request, 'query_counter', None)
+        if counter is not None:
+            DB_QUERIES.labels(view).inc(counter.count)
+            DB_DURATION.labels(view).observe(counter.duration)
+
+
+def get_registry():
+    # Under gunicorn every worker writes its samples to files in
+    # PROMETHEUS_MULTIPROC_DIR and the scrape merges them.
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics(request):
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        expected = 'Bearer %s' % token
+        given = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(given.encode(), expected.encode()):
+            return HttpResponse(status=401)
+    return HttpResponse(
+        generate_latest(get_registry()),
+        content_type=CONTENT_TYPE_LATEST,
+    )
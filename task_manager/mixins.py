@@ -0,0 +1,47 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+
+
+class SingleFetchObjectMixin:
+    """
+    Fetch the view's object once per request. Permission checks, the
+    context and the update or delete all call get_object(), which would
+    otherwise repeat the same SELECT each time. Views add whatever the
+    checks need (annotations, select_related) in get_queryset(), so the
+    one query also answers them.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_fetched_object'):
+            self._fetched_object = super().get_object()
+        return self._fetched_object
+
+
+class ApiLoginRequiredMixin(LoginRequiredMixin):
+    """Answer anonymous requests to JSON endpoints with a JSON 401."""
+
+    def handle_no_permission(self):
+        return JsonResponse(
+            {'errors': {'__all__': ['Необходима авторизация пользователя.']}},
+            status=401,
+        )
+
+
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """
+    LoginRequiredMixin for views with async handlers: the user is loaded
+    with request.auser() instead of a blocking query on the event loop.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Templates and ETag functions run in threads and read
+        # request.user; give them the user that is already loaded.
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        # LoginRequiredMixin.dispatch() would check the user again.
+        return await super(LoginRequiredMixin, self).dispatch(
+            request, *args, **kwargs
+        )
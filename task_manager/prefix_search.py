@@ -0,0 +1,87 @@
+from django.db import connections
+from django.db.models import F, Lookup, Q
+from django.db.models.functions import Lower
+
+# Prefix search compares lower(field) with the lowercased query, and each
+# backend gets the index its comparison can use: trigram GIN indexes serve
+# LIKE 'prefix%' on PostgreSQL whatever the collation, while SQLite uses
+# expression indexes for the range lower(field) >= prefix < next prefix.
+# SQLite's own lower() only folds ASCII letters, so there the other
+# letters are folded here instead: the range is taken for both cases of
+# the first of them, and a GLOB that lets each of them match either case
+# checks the rest of the prefix.
+
+
+def _next_prefix(prefix):
+    # The smallest string greater than every string starting with prefix.
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class Glob(Lookup):
+    lookup_name = 'glob'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return '%s GLOB %s' % (lhs, rhs), (*lhs_params, *rhs_params)
+
+
+def _folds_outside_sqlite(char):
+    upper = char.upper()
+    return not char.isascii() and len(upper) == 1 and upper != char
+
+
+def _glob_pattern(prefix):
+    # Letters SQLite does not fold match in either case, the characters
+    # GLOB treats specially match only themselves.
+    pattern = ''
+    for char in prefix:
+        if _folds_outside_sqlite(char):
+            pattern += '[%s%s]' % (char, char.upper())
+        elif char in '*?[':
+            pattern += '[%s]' % char
+        else:
+            pattern += char
+    return pattern + '*'
+
+
+def _sqlite_prefix_condition(alias, prefix):
+    folded = [
+        i for i, char in enumerate(prefix) if _folds_outside_sqlite(char)
+    ]
+    if not folded:
+        return Q(**{
+            '%s__gte' % alias: prefix,
+            '%s__lt' % alias: _next_prefix(prefix),
+        })
+    head = prefix[:folded[0] + 1]
+    glob = Glob(F(alias), _glob_pattern(prefix))
+    condition = Q()
+    for start in (head, head[:-1] + head[-1].upper()):
+        condition |= Q(
+            glob,
+            **{
+                '%s__gte' % alias: start,
+                '%s__lt' % alias: _next_prefix(start),
+            }
+        )
+    return condition
+
+
+def prefix_search(queryset, fields, query):
+    """
+    Filter ``queryset`` to rows where one of ``fields`` starts with
+    ``query``, ignoring case.
+    """
+    connection = connections[queryset.db]
+    prefix = query.strip().lower()
+    if not prefix:
+        return queryset
+    aliases = {'lower_%s' % field: Lower(field) for field in fields}
+    condition = Q()
+    for alias in aliases:
+        if connection.vendor == 'postgresql':
+            condition |= Q(**{'%s__startswith' % alias: prefix})
+        else:
+            condition |= _sqlite_prefix_condition(alias, prefix)
+    return queryset.alias(**aliases).filter(condition)
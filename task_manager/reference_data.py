@@ -0,0 +1,140 @@
+from django import forms
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.forms.models import ModelChoiceIterator
+
+from task_manager.cache_versions import bump_version, get_version
+
+NAMESPACE = 'reference-data'
+CACHE_TIMEOUT = 60 * 60 * 24
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name')
+
+
+def _load():
+    # Imported here so the module can be imported from app configs.
+    from task_manager.labels.models import Label
+    from task_manager.statuses.models import Status
+
+    return {
+        'statuses': list(Status.objects.order_by('pk')),
+        'labels': list(Label.objects.order_by('pk')),
+    }
+
+
+def get_reference_data():
+    """
+    Return the statuses and labels the task pages offer as choices.
+
+    They are cached under the current reference-data version, which
+    changes whenever one of them is saved or deleted. Users are too many
+    to list and are picked through the autocomplete instead, but their
+    names are shown on the task pages, so user changes bump the version
+    as well.
+    """
+    key = '%s:%s' % (NAMESPACE, get_version(NAMESPACE))
+    data = cache.get(key)
+    if data is None:
+        data = _load()
+        cache.set(key, data, CACHE_TIMEOUT)
+    return data
+
+
+def get_statuses():
+    return get_reference_data()['statuses']
+
+
+def get_labels():
+    return get_reference_data()['labels']
+
+
+def invalidate():
+    bump_version(NAMESPACE)
+
+
+@receiver(post_save, sender='statuses.Status')
+@receiver(post_delete, sender='statuses.Status')
+@receiver(post_save, sender='labels.Label')
+@receiver(post_delete, sender='labels.Label')
+@receiver(post_delete, sender='users.User')
+def reference_data_changed(sender, **kwargs):
+    invalidate()
+
+
+@receiver(post_save, sender='users.User')
+def user_saved(sender, update_fields=None, **kwargs):
+    # Every login saves last_login, which is not part of the cached users.
+    if update_fields is not None and \
+            set(update_fields).isdisjoint(USER_FIELDS):
+        return
+    invalidate()
+
+
+class CachedModelChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for obj in self.field.loader():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.loader()) + \
+            (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or \
+            bool(self.field.loader())
+
+
+class CachedChoicesMixin:
+    """
+    Take the choices of a model choice field from ``loader`` (a callable
+    returning a list of instances) instead of querying ``queryset``.
+    """
+
+    iterator = CachedModelChoiceIterator
+
+    def __init__(self, queryset, *, loader, **kwargs):
+        self.loader = loader
+        super().__init__(queryset, **kwargs)
+
+    def get_cached_objects(self):
+        key = self.to_field_name or 'pk'
+        return {str(getattr(obj, key)): obj for obj in self.loader()}
+
+    def get_cached_object(self, value, objects):
+        if isinstance(value, self.queryset.model):
+            value = getattr(value, self.to_field_name or 'pk')
+        try:
+            return objects[str(value)]
+        except KeyError:
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+
+
+class CachedModelChoiceField(CachedChoicesMixin, forms.ModelChoiceField):
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        self.validate_no_null_characters(value)
+        return self.get_cached_object(value, self.get_cached_objects())
+
+
+class CachedModelMultipleChoiceField(CachedChoicesMixin,
+                                     forms.ModelMultipleChoiceField):
+    def _check_values(self, value):
+        try:
+            value = dict.fromkeys(value)
+        except TypeError:
+            raise ValidationError(
+                self.error_messages['invalid_list'],
+                code='invalid_list',
+            )
+        objects = self.get_cached_objects()
+        for item in value:
+            self.validate_no_null_characters(item)
+        return [self.get_cached_object(item, objects) for item in value]
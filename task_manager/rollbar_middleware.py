@@ -1,7 +1,30 @@
 from rollbar.contrib.django.middleware import RollbarNotifierMiddleware
 
+try:
+    from rollbar.lib.session import reset_current_session, set_current_session
+except ImportError:
+    # Older releases keep no per-request session.
+    reset_current_session = set_current_session = None
+
 
 class CustomRollbarNotifierMiddleware(RollbarNotifierMiddleware):
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # Newer releases set the session in a sync-only __call__, which
+        # would reset it before an async response is ready. The parent's
+        # process_response does nothing, so no thread is spent on it.
+        if set_current_session is None:
+            return await self.get_response(request)
+        set_current_session(dict(request.headers))
+        try:
+            return await self.get_response(request)
+        finally:
+            reset_current_session()
+
     def get_extra_data(self, request, exc):
         extra_data = {
             'trace_id': 'aabbccddeeff',
@@ -18,6 +18,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.environ['SECRET_KEY']
 
 ROLLBAR_ACCESS_TOKEN = os.getenv('ROLLBAR_ACCESS_TOKEN')
+# When set, /metrics requires "Authorization: Bearer <token>".
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv('DEBUG', 'False') == 'True'
@@ -50,7 +52,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'task_manager.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'task_manager.sql_middleware.QueryInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -60,7 +64,9 @@ MIDDLEWARE = [
     'task_manager.rollbar_middleware.CustomRollbarNotifierMiddleware',
 ]
 
-ROOT_URLCONF = 'task_manager.urls'
+# task_manager/asgi.py sets task_manager.asgi_urls, which routes the task
+# list, detail, export, event stream and JSON API to their async views.
+ROOT_URLCONF = os.getenv('ROOT_URLCONF', 'task_manager.urls')
 
 TEMPLATES = [
     {
@@ -105,6 +111,21 @@ if 'test' in sys.argv:
         'NAME': BASE_DIR / 'db.sqlite3.test',
     }
 
+# Reference data and other versioned caches. The local-memory cache is
+# enough for a single worker; set CACHE_BACKEND/CACHE_LOCATION (e.g. to
+# Redis or Memcached) when running several processes, which
+# gunicorn.conf.py refuses to start without. The backends in
+# task_manager.cache_backends count hits and misses for /metrics.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'task_manager.cache_backends.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'task-manager'),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.'
@@ -147,3 +168,48 @@ LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 SESSION_SAVE_EVERY_REQUEST = False
+
+# Query budgets per URL name, checked by QueryInstrumentationMiddleware.
+# They include the session and user lookups, saving the session after
+# flash messages are shown, and a cold reference-data cache. Going over
+# one logs a warning on the task_manager.sql logger, and
+# task_manager.tests.QueryCountTests fails for GET pages over theirs.
+SQL_QUERY_BUDGETS = {
+    'index': 2,
+    'task_list': 9,
+    'task_detail': 5,
+    'task_events': 5,
+    'task_dashboard': 6,
+    'task_create': {'GET': 3, 'POST': 16},
+    'task_update': {'GET': 5, 'POST': 18},
+    'task_delete': {'GET': 3, 'POST': 8},
+    'task_bulk_action': {'POST': 16},
+    'api_task_list': {'GET': 7, 'POST': 16},
+    'api_task_detail': {'GET': 5, 'PUT': 16, 'PATCH': 16, 'DELETE': 9},
+    'user_list': 6,
+    'user_autocomplete': 3,
+    'user_delete': {'GET': 2, 'POST': 12},
+    'status_list': 5,
+    'status_autocomplete': 3,
+    'status_delete': {'GET': 3, 'POST': 6},
+    'label_list': 5,
+    'label_autocomplete': 3,
+    'label_delete': {'GET': 3, 'POST': 6},
+}
+SQL_N_PLUS_ONE_THRESHOLD = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'task_manager.sql': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
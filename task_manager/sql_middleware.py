@@ -0,0 +1,122 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('task_manager.sql')
+
+# "IN (%s, %s, %s)" and "VALUES (...), (...)" of any length are one shape.
+REPEATED_PLACEHOLDERS = re.compile(r'%s(?:\s*,\s*%s)+')
+REPEATED_ROWS = re.compile(r'(\([^()]*\))(?:\s*,\s*\([^()]*\))+')
+
+
+def query_shape(sql):
+    shape = REPEATED_PLACEHOLDERS.sub('%s...', sql)
+    return REPEATED_ROWS.sub(r'\1...', shape)
+
+
+class QueryCounter:
+    """Database execute wrapper that counts and times queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[query_shape(sql)] += 1
+
+    def repeated_shapes(self, threshold):
+        return [
+            (shape, count) for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Count the queries of every request and report them in a Server-Timing
+    header. Logs a warning when a view goes over its budget from
+    SQL_QUERY_BUDGETS (a number, or a number per HTTP method) or runs the
+    same query shape SQL_N_PLUS_ONE_THRESHOLD times or more. Queries run
+    while a streaming response is consumed are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        counter = QueryCounter()
+        # Read by MetricsMiddleware once the response is ready.
+        request.query_counter = counter
+        with self.instrument(counter):
+            response = self.get_response(request)
+        return self.finish(request, response, counter)
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        request.query_counter = counter
+        # Connections belong to a thread. The async ORM runs its queries
+        # in the request's sync_to_async thread, not on the event loop, so
+        # that is where the wrappers go.
+        stack = await sync_to_async(self.instrument)(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, counter)
+
+    def instrument(self, counter):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        return stack
+
+    def finish(self, request, response, counter):
+        response['Server-Timing'] = 'db;desc="%d queries";dur=%.2f' % (
+            counter.count, counter.duration * 1000
+        )
+        self.check(request, counter)
+        return response
+
+    def check(self, request, counter):
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        budget = getattr(settings, 'SQL_QUERY_BUDGETS', {}).get(view_name)
+        if isinstance(budget, dict):
+            budget = budget.get(request.method)
+        if budget is not None and counter.count > budget:
+            logger.warning(
+                '%s %s ran %d queries, over its budget of %d.',
+                request.method, view_name, counter.count, budget,
+            )
+        threshold = getattr(settings, 'SQL_N_PLUS_ONE_THRESHOLD', None)
+        if threshold:
+            for shape, count in counter.repeated_shapes(threshold):
+                logger.warning(
+                    'Possible N+1 in %s %s: %d identical queries: %s',
+                    request.method, view_name, count, shape,
+                )
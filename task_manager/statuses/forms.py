@@ -1,3 +1,4 @@
+from django import forms
 from django.forms import ModelForm
 from django.utils.translation import gettext_lazy as _
 
@@ -9,3 +10,19 @@ class StatusForm(ModelForm):
         model = Status
         fields = ['name']
         labels = {'name': _('Name')}
+
+
+class StatusMergeForm(forms.Form):
+    target = forms.ModelChoiceField(
+        queryset=Status.objects.none(),
+        label='Объединить со статусом',
+        widget=forms.Select(
+            attrs={'class': 'form-select bg-secondary text-light'}
+        ),
+    )
+
+    def __init__(self, *args, source, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['target'].queryset = Status.objects.exclude(
+            pk=source.pk
+        ).order_by('name')
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+from task_manager.migration_operations import RunSQLForVendor
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('statuses', '0001_initial'),
+    ]
+
+    operations = [
+        RunSQLForVendor(
+            'postgresql',
+            sql=[
+                'CREATE EXTENSION IF NOT EXISTS pg_trgm;',
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS status_name_trgm_idx '
+                'ON statuses_status USING GIN (lower(name) gin_trgm_ops);',
+            ],
+            reverse_sql=[
+                'DROP INDEX CONCURRENTLY IF EXISTS status_name_trgm_idx;',
+            ],
+        ),
+        RunSQLForVendor(
+            'sqlite',
+            sql=[
+                'CREATE INDEX IF NOT EXISTS status_name_lower_idx '
+                'ON statuses_status (lower(name));',
+            ],
+            reverse_sql=[
+                'DROP INDEX IF EXISTS status_name_lower_idx;',
+            ],
+        ),
+    ]
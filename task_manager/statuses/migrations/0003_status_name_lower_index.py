@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from task_manager.migration_operations import RunSQLForVendor
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statuses', '0002_status_name_search_index'),
+    ]
+
+    # Databases that indexed unicode_lower(name) get back the lower(name)
+    # index of 0002_status_name_search_index; on the others this does nothing.
+    operations = [
+        RunSQLForVendor(
+            'sqlite',
+            sql=[
+                'DROP INDEX IF EXISTS status_name_unicode_lower_idx;',
+                'CREATE INDEX IF NOT EXISTS status_name_lower_idx '
+                'ON statuses_status (lower(name));',
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
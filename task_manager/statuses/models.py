@@ -13,10 +13,6 @@ class Status(models.Model):
     def __str__(self):
         return self.name
 
-    def has_related_tasks(self):
-        from task_manager.tasks.models import Task
-        return Task.objects.filter(status=self).exists()
-
     class Meta:
         verbose_name = 'Статус'
         verbose_name_plural = 'Статусы'
@@ -1,5 +1,8 @@
 import unittest
+from unittest.mock import patch
 from django.test import TestCase, Client
+from django.db import IntegrityError
+from django.db.models import ProtectedError
 from django.urls import reverse
 from task_manager.statuses.models import Status
 from task_manager.tasks.models import Task
@@ -42,6 +45,16 @@ class StatusTests(TestCase):
         self.assertTemplateUsed(response, 'statuses/status_list.html')
         self.assertContains(response, 'Новый статус')
 
+    def test_status_list_task_counts(self):
+        unused = Status.objects.create(name='Свободный статус')
+        self.client.login(username='testuser', password='TestPass123')
+        response = self.client.get(self.status_list_url)
+        counts = {
+            status.pk: status.task_count
+            for status in response.context['statuses']
+        }
+        self.assertEqual(counts, {self.status.pk: 1, unused.pk: 0})
+
     def test_status_list_unauthorized(self):
         response = self.client.get(self.status_list_url)
         self.assertEqual(response.status_code, 302)
@@ -116,6 +129,43 @@ class StatusTests(TestCase):
         )
         self.assertTrue(Status.objects.filter(pk=self.status.pk).exists())
 
+    def test_status_in_use_is_protected(self):
+        with self.assertRaises(ProtectedError):
+            self.status.delete()
+
+    def test_status_delete_racing_a_new_task(self):
+        self.client.login(username='testuser', password='TestPass123')
+        status = Status.objects.create(name='Статус гонки')
+        delete_url = reverse('status_delete', kwargs={'pk': status.pk})
+        with patch.object(Status, 'delete', side_effect=IntegrityError):
+            response = self.client.post(delete_url, {'confirm': True})
+        self.assertRedirects(response, self.status_list_url)
+        self.assertIn(
+            'Невозможно удалить статус, связанный с задачами.',
+            str(list(get_messages(response.wsgi_request))[0])
+        )
+
+    def test_status_merge(self):
+        target = Status.objects.create(name='Целевая')
+        merge_url = reverse('status_merge', kwargs={'pk': self.status.pk})
+        self.client.login(username='testuser', password='TestPass123')
+        response = self.client.get(merge_url)
+        self.assertContains(response, 'Целевая')
+        self.assertNotContains(response, 'option value="%d"' % self.status.pk)
+        response = self.client.post(merge_url, {'target': target.pk})
+        self.assertRedirects(response, self.status_list_url)
+        self.assertFalse(Status.objects.filter(pk=self.status.pk).exists())
+        self.assertEqual(
+            str(list(get_messages(response.wsgi_request))[0]),
+            'Статусы объединены, перенесено задач: 1'
+        )
+
+    def test_status_merge_unauthorized(self):
+        merge_url = reverse('status_merge', kwargs={'pk': self.status.pk})
+        response = self.client.post(merge_url, {'target': self.status.pk})
+        self.assertRedirects(response, self.index_url)
+        self.assertTrue(Status.objects.filter(pk=self.status.pk).exists())
+
     def test_status_delete_unauthorized(self):
         response = self.client.post(self.status_delete_url, {'confirm': True})
         self.assertEqual(response.status_code, 302)
@@ -125,6 +175,41 @@ class StatusTests(TestCase):
         self.assertIn('Необходима авторизация пользователя', str(messages[0]))
         self.assertTrue(Status.objects.filter(pk=self.status.pk).exists())
 
+    def test_status_autocomplete(self):
+        Status.objects.bulk_create(
+            Status(name='Нов %02d' % i) for i in range(25)
+        )
+        url = reverse('status_autocomplete')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.login(username='testuser', password='TestPass123')
+        results = self.client.get(url, {'q': 'Нов'}).json()['results']
+        self.assertEqual(len(results), 20)
+        self.assertEqual(results[0]['text'], 'Нов 00')
+        results = self.client.get(url, {'q': 'Новый статус'}).json()['results']
+        self.assertEqual(
+            results, [{'id': self.status.pk, 'text': 'Новый статус'}]
+        )
+
+    def test_status_autocomplete_folds_cyrillic(self):
+        status = Status.objects.create(name='Статус проверки')
+        shouting = Status.objects.create(name='СТАТУС [ГОТОВ]')
+        Status.objects.create(name='Стать')
+        self.client.login(username='testuser', password='TestPass123')
+        for query in ('статус', 'СТАТУС', 'сТаТуС'):
+            results = self.client.get(
+                reverse('status_autocomplete'), {'q': query}
+            ).json()['results']
+            self.assertEqual(results, [
+                {'id': shouting.pk, 'text': 'СТАТУС [ГОТОВ]'},
+                {'id': status.pk, 'text': 'Статус проверки'},
+            ])
+        results = self.client.get(
+            reverse('status_autocomplete'), {'q': 'статус [г'}
+        ).json()['results']
+        self.assertEqual(
+            results, [{'id': shouting.pk, 'text': 'СТАТУС [ГОТОВ]'}]
+        )
+
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
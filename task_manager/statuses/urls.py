@@ -4,11 +4,18 @@ from .views import (
     StatusCreateView,
     StatusUpdateView,
     StatusDeleteView,
+    StatusMergeView,
+    StatusAutocompleteView,
 )
 
 urlpatterns = [
     path('', StatusListView.as_view(), name='status_list'),
     path('create/', StatusCreateView.as_view(), name='status_create'),
+    path(
+        'autocomplete/',
+        StatusAutocompleteView.as_view(),
+        name='status_autocomplete'
+        ),
     path(
         '<int:pk>/update/',
         StatusUpdateView.as_view(),
@@ -19,4 +26,9 @@ urlpatterns = [
         StatusDeleteView.as_view(),
         name='status_delete'
         ),
+    path(
+        '<int:pk>/merge/',
+        StatusMergeView.as_view(),
+        name='status_merge'
+        ),
 ]
@@ -4,10 +4,18 @@ from django.views.generic import (
     CreateView,
     UpdateView,
     DeleteView,
+    FormView,
     )
 from django.urls import reverse_lazy
+from django.views.generic.detail import SingleObjectMixin
+from task_manager.mixins import SingleFetchObjectMixin
+from task_manager.tasks.merge import merge_status
+from task_manager.views import AutocompleteView
+from .forms import StatusMergeForm
 from .models import Status
-from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError
+from django.db.models import Count, ProtectedError
 from django.contrib import messages
 
 
@@ -17,7 +25,7 @@ class StatusListView(LoginRequiredMixin, ListView):
     context_object_name = 'statuses'
 
     def get_queryset(self):
-        return Status.objects.all()
+        return Status.objects.annotate(task_count=Count('task')).order_by('pk')
 
     def get_context_data(self, **kwargs):
         return super().get_context_data(**kwargs)
@@ -65,7 +73,7 @@ class StatusCreateView(LoginRequiredMixin, CreateView):
         return redirect('index')
 
 
-class StatusUpdateView(LoginRequiredMixin, UpdateView):
+class StatusUpdateView(LoginRequiredMixin, SingleFetchObjectMixin, UpdateView):
     model = Status
     template_name = 'statuses/status_update.html'
     success_url = reverse_lazy('status_list')
@@ -97,43 +105,77 @@ class StatusUpdateView(LoginRequiredMixin, UpdateView):
         return redirect('index')
 
 
-class StatusDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class StatusDeleteView(LoginRequiredMixin, SingleFetchObjectMixin, DeleteView):
     model = Status
     template_name = 'statuses/status_delete.html'
     success_url = reverse_lazy('status_list')
 
-    def test_func(self):
-        if self.request.method == 'POST':
-            status = self.get_object()
-            return not status.has_related_tasks()
-        return True
-
     def handle_no_permission(self):
-        if not self.request.user.is_authenticated:
-            messages.error(
-                self.request,
-                'Необходима авторизация пользователя.'
-            )
-            return redirect('index')
-        if self.request.method == 'POST':
-            messages.error(
-                self.request,
-                'Невозможно удалить статус, связанный с задачами.'
-            )
-            return redirect(self.success_url)
-        return super().get(self.request)
+        messages.error(
+            self.request,
+            'Необходима авторизация пользователя.'
+        )
+        return redirect('index')
 
     def post(self, request, *args, **kwargs):
-        self.object = self.get_object()
-        if not self.test_func():
+        # delete() raises ProtectedError while tasks still use the object,
+        # so there is no separate check to run, or to go stale, first. A
+        # task given the status after that check fails the foreign key when
+        # delete() commits.
+        try:
+            self.get_object().delete()
+        except (ProtectedError, IntegrityError):
             messages.error(
                 request,
                 'Невозможно удалить статус, связанный с задачами.'
             )
             return redirect(self.success_url)
-        self.object.delete()
         messages.success(
             request,
             'Статус успешно удален'
         )
         return redirect(self.success_url)
+
+
+class StatusMergeView(
+    LoginRequiredMixin,
+    SingleFetchObjectMixin,
+    SingleObjectMixin,
+    FormView,
+):
+    """Move all tasks to another status and delete this one."""
+
+    model = Status
+    template_name = 'statuses/status_merge.html'
+    form_class = StatusMergeForm
+    success_url = reverse_lazy('status_list')
+
+    def handle_no_permission(self):
+        messages.error(
+            self.request,
+            'Необходима авторизация пользователя.'
+        )
+        return redirect('index')
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['source'] = self.get_object()
+        return kwargs
+
+    def get_context_data(self, **kwargs):
+        self.object = self.get_object()
+        return super().get_context_data(**kwargs)
+
+    def form_valid(self, form):
+        moved = merge_status(self.get_object(), form.cleaned_data['target'])
+        messages.success(
+            self.request,
+            'Статусы объединены, перенесено задач: %d' % moved
+        )
+        return redirect(self.success_url)
+
+
+class StatusAutocompleteView(AutocompleteView):
+    queryset = Status.objects.only('id', 'name')
+    search_fields = ('name',)
+    ordering = ('name',)
@@ -0,0 +1,194 @@
+import hashlib
+import json
+
+from django.db.models import Count, Max
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.views import View
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from task_manager.mixins import ApiLoginRequiredMixin
+from task_manager.tasks.forms import TaskForm
+from task_manager.tasks.models import Task
+from task_manager.tasks.pagination import InvalidCursor
+from task_manager.tasks.views import TaskListView
+
+
+def serialize_task(task):
+    return {
+        'id': task.pk,
+        'name': task.name,
+        'description': task.description,
+        'status': task.status_id,
+        'author': task.author_id,
+        'assignee': task.assignee_id,
+        'labels': [label.pk for label in task.labels.all()],
+        'created_at': task.created_at.isoformat(),
+    }
+
+
+def tasks_conditions(request, tasks):
+    """
+    Return the ETag and Last-Modified of a response showing the task
+    queryset ``tasks``, from one query that every worker gets the same
+    answer to: the latest updated_at of the tasks and how many there
+    are, which goes down when one is deleted or filtered out.
+    """
+    if not request.user.is_authenticated:
+        return None, None
+    state = tasks.order_by().aggregate(
+        count=Count('pk'), last_modified=Max('updated_at')
+    )
+    last_modified = state['last_modified']
+    # The user and the full path are part of the tag because the same
+    # URL returns different data to different users (own_tasks) and for
+    # different filters and pages.
+    key = '%s:%s:%s:%s' % (
+        state['count'],
+        last_modified.timestamp() if last_modified else '',
+        request.user.pk,
+        request.get_full_path(),
+    )
+    return hashlib.sha1(key.encode()).hexdigest(), last_modified
+
+
+def conditional_view(view, etag=None, last_modified=None):
+    """
+    Wrap ``view`` to answer conditional GETs with ``etag`` and
+    ``last_modified``, worked out beforehand: condition() would call its
+    functions on the event loop in an async view.
+    """
+    view = cache_control(private=True, no_cache=True)(view)
+    return condition(
+        etag_func=lambda request, *args, **kwargs: etag,
+        last_modified_func=lambda request, *args, **kwargs: last_modified,
+    )(view)
+
+
+def json_error(errors, status):
+    return JsonResponse({'errors': errors}, status=status)
+
+
+def parse_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class TaskApiListView(ApiLoginRequiredMixin, TaskListView):
+    """
+    GET lists tasks with the TaskFilter parameters and cursor pagination;
+    POST creates a task. Session authentication, so writes need the CSRF
+    token like the HTML forms do.
+    """
+
+    paginate_by = 100
+
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related('labels')
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_conditions(request)
+        view = conditional_view(self.list_tasks, etag, last_modified)
+        return view(request, *args, **kwargs)
+
+    def get_conditions(self, request):
+        # Also validates the filters for list_tasks().
+        return tasks_conditions(request, self.get_filtered_queryset())
+
+    def list_tasks(self, request, *args, **kwargs):
+        if self.filterset.is_bound and not self.filterset.is_valid():
+            return json_error(self.filterset.errors, 400)
+        paginator = self.get_paginator(self.filterset.qs, self.paginate_by)
+        try:
+            page = paginator.page(request.GET.get(self.page_kwarg))
+        except InvalidCursor:
+            return json_error(
+                {self.page_kwarg: ['Некорректный курсор страницы.']}, 400
+            )
+        return JsonResponse({
+            'results': [serialize_task(task) for task in page],
+            'next': self.get_page_url(page.next_cursor),
+            'previous': self.get_page_url(page.previous_cursor),
+        })
+
+    def get_page_url(self, cursor):
+        url = super().get_page_url(cursor)
+        return self.request.path + url if url else None
+
+    def post(self, request, *args, **kwargs):
+        data = parse_body(request)
+        if data is None:
+            return json_error({'__all__': ['Ожидается JSON-объект.']}, 400)
+        form = TaskForm(data)
+        if not form.is_valid():
+            return json_error(form.errors, 400)
+        form.instance.author = request.user
+        task = form.save()
+        response = JsonResponse(serialize_task(task), status=201)
+        response['Location'] = reverse('api_task_detail', args=[task.pk])
+        return response
+
+
+class TaskApiDetailView(ApiLoginRequiredMixin, View):
+    """GET, PUT, PATCH and DELETE a single task."""
+
+    def get_task_queryset(self):
+        return Task.objects.prefetch_related('labels').filter(
+            pk=self.kwargs['pk']
+        )
+
+    def get_task(self):
+        return self.get_task_queryset().first()
+
+    def not_found(self):
+        return json_error({'__all__': ['Задача не найдена.']}, 404)
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_conditions(request)
+        view = conditional_view(self.show_task, etag, last_modified)
+        return view(request, *args, **kwargs)
+
+    def get_conditions(self, request):
+        return tasks_conditions(request, self.get_task_queryset())
+
+    def show_task(self, request, *args, **kwargs):
+        task = self.get_task()
+        if task is None:
+            return self.not_found()
+        return JsonResponse(serialize_task(task))
+
+    def put(self, request, *args, **kwargs):
+        return self.update(request, partial=False)
+
+    def patch(self, request, *args, **kwargs):
+        return self.update(request, partial=True)
+
+    def update(self, request, partial):
+        task = self.get_task()
+        if task is None:
+            return self.not_found()
+        data = parse_body(request)
+        if data is None:
+            return json_error({'__all__': ['Ожидается JSON-объект.']}, 400)
+        if partial:
+            data = {**serialize_task(task), **data}
+        form = TaskForm(data, instance=task)
+        if not form.is_valid():
+            return json_error(form.errors, 400)
+        task = form.save()
+        return JsonResponse(serialize_task(task))
+
+    def delete(self, request, *args, **kwargs):
+        task = self.get_task()
+        if task is None:
+            return self.not_found()
+        if task.author_id != request.user.pk:
+            return json_error(
+                {'__all__': ['Задачу может удалить только ее автор.']}, 403
+            )
+        task.delete()
+        return HttpResponse(status=204)
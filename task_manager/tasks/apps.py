@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+from task_manager.tasks.search import ensure_sqlite_fts
+
+
+def ensure_search_index(sender, using, **kwargs):
+    ensure_sqlite_fts(using)
 
 
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'task_manager.tasks'
+
+    def ready(self):
+        post_migrate.connect(ensure_search_index, sender=self)
+        # Connects the signals that bump the tasks version, record the
+        # events of the live task list and keep the task counts.
+        from task_manager.tasks import events, summary, versions  # noqa: F401
@@ -0,0 +1,24 @@
+from django.urls import path
+from .async_views import (
+    AsyncTaskApiDetailView,
+    AsyncTaskApiListView,
+    AsyncTaskDetailView,
+    AsyncTaskEventsView,
+    AsyncTaskExportView,
+    AsyncTaskListView,
+)
+
+# Only the views with async versions; the other task URLs fall through to
+# task_manager.tasks.urls (see task_manager.asgi_urls).
+urlpatterns = [
+    path('', AsyncTaskListView.as_view(), name='task_list'),
+    path('export/', AsyncTaskExportView.as_view(), name='task_export'),
+    path('events/', AsyncTaskEventsView.as_view(), name='task_events'),
+    path('api/', AsyncTaskApiListView.as_view(), name='api_task_list'),
+    path(
+        'api/<int:pk>/',
+        AsyncTaskApiDetailView.as_view(),
+        name='api_task_detail'
+    ),
+    path('<int:pk>/', AsyncTaskDetailView.as_view(), name='task_detail'),
+]
@@ -0,0 +1,209 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.gzip import gzip_page
+
+from task_manager.mixins import AsyncLoginRequiredMixin
+from task_manager.tasks.api import (
+    TaskApiDetailView,
+    TaskApiListView,
+    conditional_view,
+    json_error,
+    serialize_task,
+)
+from task_manager.tasks.events import (
+    broker,
+    event_message,
+    latest_event_id,
+    position_message,
+)
+from task_manager.tasks.export import aexport_response
+from task_manager.tasks.models import Task
+from task_manager.tasks.pagination import InvalidCursor
+from task_manager.tasks.rows import abuild_task_rows, atask_row_chunks
+from task_manager.tasks.streaming import (
+    STREAM_CHUNK_SIZE,
+    apage_chunks,
+    render_page_shell,
+    streaming_page_response,
+)
+from task_manager.tasks.views import (
+    TaskDetailView,
+    TaskEventsView,
+    TaskExportView,
+    TaskListView,
+)
+
+# Async versions of the read-heavy task views, routed by
+# task_manager.asgi_urls. They read through the async ORM, so a worker
+# waiting on the database or on a slow client holds no thread. Work the
+# sync views share (filter validation, ETags, rendering) runs in the
+# request's thread with sync_to_async().
+
+
+class AsyncConditionalPageMixin:
+    """
+    ConditionalPageMixin for async views. They build the page in an async
+    render_page() method that they must define.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        etag = await sync_to_async(self.get_etag)(request, *args, **kwargs)
+        view = conditional_view(self.render_page, etag=etag)
+        return await view(request, *args, **kwargs)
+
+
+class AsyncTaskListView(
+    AsyncLoginRequiredMixin,
+    AsyncConditionalPageMixin,
+    TaskListView,
+):
+    async def get(self, request, *args, **kwargs):
+        # Compresses the rows like TaskListView.get().
+        get = super().get
+        if self.is_partial():
+            get = gzip_page(get)
+        return await get(request, *args, **kwargs)
+
+    async def render_page(self, request, *args, **kwargs):
+        # Validating the filters may look up the chosen assignee.
+        self.object_list = await sync_to_async(self.get_filtered_queryset)()
+        if self.is_streaming():
+            return await self.render_stream()
+        self.page = await self.apaginate_queryset(
+            self.object_list, self.get_paginate_by(self.object_list)
+        )
+        context = await sync_to_async(self.get_context_data)(
+            filter=self.filterset, object_list=self.object_list
+        )
+        return self.render_to_response(context)
+
+    async def render_stream(self):
+        # Like TaskListView.render_to_response(), with the rows read
+        # through the async ORM.
+        context = await sync_to_async(self.get_context_data)(
+            filter=self.filterset, object_list=self.object_list
+        )
+        head, tail = await sync_to_async(render_page_shell)(
+            self.get_template_names(), context, self.request
+        )
+        rows = atask_row_chunks(self.get_stream_queryset(), STREAM_CHUNK_SIZE)
+        return streaming_page_response(apage_chunks(head, rows, tail))
+
+    async def apaginate_queryset(self, queryset, page_size):
+        paginator = self.get_paginator(
+            self.get_row_queryset(queryset), page_size
+        )
+        try:
+            page = await paginator.apage(self.request.GET.get(self.page_kwarg))
+        except InvalidCursor:
+            raise Http404('Некорректный курсор страницы.')
+        page.object_list = await abuild_task_rows(page.object_list)
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def paginate_queryset(self, queryset, page_size):
+        # Already read by render_page().
+        return self.page
+
+
+class AsyncTaskExportView(AsyncLoginRequiredMixin, TaskExportView):
+    async def get(self, request, *args, **kwargs):
+        export_format = self.get_export_format()
+        queryset = await sync_to_async(self.get_export_queryset)()
+        return aexport_response(queryset, export_format)
+
+
+class AsyncTaskDetailView(
+    AsyncLoginRequiredMixin,
+    AsyncConditionalPageMixin,
+    TaskDetailView,
+):
+    async def render_page(self, request, *args, **kwargs):
+        # The labels are prefetched, so rendering runs no queries.
+        queryset = self.get_queryset().prefetch_related('labels')
+        try:
+            self.object = await queryset.aget(pk=self.kwargs['pk'])
+        except Task.DoesNotExist:
+            raise Http404('Задача не найдена.')
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
+
+
+class AsyncTaskApiListView(AsyncLoginRequiredMixin, TaskApiListView):
+    async def get(self, request, *args, **kwargs):
+        etag, last_modified = await sync_to_async(self.get_conditions)(
+            request
+        )
+        view = conditional_view(self.alist_tasks, etag, last_modified)
+        return await view(request, *args, **kwargs)
+
+    async def alist_tasks(self, request, *args, **kwargs):
+        # get_conditions() validated the filters.
+        if self.filterset.is_bound and not self.filterset.is_valid():
+            return json_error(self.filterset.errors, 400)
+        paginator = self.get_paginator(self.filterset.qs, self.paginate_by)
+        try:
+            page = await paginator.apage(request.GET.get(self.page_kwarg))
+        except InvalidCursor:
+            return json_error(
+                {self.page_kwarg: ['Некорректный курсор страницы.']}, 400
+            )
+        return JsonResponse({
+            'results': [serialize_task(task) for task in page],
+            'next': self.get_page_url(page.next_cursor),
+            'previous': self.get_page_url(page.previous_cursor),
+        })
+
+    async def post(self, request, *args, **kwargs):
+        return await sync_to_async(super().post)(request, *args, **kwargs)
+
+
+class AsyncTaskApiDetailView(AsyncLoginRequiredMixin, TaskApiDetailView):
+    async def get(self, request, *args, **kwargs):
+        etag, last_modified = await sync_to_async(self.get_conditions)(
+            request
+        )
+        view = conditional_view(self.ashow_task, etag, last_modified)
+        return await view(request, *args, **kwargs)
+
+    async def ashow_task(self, request, *args, **kwargs):
+        task = await self.get_task_queryset().afirst()
+        if task is None:
+            return self.not_found()
+        return JsonResponse(serialize_task(task))
+
+    # Writes go through TaskForm, which is sync.
+    async def put(self, request, *args, **kwargs):
+        return await sync_to_async(super().put)(request, *args, **kwargs)
+
+    async def patch(self, request, *args, **kwargs):
+        return await sync_to_async(super().patch)(request, *args, **kwargs)
+
+    async def delete(self, request, *args, **kwargs):
+        return await sync_to_async(super().delete)(request, *args, **kwargs)
+
+
+class AsyncTaskEventsView(AsyncLoginRequiredMixin, TaskEventsView):
+    """
+    Keep the stream open and send each task event as the worker's broker
+    reads it.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        last_id = self.get_last_event_id()
+        if last_id is None:
+            last_id = await sync_to_async(latest_event_id)()
+        response = StreamingHttpResponse(
+            self.stream(last_id), content_type='text/event-stream'
+        )
+        # Proxies such as nginx would otherwise hold the events back.
+        response['X-Accel-Buffering'] = 'no'
+        return self.no_cache(response)
+
+    async def stream(self, last_id):
+        yield position_message(last_id)
+        async for event in broker.subscribe(last_id):
+            if event is None:
+                # Keeps proxies from closing an idle connection.
+                yield ': keep-alive\n\n'
+            else:
+                yield event_message(event)
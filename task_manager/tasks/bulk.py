@@ -0,0 +1,124 @@
+from django.db import transaction
+from django.utils import timezone
+
+from task_manager.tasks.events import (
+    record_labels_changed,
+    record_task_events,
+)
+from task_manager.tasks.models import (
+    Task,
+    TaskCount,
+    TaskEvent,
+    delete_in_bulk,
+)
+from task_manager.tasks.summary import (
+    record_field_change,
+    record_labels_added,
+    record_labels_removed,
+    record_tasks_deleted,
+)
+from task_manager.tasks.versions import tasks_changed, touch_tasks
+
+BULK_SET_STATUS = 'set_status'
+BULK_SET_ASSIGNEE = 'set_assignee'
+BULK_ADD_LABELS = 'add_labels'
+BULK_REMOVE_LABELS = 'remove_labels'
+BULK_DELETE = 'delete'
+BULK_ACTION_CHOICES = [
+    (BULK_SET_STATUS, 'Изменить статус'),
+    (BULK_SET_ASSIGNEE, 'Назначить исполнителя'),
+    (BULK_ADD_LABELS, 'Добавить метки'),
+    (BULK_REMOVE_LABELS, 'Убрать метки'),
+    (BULK_DELETE, 'Удалить'),
+]
+BULK_MAX_TASKS = 1000
+
+
+@transaction.atomic
+def apply_bulk_action(user, task_ids, action, status=None, assignee=None,
+                      labels=()):
+    """
+    Apply one change to the tasks with the given ids and return the number
+    of tasks it touched. Everything runs as set-based SQL in one
+    transaction; only the author's own tasks are deleted.
+    """
+    count = _apply(user, task_ids, action, status, assignee, labels)
+    if count:
+        # update() and the through-table writes send no signals.
+        tasks_changed()
+        _record_events(task_ids, count, action, status, assignee)
+    return count
+
+
+def _record_events(task_ids, count, action, status, assignee):
+    # _apply() records the deletes: only it knows which tasks were gone.
+    if action == BULK_DELETE:
+        return
+    if count < len(task_ids):
+        task_ids = list(
+            Task.objects.filter(pk__in=task_ids).values_list('pk', flat=True)
+        )
+    if action == BULK_SET_STATUS:
+        fields = {'status': status.name}
+    elif action == BULK_SET_ASSIGNEE:
+        fields = {'assignee': assignee.username if assignee else None}
+    else:
+        record_labels_changed(task_ids)
+        return
+    record_task_events(
+        TaskEvent.UPDATED, {task_id: fields for task_id in task_ids}
+    )
+
+
+def _apply(user, task_ids, action, status, assignee, labels):
+    tasks = Task.objects.filter(pk__in=task_ids)
+    if action == BULK_SET_STATUS:
+        record_field_change(tasks, TaskCount.STATUS, 'status_id', status.pk)
+        return tasks.update(status=status, updated_at=timezone.now())
+    if action == BULK_SET_ASSIGNEE:
+        record_field_change(
+            tasks, TaskCount.ASSIGNEE, 'assignee_id',
+            assignee.pk if assignee else None,
+        )
+        return tasks.update(assignee=assignee, updated_at=timezone.now())
+    if action == BULK_DELETE:
+        return _delete(tasks.filter(author=user))
+
+    through = Task.labels.through
+    label_ids = [label.pk for label in labels]
+    existing_ids = list(tasks.values_list('pk', flat=True))
+    if action == BULK_ADD_LABELS:
+        record_labels_added(existing_ids, label_ids)
+        through.objects.bulk_create(
+            [
+                through(task_id=task_id, label_id=label_id)
+                for task_id in existing_ids
+                for label_id in label_ids
+            ],
+            ignore_conflicts=True,
+        )
+    elif action == BULK_REMOVE_LABELS:
+        removed = through.objects.filter(
+            task_id__in=existing_ids,
+            label_id__in=label_ids,
+        )
+        record_labels_removed(removed)
+        removed.delete()
+    else:
+        raise ValueError('Unknown bulk action: %s' % action)
+    return touch_tasks(Task.objects.filter(pk__in=existing_ids))
+
+
+def _delete(tasks):
+    deleted_ids = list(tasks.values_list('pk', flat=True))
+    tasks = Task.objects.filter(pk__in=deleted_ids)
+    # Counted out and recorded for all the tasks at once, rather than by
+    # the delete receivers of each one.
+    record_tasks_deleted(tasks)
+    with delete_in_bulk():
+        tasks.delete()
+    if deleted_ids:
+        record_task_events(
+            TaskEvent.DELETED, {task_id: {} for task_id in deleted_ids}
+        )
+    return len(deleted_ids)
@@ -0,0 +1,324 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection
+from django.db.models import Max, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from task_manager.tasks.models import Task, TaskEvent, deleting_in_bulk
+from task_manager.tasks.rows import label_pairs
+
+# Task events feed the live task list. They are written to the TaskEvent
+# table in the transaction that changes the task, so every worker sees an
+# event once the change commits, and never sees it if it rolls back. Each
+# ASGI worker polls the table for all of its open streams at once
+# (TaskEventBroker); WSGI workers answer each EventSource reconnect with
+# the events recorded since the browser's last one.
+
+POLL_INTERVAL = 1
+# The longest wait between polls after reads that failed in a row.
+MAX_POLL_BACKOFF = 30
+KEEPALIVE_INTERVAL = 15
+# Milliseconds, as the browser reads it from the retry: field.
+RECONNECT_DELAY = 5000
+EVENT_BATCH = 500
+EVENT_RETENTION = timedelta(hours=1)
+PRUNE_EVERY = 1000
+# How long an id skipped by a poll is looked for again, and how many.
+GAP_TIMEOUT = 10
+MAX_GAP = 100
+# The loaded values task_event_fields() compares a saved task with.
+TRACKED_FIELDS = ('name', 'status_id', 'assignee_id')
+
+logger = logging.getLogger(__name__)
+
+
+def task_event_fields(task, created=False):
+    """
+    Return the task list columns of ``task`` that its save changed, by
+    the names the live task list patches.
+    """
+    missing = object()
+    loaded = {} if created else getattr(task, '_loaded_values', {})
+    changed = {
+        attname for attname in TRACKED_FIELDS
+        if loaded.get(attname, missing) != getattr(task, attname)
+    }
+    fields = {}
+    if 'name' in changed:
+        fields['name'] = task.name
+    # TaskForm assigns the chosen objects, so these are already loaded.
+    if 'status_id' in changed:
+        fields['status'] = task.status.name
+    if 'assignee_id' in changed:
+        fields['assignee'] = task.assignee.username if task.assignee else None
+    return fields
+
+
+def record_task_events(action, fields_by_task):
+    """
+    Record one ``action`` event per task in ``fields_by_task``, a dict of
+    task ids and the columns that changed. Code that writes tasks without
+    sending signals records its own events.
+    """
+    events = [
+        TaskEvent(task_id=task_id, action=action, fields=fields)
+        for task_id, fields in fields_by_task.items()
+    ]
+    if len(events) == 1:
+        # Outside a transaction bulk_create() would open one of its own.
+        events[0].save()
+    else:
+        TaskEvent.objects.bulk_create(events)
+    if any(event.pk and event.pk % PRUNE_EVERY == 0 for event in events):
+        prune_task_events()
+    return events
+
+
+def record_queryset_events(action, fields, tasks):
+    """
+    Record the same ``action`` event for every task of the ``tasks``
+    queryset with one INSERT ... SELECT, for writes to more tasks than
+    record_task_events() should hold in memory.
+    """
+    select, params = tasks.order_by().values('pk').query.sql_with_params()
+    meta = TaskEvent._meta
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {table} ({task}, {action}, {fields}, {created}) '
+            'SELECT tasks.pk, %s, %s, %s FROM ({select}) tasks'.format(
+                table=quote_name(meta.db_table),
+                task=quote_name(meta.get_field('task_id').column),
+                action=quote_name(meta.get_field('action').column),
+                fields=quote_name(meta.get_field('fields').column),
+                created=quote_name(meta.get_field('created_at').column),
+                select=select,
+            ),
+            [
+                action,
+                meta.get_field('fields').get_db_prep_save(fields, connection),
+                meta.get_field('created_at').get_db_prep_save(
+                    timezone.now(), connection
+                ),
+                *params,
+            ],
+        )
+        return cursor.rowcount
+
+
+def record_labels_changed(task_ids):
+    # Only that they changed: the names are read with the events.
+    record_task_events(
+        TaskEvent.UPDATED, {task_id: {'labels': None} for task_id in task_ids}
+    )
+
+
+def add_label_names(events):
+    """
+    Fill in the current label names of the events that changed labels,
+    with one query for all of them.
+    """
+    labels = {
+        event.task_id: [] for event in events if 'labels' in event.fields
+    }
+    if labels:
+        for task_id, name in label_pairs(list(labels)):
+            labels[task_id].append(name)
+    for event in events:
+        if 'labels' in event.fields:
+            event.fields['labels'] = labels[event.task_id]
+    return events
+
+
+def prune_task_events():
+    """Delete the events older than anyone reconnecting would ask for."""
+    TaskEvent.objects.filter(
+        created_at__lt=timezone.now() - EVENT_RETENTION
+    ).delete()
+
+
+def latest_event_id():
+    return TaskEvent.objects.aggregate(last=Max('pk'))['last'] or 0
+
+
+def event_message(event):
+    """Format ``event`` as a Server-Sent Events message."""
+    data = json.dumps({
+        'id': event.task_id,
+        'action': event.action,
+        'fields': event.fields,
+    })
+    return 'id: %d\nevent: task\ndata: %s\n\n' % (event.pk, data)
+
+
+def position_message(last_id):
+    # No data, so the browser dispatches nothing, but it still sends
+    # last_id as Last-Event-ID when it reconnects.
+    return 'id: %d\nretry: %d\n\n' % (last_id, RECONNECT_DELAY)
+
+
+class EventCursor:
+    """
+    Read the events after ``last_id`` in id order. Ids are taken when a
+    transaction inserts, not when it commits, so a smaller id can show up
+    after a larger one was read; the ids skipped are looked for again for
+    GAP_TIMEOUT seconds (one rolled back never shows up).
+    """
+
+    def __init__(self, last_id):
+        self.last_id = last_id
+        self.gaps = {}
+
+    def fetch(self):
+        condition = Q(pk__gt=self.last_id)
+        if self.gaps:
+            condition |= Q(pk__in=list(self.gaps))
+        events = list(
+            TaskEvent.objects.filter(condition).order_by('pk')[:EVENT_BATCH]
+        )
+        now = time.monotonic()
+        for event in events:
+            if event.pk > self.last_id:
+                if event.pk - self.last_id <= MAX_GAP:
+                    for pk in range(self.last_id + 1, event.pk):
+                        self.gaps[pk] = now + GAP_TIMEOUT
+                self.last_id = event.pk
+            self.gaps.pop(event.pk, None)
+        self.gaps = {
+            pk: deadline for pk, deadline in self.gaps.items()
+            if deadline > now
+        }
+        return add_label_names(events)
+
+
+def poll_events(cursor):
+    # The poller outlives any request, so nothing else closes the
+    # connections that are past CONN_MAX_AGE or broken.
+    close_old_connections()
+    return cursor.fetch()
+
+
+class TaskEventBroker:
+    """
+    Fan the task events out to the streams open in this process. One
+    poller reads the table every POLL_INTERVAL seconds for all of them
+    and stops when the last one closes. After a failed read it waits
+    twice as long before the next, up to MAX_POLL_BACKOFF seconds.
+    """
+
+    def __init__(self):
+        self.queues = set()
+        self.poller = None
+
+    def running(self):
+        return (
+            self.poller is not None
+            and not self.poller.done()
+            and self.poller.get_loop() is asyncio.get_running_loop()
+        )
+
+    async def start(self):
+        if self.running():
+            return
+        last_id = await sync_to_async(latest_event_id)()
+        if not self.running():
+            self.poller = asyncio.create_task(self.poll(EventCursor(last_id)))
+
+    async def poll(self, cursor):
+        delay = POLL_INTERVAL
+        while self.queues:
+            await asyncio.sleep(delay)
+            try:
+                events = await sync_to_async(poll_events)(cursor)
+            except Exception:
+                logger.exception('Reading task events failed')
+                await sync_to_async(close_old_connections)()
+                delay = min(delay * 2, MAX_POLL_BACKOFF)
+                continue
+            delay = POLL_INTERVAL
+            for event in events:
+                for queue in self.queues:
+                    queue.put_nowait(event)
+
+    async def subscribe(self, last_id):
+        """
+        Yield the events after ``last_id``, then each new one as it is
+        read, and None after KEEPALIVE_INTERVAL seconds without any.
+        """
+        queue = asyncio.Queue()
+        self.queues.add(queue)
+        try:
+            # Started first, so the poller reads whatever was recorded
+            # after the catch-up below.
+            await self.start()
+            cursor = EventCursor(last_id)
+            seen = set()
+            while True:
+                events = await sync_to_async(cursor.fetch)()
+                for event in events:
+                    seen.add(event.pk)
+                    yield event
+                if len(events) < EVENT_BATCH:
+                    break
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), KEEPALIVE_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event.pk > last_id and event.pk not in seen:
+                    yield event
+        finally:
+            self.queues.discard(queue)
+
+
+broker = TaskEventBroker()
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    fields = task_event_fields(instance, created)
+    if created:
+        record_task_events(TaskEvent.CREATED, {instance.pk: fields})
+    elif fields:
+        record_task_events(TaskEvent.UPDATED, {instance.pk: fields})
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    if deleting_in_bulk.get():
+        return
+    record_task_events(TaskEvent.DELETED, {instance.pk: {}})
+
+
+@receiver(m2m_changed, sender=Task.labels.through)
+def task_labels_changed(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    if reverse:
+        # label.task_set.clear() only lists the tasks before the clear.
+        if action == 'pre_clear':
+            instance._cleared_task_ids = list(
+                Task.objects.filter(labels=instance).values_list(
+                    'pk', flat=True
+                )
+            )
+        elif action == 'post_clear':
+            record_labels_changed(instance._cleared_task_ids)
+        elif action in ('post_add', 'post_remove') and pk_set:
+            record_labels_changed(pk_set)
+    elif action == 'post_clear' or (
+        action in ('post_add', 'post_remove') and pk_set
+    ):
+        # add() of labels a task already has sends an empty pk_set.
+        record_labels_changed([instance.pk])
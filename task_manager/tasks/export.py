@@ -0,0 +1,168 @@
+import csv
+import json
+from itertools import islice
+
+from django.db.models import F
+from django.http import StreamingHttpResponse
+
+from task_manager.tasks.rows import anext_chunk, label_pairs
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_COLUMNS = (
+    'id',
+    'name',
+    'description',
+    'status',
+    'author',
+    'assignee',
+    'labels',
+    'created_at',
+)
+# Label names go into a single CSV cell.
+LABEL_SEPARATOR = '|'
+
+
+def _export_values(queryset):
+    return queryset.select_related(None).prefetch_related(None).values(
+        'id',
+        'name',
+        'description',
+        'created_at',
+        status_name=F('status__name'),
+        author_username=F('author__username'),
+        assignee_username=F('assignee__username'),
+    )
+
+
+def _export_row(row, labels):
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'description': row['description'],
+        'status': row['status_name'],
+        'author': row['author_username'],
+        'assignee': row['assignee_username'],
+        'labels': labels.get(row['id'], []),
+        'created_at': row['created_at'],
+    }
+
+
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield one dict per task, reading ``chunk_size`` rows at a time through
+    a server-side cursor and fetching the labels of each chunk in one query.
+    """
+    rows = _export_values(queryset).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        labels = _labels_by_task([row['id'] for row in chunk])
+        for row in chunk:
+            yield _export_row(row, labels)
+
+
+async def aexport_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Async version of export_rows()."""
+    rows = _export_values(queryset).aiterator(chunk_size=chunk_size)
+    while chunk := await anext_chunk(rows, chunk_size):
+        labels = await _alabels_by_task([row['id'] for row in chunk])
+        for row in chunk:
+            yield _export_row(row, labels)
+
+
+def _labels_by_task(task_ids):
+    labels = {}
+    for task_id, name in label_pairs(task_ids):
+        labels.setdefault(task_id, []).append(name)
+    return labels
+
+
+async def _alabels_by_task(task_ids):
+    labels = {}
+    async for task_id, name in label_pairs(task_ids):
+        labels.setdefault(task_id, []).append(name)
+    return labels
+
+
+class Echo:
+    """A file-like object that hands back what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_values(row):
+    row['labels'] = LABEL_SEPARATOR.join(row['labels'])
+    row['assignee'] = row['assignee'] or ''
+    row['created_at'] = row['created_at'].isoformat()
+    return [row[column] for column in EXPORT_COLUMNS]
+
+
+def _jsonl_line(row):
+    row['created_at'] = row['created_at'].isoformat()
+    return json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(_csv_values(row))
+
+
+async def acsv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    async for row in rows:
+        yield writer.writerow(_csv_values(row))
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield _jsonl_line(row)
+
+
+async def ajsonl_lines(rows):
+    async for row in rows:
+        yield _jsonl_line(row)
+
+
+# Format name: (sync lines, async lines, content type).
+EXPORT_FORMATS = {
+    'csv': (csv_lines, acsv_lines, 'text/csv; charset=utf-8'),
+    'jsonl': (
+        jsonl_lines,
+        ajsonl_lines,
+        'application/x-ndjson; charset=utf-8',
+    ),
+}
+
+
+def _attachment(response, export_format, filename):
+    response['Content-Disposition'] = 'attachment; filename="%s.%s"' % (
+        filename, export_format
+    )
+    return response
+
+
+def export_response(queryset, export_format, filename='tasks'):
+    lines, _, content_type = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(
+        lines(export_rows(queryset)),
+        content_type=content_type,
+    )
+    return _attachment(response, export_format, filename)
+
+
+def aexport_response(queryset, export_format, filename='tasks'):
+    """
+    export_response() for async views. The rows come from an async
+    iterator, so under ASGI a slow download does not hold a thread.
+    """
+    _, alines, content_type = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(
+        alines(aexport_rows(queryset)),
+        content_type=content_type,
+    )
+    return _attachment(response, export_format, filename)
@@ -27,27 +27,61 @@
 
 import django_filters
 from django import forms
+from django.db.models import Count, Exists, OuterRef
+from task_manager.labels.models import Label
+from task_manager.reference_data import (
+    CachedModelChoiceField,
+    CachedModelMultipleChoiceField,
+    get_labels,
+    get_statuses,
+)
+from task_manager.statuses.models import Status
 from task_manager.users.models import User
 from task_manager.tasks.models import Task
-# from task_manager.statuses.models import Status
-# from task_manager.labels.models import Label
+from task_manager.tasks.search import search_tasks
+
+LABELS_MODE_ANY = 'any'
+LABELS_MODE_ALL = 'all'
+LABELS_MODE_CHOICES = [
+    (LABELS_MODE_ANY, 'Любая из меток'),
+    (LABELS_MODE_ALL, 'Все выбранные метки'),
+]
+
+
+class CachedModelChoiceFilter(django_filters.ModelChoiceFilter):
+    field_class = CachedModelChoiceField
+
+
+class CachedModelMultipleChoiceFilter(
+        django_filters.ModelMultipleChoiceFilter):
+    field_class = CachedModelMultipleChoiceField
 
 
 class TaskFilter(django_filters.FilterSet):
-    status = django_filters.ModelChoiceFilter(
-        # queryset='statuses.Status'.objects.all(),
-        queryset=None,
+    q = django_filters.CharFilter(
+        label='Поиск',
+        method='filter_search',
+    )
+    status = CachedModelChoiceFilter(
+        queryset=Status.objects.all(),
+        loader=get_statuses,
         label='Статус',
     )
     assignee = django_filters.ModelChoiceFilter(
         queryset=User.objects.all(),
         label='Исполнитель',
     )
-    labels = django_filters.ModelMultipleChoiceFilter(
-        # queryset='labels.Label'.objects.all(),
-        queryset=None,
+    labels = CachedModelMultipleChoiceFilter(
+        queryset=Label.objects.all(),
+        loader=get_labels,
         label='Метка',
-        conjoined=False,
+        method='filter_labels',
+    )
+    labels_mode = django_filters.ChoiceFilter(
+        label='Совпадение меток',
+        choices=LABELS_MODE_CHOICES,
+        empty_label=None,
+        method='filter_labels_mode',
     )
     own_tasks = django_filters.BooleanFilter(
         label='Только свои задачи',
@@ -59,21 +93,36 @@ class TaskFilter(django_filters.FilterSet):
     def __init__(self, *args, **kwargs):
         self.request = kwargs.get('request', None)
         super().__init__(*args, **kwargs)
-        self.filters['status'].field.queryset = Task._meta. \
-            get_field('status').remote_field.model.objects.all()
-        self.filters['labels'].field.queryset = Task._meta. \
-            get_field('labels').remote_field.model.objects.all()
+
+    def filter_search(self, queryset, name, value):
+        return search_tasks(queryset, value)
 
     def filter_own_tasks(self, queryset, name, value):
         if value and self.request:
-            print(
-                "Applying own_tasks filter, user:",
-                self.request.user,
-                "value:", value
-            )
             return queryset.filter(author=self.request.user)
         return queryset
 
+    def filter_labels(self, queryset, name, value):
+        # A correlated EXISTS keeps one row per task, so neither mode needs
+        # DISTINCT, and "all" is a single grouped subquery, not N joins.
+        label_ids = {label.pk for label in value}
+        if not label_ids:
+            return queryset
+        matches = Task.labels.through.objects.filter(
+            task_id=OuterRef('pk'),
+            label_id__in=label_ids,
+        )
+        mode = self.form.cleaned_data.get('labels_mode')
+        if mode == LABELS_MODE_ALL and len(label_ids) > 1:
+            matches = matches.values('task_id').annotate(
+                matched=Count('label_id')
+            ).filter(matched=len(label_ids))
+        return queryset.filter(Exists(matches))
+
+    def filter_labels_mode(self, queryset, name, value):
+        # Only changes how filter_labels combines the selected labels.
+        return queryset
+
     class Meta:
         model = Task
         fields = ['status', 'assignee', 'labels']
@@ -1,13 +1,100 @@
 from django import forms
+from django.core.exceptions import ValidationError
+from task_manager.labels.models import Label
+from task_manager.reference_data import (
+    CachedModelChoiceField,
+    CachedModelMultipleChoiceField,
+    get_labels,
+    get_statuses,
+)
+from task_manager.statuses.models import Status
+from task_manager.tasks.bulk import (
+    BULK_ACTION_CHOICES,
+    BULK_ADD_LABELS,
+    BULK_MAX_TASKS,
+    BULK_REMOVE_LABELS,
+    BULK_SET_STATUS,
+)
+from task_manager.users.models import User
 from .models import Task
 
 
 class TaskForm(forms.ModelForm):
+    status = forms.ModelChoiceField(
+        queryset=Status.objects.all(),
+        label='Статус',
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    assignee = forms.ModelChoiceField(
+        queryset=User.objects.all(),
+        label='Исполнитель',
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    labels = forms.ModelMultipleChoiceField(
+        queryset=Label.objects.all(),
+        label='Метки',
+        required=False,
+        widget=forms.SelectMultiple(attrs={'class': 'form-control'}),
+    )
+
     class Meta:
         model = Task
         fields = ['name', 'description', 'status', 'assignee', 'labels']
-        widgets = {
-            'labels': forms.SelectMultiple(attrs={'class': 'form-control'}),
-            'status': forms.Select(attrs={'class': 'form-control'}),
-            'assignee': forms.Select(attrs={'class': 'form-control'}),
-        }
+
+
+class TaskIdsField(forms.Field):
+    widget = forms.MultipleHiddenInput
+    default_error_messages = {
+        'invalid': 'Некорректный список задач.',
+        'too_many': 'Можно выбрать не больше %(limit)d задач.',
+    }
+
+    def to_python(self, value):
+        if not value:
+            return []
+        try:
+            ids = sorted({int(task_id) for task_id in value})
+        except (TypeError, ValueError):
+            raise ValidationError(
+                self.error_messages['invalid'],
+                code='invalid',
+            )
+        if len(ids) > BULK_MAX_TASKS:
+            raise ValidationError(
+                self.error_messages['too_many'],
+                code='too_many',
+                params={'limit': BULK_MAX_TASKS},
+            )
+        return ids
+
+
+class TaskBulkActionForm(forms.Form):
+    tasks = TaskIdsField(
+        error_messages={'required': 'Выберите хотя бы одну задачу.'},
+    )
+    action = forms.ChoiceField(choices=BULK_ACTION_CHOICES)
+    status = CachedModelChoiceField(
+        queryset=Status.objects.all(),
+        loader=get_statuses,
+        required=False,
+    )
+    assignee = forms.ModelChoiceField(
+        queryset=User.objects.all(),
+        required=False,
+    )
+    labels = CachedModelMultipleChoiceField(
+        queryset=Label.objects.all(),
+        loader=get_labels,
+        required=False,
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        action = cleaned_data.get('action')
+        if action == BULK_SET_STATUS and not cleaned_data.get('status'):
+            self.add_error('status', 'Выберите статус.')
+        if action in (BULK_ADD_LABELS, BULK_REMOVE_LABELS) and \
+                not cleaned_data.get('labels'):
+            self.add_error('labels', 'Выберите метки.')
+        return cleaned_data
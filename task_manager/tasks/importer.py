@@ -0,0 +1,206 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+
+from task_manager import reference_data
+from task_manager.labels.models import Label
+from task_manager.statuses.models import Status
+from task_manager.tasks.events import record_task_events
+from task_manager.tasks.export import LABEL_SEPARATOR
+from task_manager.tasks.models import Task, TaskEvent
+from task_manager.tasks.summary import record_tasks_created
+from task_manager.tasks.versions import tasks_changed
+from task_manager.users.models import User
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+IMPORT_BATCH_SIZE = 5000
+MAX_LENGTHS = {
+    'name': Task._meta.get_field('name').max_length,
+    'status': Status._meta.get_field('name').max_length,
+    'labels': Label._meta.get_field('name').max_length,
+    'author': User._meta.get_field('username').max_length,
+    'assignee': User._meta.get_field('username').max_length,
+}
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_rows(stream, import_format):
+    """Yield ``(line number, row dict)`` pairs from a CSV or JSONL stream."""
+    if import_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            row = error
+        yield line_number, row
+
+
+class TaskImporter:
+    """
+    Import tasks in batches: names of statuses, labels and users are
+    resolved with one query per kind and batch (missing ones are created),
+    tasks go in with bulk_create and labels straight into the through table.
+    Each batch runs in its own transaction.
+    """
+
+    def __init__(self, default_author, batch_size=IMPORT_BATCH_SIZE):
+        self.default_author = default_author
+        self.batch_size = batch_size
+        self.statuses = {}
+        self.labels = {}
+        self.users = {default_author.username: default_author.pk}
+        self.imported = 0
+        self.errors = []
+
+    def run(self, rows, progress=None):
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return self.imported
+            errors = self.import_batch(batch)
+            if progress:
+                progress(self, errors)
+
+    def import_batch(self, batch):
+        """Import one batch and return its ``(line number, error)`` pairs."""
+        parsed = []
+        errors = []
+        for line_number, row in batch:
+            try:
+                parsed.append(self.parse_row(row))
+            except RowError as error:
+                errors.append((line_number, str(error)))
+        self.errors.extend(errors)
+
+        with transaction.atomic():
+            created = self.resolve(
+                Status, 'name', self.statuses,
+                {row['status'] for row in parsed},
+            )
+            created |= self.resolve(
+                Label, 'name', self.labels,
+                {name for row in parsed for name in row['labels']},
+            )
+            created |= self.resolve(
+                User, 'username', self.users,
+                {row[key] for row in parsed
+                 for key in ('author', 'assignee') if row[key]},
+            )
+            tasks = Task.objects.bulk_create(
+                [
+                    Task(
+                        name=row['name'],
+                        description=row['description'],
+                        status_id=self.statuses[row['status']],
+                        author_id=self.users[row['author']],
+                        assignee_id=self.users.get(row['assignee']),
+                    )
+                    for row in parsed
+                ],
+                batch_size=self.batch_size,
+            )
+            task_labels = Task.labels.through.objects.bulk_create(
+                [
+                    Task.labels.through(
+                        task_id=task.pk,
+                        label_id=self.labels[name],
+                    )
+                    for task, row in zip(tasks, parsed)
+                    for name in row['labels']
+                ],
+                batch_size=self.batch_size,
+            )
+            # bulk_create sends no post_save signals.
+            if created:
+                reference_data.invalidate()
+            if tasks:
+                tasks_changed()
+                record_tasks_created(tasks, task_labels)
+                # The names as imported, without reading them back.
+                record_task_events(TaskEvent.CREATED, {
+                    task.pk: {
+                        'name': row['name'],
+                        'status': row['status'],
+                        'assignee': row['assignee'],
+                    }
+                    for task, row in zip(tasks, parsed)
+                })
+        self.imported += len(tasks)
+        return errors
+
+    def parse_row(self, row):
+        if not isinstance(row, dict):
+            raise RowError('Malformed row: %s' % row)
+        labels = row.get('labels') or []
+        if isinstance(labels, str):
+            labels = labels.split(LABEL_SEPARATOR)
+        if not isinstance(labels, list):
+            raise RowError('labels must be a list.')
+        parsed = {
+            'name': _text(row.get('name')),
+            'description': row.get('description') or '',
+            'status': _text(row.get('status')),
+            'author': _text(row.get('author')) or
+            self.default_author.username,
+            'assignee': _text(row.get('assignee')) or None,
+            'labels': list(dict.fromkeys(
+                _text(label) for label in labels if _text(label)
+            )),
+        }
+        for field in ('name', 'status'):
+            if not parsed[field]:
+                raise RowError('%s is required.' % field)
+        for field, max_length in MAX_LENGTHS.items():
+            values = parsed[field]
+            if not isinstance(values, list):
+                values = [values]
+            if any(value and len(value) > max_length for value in values):
+                raise RowError(
+                    '%s is longer than %d characters.' % (field, max_length)
+                )
+        return parsed
+
+    def resolve(self, model, field, known, names):
+        """
+        Add the ids of ``names`` to ``known``, creating the missing objects.
+        Return True if anything was created.
+        """
+        missing = names - known.keys()
+        if not missing:
+            return False
+        known.update(self.existing(model, field, missing))
+        missing -= known.keys()
+        if not missing:
+            return False
+        new = [model(**{field: name}) for name in sorted(missing)]
+        if model is User:
+            for user in new:
+                user.set_unusable_password()
+        model.objects.bulk_create(new, batch_size=self.batch_size)
+        known.update(self.existing(model, field, missing))
+        return True
+
+    def existing(self, model, field, names):
+        ids = {}
+        # Label names are not unique; the oldest label wins.
+        for name, pk in model.objects.filter(
+            **{field + '__in': names}
+        ).order_by('-pk').values_list(field, 'pk'):
+            ids[name] = pk
+        return ids
+
+
+def _text(value):
+    return str(value).strip() if value is not None else ''
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from task_manager.labels.models import Label
+from task_manager.statuses.models import Status
+from task_manager.tasks.models import Task
+from task_manager.tasks.query_plans import (
+    build_list_queries,
+    explain,
+    filter_combinations,
+    full_scans,
+)
+from task_manager.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Explain the task list query for every combination of the task '
+        'filters and fail if any of them reads a task table with a full scan.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Print the query plan of every combination.',
+        )
+
+    def handle(self, *args, **options):
+        status = Status.objects.first()
+        label = Label.objects.first()
+        user = User.objects.first()
+        task = Task.objects.first()
+        if not (status and label and user and task):
+            raise CommandError(
+                'Need at least one status, label, user and task to explain '
+                'the filter queries.'
+            )
+        values = {
+            'q': task.name,
+            'status': status.pk,
+            'assignee': user.pk,
+            'labels': label.pk,
+            'own_tasks': 'on',
+        }
+
+        failures = []
+        for combination in filter_combinations():
+            params = {name: values[name] for name in combination}
+            name = '+'.join(combination) or 'no filters'
+            first_page, cursor_page = build_list_queries(params, user)
+            for suffix, queryset in (('', first_page),
+                                     (' (cursor)', cursor_page)):
+                if queryset is None:
+                    continue
+                plan = explain(queryset)
+                scans = full_scans(plan)
+                if scans:
+                    failures.append(name + suffix)
+                    self.stdout.write(self.style.ERROR(
+                        'FULL SCAN %s%s: %s' % (name, suffix, ', '.join(scans))
+                    ))
+                else:
+                    self.stdout.write('index scan %s%s' % (name, suffix))
+                if options['verbose_plans']:
+                    self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(
+                '%d filter combinations use a full scan.' % len(failures)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'All task filter combinations use index scans.'
+        ))
@@ -0,0 +1,86 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from task_manager.tasks.importer import (
+    IMPORT_BATCH_SIZE,
+    IMPORT_FORMATS,
+    TaskImporter,
+    read_rows,
+)
+from task_manager.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Import tasks from a CSV or JSON Lines file in the format of the '
+        'task export. Missing statuses, labels and users are created.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='File to import, or "-" to read from stdin.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=IMPORT_FORMATS,
+            help='Input format (by default taken from the file extension).',
+        )
+        parser.add_argument(
+            '--author',
+            required=True,
+            help='Username of the author for rows without one.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Rows per bulk insert and transaction.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        import_format = options['format'] or path.rsplit('.', 1)[-1]
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError(
+                'Cannot tell the format of %s, use --format.' % path
+            )
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        try:
+            author = User.objects.get(username=options['author'])
+        except User.DoesNotExist:
+            raise CommandError('User %s does not exist.' % options['author'])
+
+        importer = TaskImporter(author, options['batch_size'])
+        started = time.monotonic()
+
+        def progress(importer, errors):
+            for line_number, message in errors:
+                self.stderr.write('Line %d: %s' % (line_number, message))
+            elapsed = time.monotonic() - started
+            self.stdout.write('Imported %d tasks (%d/s)' % (
+                importer.imported, importer.imported / max(elapsed, 1e-6)
+            ))
+
+        if path == '-':
+            importer.run(read_rows(sys.stdin, import_format), progress)
+        else:
+            try:
+                stream = open(path, newline='', encoding='utf-8-sig')
+            except OSError as error:
+                raise CommandError(error)
+            with stream:
+                importer.run(read_rows(stream, import_format), progress)
+
+        summary = 'Imported %d tasks in %.1fs, skipped %d rows.' % (
+            importer.imported,
+            time.monotonic() - started,
+            len(importer.errors),
+        )
+        if importer.errors:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
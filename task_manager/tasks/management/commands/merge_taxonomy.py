@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from task_manager.labels.models import Label
+from task_manager.statuses.models import Status
+from task_manager.tasks.merge import merge_label, merge_status
+
+KINDS = {
+    'status': (Status, merge_status),
+    'label': (Label, merge_label),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Move every task from one status or label to another and delete '
+        'the first one.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=KINDS)
+        parser.add_argument('source', help='Name of the one to merge away.')
+        parser.add_argument('target', help='Name of the one to keep.')
+        parser.add_argument(
+            '--by-id',
+            action='store_true',
+            help='Take SOURCE and TARGET as ids instead of names.',
+        )
+
+    def handle(self, *args, **options):
+        model, merge = KINDS[options['kind']]
+        source = self.find(model, options['source'], options['by_id'])
+        target = self.find(model, options['target'], options['by_id'])
+        if source.pk == target.pk:
+            raise CommandError('SOURCE and TARGET are the same.')
+        moved = merge(source, target)
+        self.stdout.write(self.style.SUCCESS(
+            'Merged %s into %s, %d tasks moved.' % (source, target, moved)
+        ))
+
+    def find(self, model, value, by_id):
+        if by_id and not value.isdigit():
+            raise CommandError('%s is not an id.' % value)
+        lookup = {'pk': value} if by_id else {'name': value}
+        matches = list(model.objects.filter(**lookup)[:2])
+        if not matches:
+            raise CommandError('%s %s does not exist.' % (
+                model.__name__, value
+            ))
+        if len(matches) > 1:
+            raise CommandError(
+                'More than one %s is named %s, use --by-id.' % (
+                    model.__name__.lower(), value
+                )
+            )
+        return matches[0]
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from task_manager.tasks.summary import check_task_counts, rebuild_task_counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount the task dashboard from the tasks table. With --check, '
+        'only compare the stored counts with live GROUP BY queries and fail '
+        'if any differ.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Report the counts that are out of date, change nothing.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            rows = rebuild_task_counts()
+            self.stdout.write(self.style.SUCCESS(
+                'Rebuilt the task counts, %d rows.' % rows
+            ))
+            return
+        mismatches = check_task_counts()
+        for dimension, key, stored, live in mismatches:
+            self.stderr.write('%s %s: stored %d, live %d' % (
+                dimension, key or '-', stored, live
+            ))
+        if mismatches:
+            raise CommandError(
+                '%d task counts are out of date, run rebuild_task_counts.'
+                % len(mismatches)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'The task counts are up to date.'
+        ))
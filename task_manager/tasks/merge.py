@@ -0,0 +1,77 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from task_manager.tasks.events import record_queryset_events
+from task_manager.tasks.models import Task, TaskCount, TaskEvent, TaskLabel
+from task_manager.tasks.summary import (
+    apply_count_deltas,
+    count_key,
+    record_labels_removed,
+)
+from task_manager.tasks.versions import tasks_changed, touch_tasks
+
+
+@transaction.atomic
+def merge_status(source, target):
+    """
+    Move every task from ``source`` to ``target`` with one UPDATE, delete
+    ``source`` and return the number of tasks moved. Their events are
+    recorded with one INSERT ... SELECT, before the UPDATE makes them
+    indistinguishable from the tasks ``target`` already had.
+    """
+    if source.pk == target.pk:
+        raise ValueError('Cannot merge a status into itself.')
+    tasks = Task.objects.filter(status=source)
+    record_queryset_events(
+        TaskEvent.UPDATED, {'status': target.name}, tasks
+    )
+    moved = tasks.update(status=target, updated_at=timezone.now())
+    if moved:
+        apply_count_deltas({
+            count_key(TaskCount.STATUS, source.pk): -moved,
+            count_key(TaskCount.STATUS, target.pk): moved,
+        })
+    source.delete()
+    if moved:
+        # update() sends no signals.
+        tasks_changed()
+    return moved
+
+
+@transaction.atomic
+def merge_label(source, target):
+    """
+    Give ``target`` to every task labelled ``source``, delete ``source``
+    and return the number of tasks that had it. The through table is
+    rewritten with one INSERT ... SELECT for the tasks that do not have
+    ``target`` yet and one DELETE of the ``source`` rows.
+    """
+    if source.pk == target.pk:
+        raise ValueError('Cannot merge a label into itself.')
+    tasks = Task.objects.filter(labels=source)
+    moved = touch_tasks(tasks)
+    if moved:
+        # Only that the labels changed: the names are read with the
+        # events.
+        record_queryset_events(TaskEvent.UPDATED, {'labels': None}, tasks)
+        table = connection.ops.quote_name(TaskLabel._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO {table} (task_id, label_id) '
+                'SELECT source.task_id, %s FROM {table} source '
+                'WHERE source.label_id = %s AND NOT EXISTS ('
+                'SELECT 1 FROM {table} existing '
+                'WHERE existing.task_id = source.task_id '
+                'AND existing.label_id = %s)'.format(table=table),
+                [target.pk, source.pk, target.pk],
+            )
+            apply_count_deltas({
+                count_key(TaskCount.LABEL, target.pk): cursor.rowcount
+            })
+        source_rows = TaskLabel.objects.filter(label=source)
+        record_labels_removed(source_rows)
+        source_rows.delete()
+    source.delete()
+    if moved:
+        tasks_changed()
+    return moved
@@ -0,0 +1,48 @@
+from django.db import migrations, models
+
+from task_manager.migration_operations import (
+    AddIndexConcurrently,
+    RunSQLForVendor,
+)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0002_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['created_at', 'id'], name='task_created_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['author', 'created_at', 'id'], name='task_author_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['assignee', 'created_at', 'id'], name='task_assignee_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='task_status_created_idx'),
+        ),
+        # The auto-created M2M table only has (task_id, label_id) and single
+        # column indexes; filtering by label needs label_id first.
+        RunSQLForVendor(
+            'postgresql',
+            sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS task_labels_label_task_idx '
+                'ON tasks_task_labels (label_id, task_id);',
+            reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS task_labels_label_task_idx;',
+        ),
+        RunSQLForVendor(
+            'sqlite',
+            sql='CREATE INDEX IF NOT EXISTS task_labels_label_task_idx '
+                'ON tasks_task_labels (label_id, task_id);',
+            reverse_sql='DROP INDEX IF EXISTS task_labels_label_task_idx;',
+        ),
+    ]
@@ -0,0 +1,69 @@
+from django.db import migrations
+
+from task_manager.migration_operations import RunSQLForVendor
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0003_task_filter_indexes'),
+    ]
+
+    operations = [
+        # A weighted tsvector in a stored generated column that Django does
+        # not know about; task_manager.tasks.search reads it with raw SQL.
+        RunSQLForVendor(
+            'postgresql',
+            sql=[
+                "ALTER TABLE tasks_task ADD COLUMN search_vector tsvector "
+                "GENERATED ALWAYS AS ("
+                "setweight(to_tsvector('russian', coalesce(name, '')), 'A') "
+                "|| setweight(to_tsvector('russian', "
+                "coalesce(description, '')), 'B')"
+                ") STORED;",
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS '
+                'task_search_vector_idx '
+                'ON tasks_task USING GIN (search_vector);',
+            ],
+            reverse_sql=[
+                'DROP INDEX CONCURRENTLY IF EXISTS task_search_vector_idx;',
+                'ALTER TABLE tasks_task DROP COLUMN IF EXISTS search_vector;',
+            ],
+        ),
+        # An external-content FTS5 table over tasks_task, kept in sync by
+        # triggers for every write path, including bulk_create and update().
+        RunSQLForVendor(
+            'sqlite',
+            sql=[
+                "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_task_fts USING fts5("
+                "name, description, content='tasks_task', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2');",
+                'CREATE TRIGGER IF NOT EXISTS tasks_task_fts_insert '
+                'AFTER INSERT ON tasks_task BEGIN '
+                'INSERT INTO tasks_task_fts (rowid, name, description) '
+                'VALUES (new.id, new.name, new.description); END;',
+                'CREATE TRIGGER IF NOT EXISTS tasks_task_fts_delete '
+                'AFTER DELETE ON tasks_task BEGIN '
+                "INSERT INTO tasks_task_fts "
+                "(tasks_task_fts, rowid, name, description) "
+                "VALUES ('delete', old.id, old.name, old.description); END;",
+                'CREATE TRIGGER IF NOT EXISTS tasks_task_fts_update '
+                'AFTER UPDATE OF name, description ON tasks_task BEGIN '
+                "INSERT INTO tasks_task_fts "
+                "(tasks_task_fts, rowid, name, description) "
+                "VALUES ('delete', old.id, old.name, old.description); "
+                'INSERT INTO tasks_task_fts (rowid, name, description) '
+                'VALUES (new.id, new.name, new.description); END;',
+                "INSERT INTO tasks_task_fts (tasks_task_fts) "
+                "VALUES ('rebuild');",
+            ],
+            reverse_sql=[
+                'DROP TRIGGER IF EXISTS tasks_task_fts_insert;',
+                'DROP TRIGGER IF EXISTS tasks_task_fts_delete;',
+                'DROP TRIGGER IF EXISTS tasks_task_fts_update;',
+                'DROP TABLE IF EXISTS tasks_task_fts;',
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labels', '0001_initial'),
+        ('tasks', '0005_task_updated_at'),
+    ]
+
+    # The table, its columns and the unique constraint already exist as the
+    # implicit through table of Task.labels, so only the state changes.
+    # PROTECT is checked by Django when deleting. The schema only gets
+    # ON DELETE RESTRICT on PostgreSQL, in 0009_tasklabel_label_restrict.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='TaskLabel',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('label', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='labels.label')),
+                        ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tasks.task')),
+                    ],
+                    options={
+                        'db_table': 'tasks_task_labels',
+                        'unique_together': {('task', 'label')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='task',
+                    name='labels',
+                    field=models.ManyToManyField(blank=True, help_text='Метки задачи', through='tasks.TaskLabel', to='labels.label'),
+                ),
+            ],
+        ),
+    ]
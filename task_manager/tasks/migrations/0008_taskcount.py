@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+from task_manager.tasks.summary import rebuild_task_counts
+
+
+def fill_task_counts(apps, schema_editor):
+    rebuild_task_counts(
+        apps.get_model('tasks', 'Task'),
+        apps.get_model('tasks', 'TaskCount'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_taskevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('status', 'Статус'), ('assignee', 'Исполнитель'), ('label', 'Метка'), ('week', 'Неделя создания')], max_length=10)),
+                ('key', models.CharField(blank=True, max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('dimension', 'key')},
+            },
+        ),
+        migrations.RunPython(fill_task_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+from task_manager.migration_operations import RunSQLForVendor
+
+# Django creates the label foreign key as NO ACTION, DEFERRABLE INITIALLY
+# DEFERRED: a label deleted while a task still has it only fails at
+# commit. ON DELETE RESTRICT fails the DELETE itself.
+RESTRICT_SQL = [
+    """
+    DO $$
+    DECLARE name text;
+    BEGIN
+        FOR name IN
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = 'tasks_task_labels'::regclass
+            AND confrelid = 'labels_label'::regclass AND contype = 'f'
+        LOOP
+            EXECUTE format(
+                'ALTER TABLE tasks_task_labels DROP CONSTRAINT %I', name
+            );
+        END LOOP;
+    END $$;
+    """,
+    'ALTER TABLE tasks_task_labels '
+    'ADD CONSTRAINT tasks_task_labels_label_id_restrict '
+    'FOREIGN KEY (label_id) REFERENCES labels_label (id) '
+    'ON DELETE RESTRICT;',
+]
+RESTRICT_REVERSE_SQL = [
+    'ALTER TABLE tasks_task_labels '
+    'DROP CONSTRAINT tasks_task_labels_label_id_restrict;',
+    'ALTER TABLE tasks_task_labels '
+    'ADD CONSTRAINT tasks_task_labels_label_id_fk_labels_label_id '
+    'FOREIGN KEY (label_id) REFERENCES labels_label (id) '
+    'DEFERRABLE INITIALLY DEFERRED;',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_taskcount'),
+    ]
+
+    # SQLite cannot change a constraint without rebuilding the table; its
+    # deferred foreign key still fails the transaction at commit.
+    operations = [
+        RunSQLForVendor(
+            'postgresql',
+            sql=RESTRICT_SQL,
+            reverse_sql=RESTRICT_REVERSE_SQL,
+        ),
+    ]
@@ -1,6 +1,23 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from django.db import models
 from django.conf import settings
 
+# Set while a queryset of tasks is deleted by code that records their
+# events and counts for all of them at once; the delete receivers of
+# each task then leave them alone.
+deleting_in_bulk = ContextVar('deleting_in_bulk', default=False)
+
+
+@contextmanager
+def delete_in_bulk():
+    token = deleting_in_bulk.set(True)
+    try:
+        yield
+    finally:
+        deleting_in_bulk.reset(token)
+
 
 class Task(models.Model):
     name = models.CharField(max_length=200, help_text='Название задачи')
@@ -25,15 +42,132 @@ class Task(models.Model):
         help_text='Исполнитель задачи'
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     labels = models.ManyToManyField(
         'labels.Label',
+        through='TaskLabel',
         blank=True,
         help_text='Метки задачи'
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Kept so that task events only carry the fields a save changed.
+        instance._loaded_values = dict(zip(field_names, (
+            value for value in values if value is not models.DEFERRED
+        )))
+        return instance
+
+    def save(self, **kwargs):
+        super().save(**kwargs)
+        # After the post_save receivers, which compare with what was
+        # loaded: the next save is compared with what this one wrote.
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            fields = self._meta.concrete_fields
+        else:
+            fields = [self._meta.get_field(name) for name in update_fields]
+        deferred = self.get_deferred_fields()
+        loaded = getattr(self, '_loaded_values', {})
+        loaded.update({
+            field.attname: getattr(self, field.attname)
+            for field in fields if field.attname not in deferred
+        })
+        self._loaded_values = loaded
+
     def __str__(self):
         return self.name
 
     class Meta:
         verbose_name = 'Задача'
         verbose_name_plural = 'Задачи'
+        indexes = [
+            models.Index(
+                fields=['created_at', 'id'],
+                name='task_created_id_idx',
+            ),
+            models.Index(
+                fields=['author', 'created_at', 'id'],
+                name='task_author_created_idx',
+            ),
+            models.Index(
+                fields=['assignee', 'created_at', 'id'],
+                name='task_assignee_created_idx',
+            ),
+            models.Index(
+                fields=['status', 'created_at', 'id'],
+                name='task_status_created_idx',
+            ),
+            models.Index(
+                fields=['updated_at'],
+                name='task_updated_at_idx',
+            ),
+        ]
+
+
+class TaskLabel(models.Model):
+    # The table Django created for the implicit many-to-many; declared so
+    # that labels still attached to tasks are protected from deletion.
+    # The database refuses them too: see 0009_tasklabel_label_restrict.
+    task = models.ForeignKey(Task, on_delete=models.CASCADE)
+    label = models.ForeignKey('labels.Label', on_delete=models.PROTECT)
+
+    class Meta:
+        db_table = 'tasks_task_labels'
+        unique_together = [('task', 'label')]
+
+
+class TaskEvent(models.Model):
+    """
+    A task created, updated or deleted, as the live task list shows it.
+    The table carries the events between workers; see tasks/events.py.
+    """
+
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTION_CHOICES = [
+        (CREATED, 'Создана'),
+        (UPDATED, 'Изменена'),
+        (DELETED, 'Удалена'),
+    ]
+
+    # Not a foreign key: the events of deleted tasks outlive them.
+    task_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    fields = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return '%s %s' % (self.action, self.task_id)
+
+
+class TaskCount(models.Model):
+    """
+    The number of tasks with one status, assignee, label or creation week,
+    kept up to date as tasks change; see tasks/summary.py.
+    """
+
+    STATUS = 'status'
+    ASSIGNEE = 'assignee'
+    LABEL = 'label'
+    WEEK = 'week'
+    DIMENSION_CHOICES = [
+        (STATUS, 'Статус'),
+        (ASSIGNEE, 'Исполнитель'),
+        (LABEL, 'Метка'),
+        (WEEK, 'Неделя создания'),
+    ]
+
+    dimension = models.CharField(max_length=10, choices=DIMENSION_CHOICES)
+    # The pk of the status, user or label ('' for no assignee), or the
+    # Monday the week starts on.
+    key = models.CharField(max_length=20, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = [('dimension', 'key')]
+
+    def __str__(self):
+        return '%s %s: %d' % (self.dimension, self.key, self.count)
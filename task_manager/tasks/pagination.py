@@ -0,0 +1,175 @@
+import base64
+import binascii
+import json
+from datetime import date
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value):
+    # Full isoformat: DjangoJSONEncoder would cut datetimes to milliseconds.
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError('Cannot encode %r in a cursor.' % (value,))
+
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Keyset page of %s rows>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Seek-based paginator: every page is one indexed range query over a
+    stable, unique ordering, so the cost does not depend on how deep the
+    page is. Cursors are opaque url-safe strings holding the boundary row.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('created_at', 'id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    def get_page_queryset(self, cursor=None):
+        queryset = self.queryset
+        direction = 'next'
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                self._seek(values, backwards=direction == 'prev')
+            )
+        if direction == 'prev':
+            queryset = queryset.order_by(*self._reversed_ordering())
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        return queryset[:self.per_page + 1], direction
+
+    def page(self, cursor=None):
+        queryset, direction = self.get_page_queryset(cursor)
+        return self.make_page(list(queryset), direction, cursor)
+
+    async def apage(self, cursor=None):
+        queryset, direction = self.get_page_queryset(cursor)
+        rows = [row async for row in queryset]
+        return self.make_page(rows, direction, cursor)
+
+    def make_page(self, rows, direction, cursor):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == 'prev':
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.cursor_for(rows[-1], 'next')
+        if rows and has_previous:
+            previous_cursor = self.cursor_for(rows[0], 'prev')
+        return KeysetPage(rows, self, next_cursor, previous_cursor)
+
+    def cursor_for(self, row, direction='next'):
+        return self.encode_cursor(self._key(row), direction)
+
+    def encode_cursor(self, values, direction):
+        payload = json.dumps(
+            {'d': direction, 'k': list(values)},
+            default=_encode_value,
+            separators=(',', ':'),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, values = payload['d'], payload['k']
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise InvalidCursor('Malformed cursor.')
+        if direction not in ('next', 'prev') or \
+                not isinstance(values, list) or \
+                len(values) != len(self.ordering):
+            raise InvalidCursor('Malformed cursor.')
+        return direction, [
+            self._to_python(name, value)
+            for name, value in zip(self._field_names(), values)
+        ]
+
+    def _field_names(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def _reversed_ordering(self):
+        return [
+            field[1:] if field.startswith('-') else '-' + field
+            for field in self.ordering
+        ]
+
+    def _key(self, row):
+        if isinstance(row, dict):
+            return [row[name] for name in self._field_names()]
+        return [getattr(row, name) for name in self._field_names()]
+
+    def _to_python(self, name, value):
+        # No ordering key is null, and a null would fail the seek filter.
+        if value is None:
+            raise InvalidCursor('Malformed cursor.')
+        # Annotations such as search_rank convert like their output field:
+        # FloatField.to_python() is float().
+        annotation = self.queryset.query.annotations.get(name)
+        try:
+            if annotation is not None:
+                field = annotation.output_field
+            else:
+                field = self.queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        try:
+            return field.to_python(value)
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor('Malformed cursor.')
+
+    def _seek(self, values, backwards=False):
+        # (a, b) > (x, y) is spelled as a >= x AND (a > x OR (a = x AND b > y))
+        # so that the leading column still bounds an index range scan.
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            ascending = not field.startswith('-')
+            lookup = 'gt' if ascending != backwards else 'lt'
+            condition |= equal & Q(**{'%s__%s' % (name, lookup): value})
+            equal &= Q(**{name: value})
+        first = self.ordering[0]
+        lookup = 'gte' if (not first.startswith('-')) != backwards else 'lte'
+        return Q(**{'%s__%s' % (first.lstrip('-'), lookup): values[0]}) & \
+            condition
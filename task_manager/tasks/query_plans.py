@@ -0,0 +1,75 @@
+import itertools
+import json
+
+from django.db import connection, transaction
+from django.test import RequestFactory
+
+from task_manager.tasks.filters import TaskFilter
+from task_manager.tasks.views import TaskListView
+
+FILTER_PARAMS = ('q', 'status', 'assignee', 'labels', 'own_tasks')
+TASK_TABLES = ('tasks_task', 'tasks_task_labels')
+
+
+def filter_combinations():
+    for size in range(len(FILTER_PARAMS) + 1):
+        yield from itertools.combinations(FILTER_PARAMS, size)
+
+
+def build_list_queries(params, user):
+    """
+    Return the queries TaskListView runs for the given GET params: the
+    first page, and a page after a cursor (None if there are no rows).
+    """
+    request = RequestFactory().get('/tasks/', params)
+    request.user = user
+    view = TaskListView()
+    view.setup(request)
+    filterset = view.filterset = view.get_filterset(TaskFilter)
+    if filterset.is_bound and not filterset.is_valid():
+        raise ValueError(filterset.errors)
+    paginator = view.get_paginator(
+        view.get_row_queryset(filterset.qs), view.paginate_by
+    )
+    first_page, _direction = paginator.get_page_queryset()
+    row = first_page.first()
+    if row is None:
+        return first_page, None
+    cursor_page, _direction = paginator.get_page_queryset(
+        paginator.cursor_for(row)
+    )
+    return first_page, cursor_page
+
+
+def explain(queryset):
+    if connection.vendor == 'postgresql':
+        # Tiny tables make the planner prefer sequential scans; switching
+        # them off shows whether an index can serve the query at all.
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain(format='json')
+    return queryset.explain()
+
+
+def full_scans(plan):
+    """Return the task tables that the plan reads with a full table scan."""
+    if connection.vendor == 'postgresql':
+        return sorted(_postgres_seq_scans(json.loads(plan)[0]['Plan']))
+    scans = set()
+    for line in plan.splitlines():
+        words = line.strip(' -|`').split()
+        if len(words) >= 2 and words[0] == 'SCAN' and \
+                words[1] in TASK_TABLES and 'INDEX' not in words:
+            scans.add(words[1])
+    return sorted(scans)
+
+
+def _postgres_seq_scans(node):
+    scans = set()
+    if node.get('Node Type') == 'Seq Scan' and \
+            node.get('Relation Name') in TASK_TABLES:
+        scans.add(node['Relation Name'])
+    for child in node.get('Plans', []):
+        scans |= _postgres_seq_scans(child)
+    return scans
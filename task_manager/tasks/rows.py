@@ -0,0 +1,181 @@
+from itertools import islice
+
+from django.db.models import F
+from django.urls import reverse
+
+from task_manager.tasks.models import Task
+
+ROW_CHUNK_SIZE = 2000
+ROW_FIELDS = ('id', 'name', 'created_at')
+ROW_EXPRESSIONS = {
+    'status_name': F('status__name'),
+    'author_username': F('author__username'),
+    'assignee_username': F('assignee__username'),
+}
+ROW_URL_NAMES = ('task_detail', 'task_update', 'task_delete')
+# Reversed in place of a pk, then replaced by each row's.
+URL_PK_PLACEHOLDER = 987654321987654321
+
+
+class TaskRow:
+    """
+    The columns the task list shows, without the model instances behind
+    them: no description, no user passwords, no per-row state.
+    """
+
+    __slots__ = (
+        'id',
+        'name',
+        'created_at',
+        'status_name',
+        'author_username',
+        'assignee_username',
+        'labels',
+        'url_formats',
+    )
+
+    def __init__(self, values, url_formats=None):
+        self.id = values['id']
+        self.name = values['name']
+        self.created_at = values['created_at']
+        self.status_name = values['status_name']
+        self.author_username = values['author_username']
+        self.assignee_username = values['assignee_username']
+        self.labels = []
+        # Shared by the rows built together; see row_url_formats().
+        self.url_formats = url_formats
+
+    @property
+    def pk(self):
+        return self.id
+
+    def get_url(self, name):
+        if self.url_formats is None:
+            return reverse(name, kwargs={'pk': self.id})
+        return self.url_formats[name] % self.id
+
+    @property
+    def detail_url(self):
+        return self.get_url('task_detail')
+
+    @property
+    def update_url(self):
+        return self.get_url('task_update')
+
+    @property
+    def delete_url(self):
+        return self.get_url('task_delete')
+
+    def __eq__(self, other):
+        # A row stands in for its task, like model instances compare by pk.
+        if isinstance(other, (TaskRow, Task)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __repr__(self):
+        return '<TaskRow %s: %s>' % (self.id, self.name)
+
+
+def task_row_values(queryset, *fields):
+    """
+    Project a task queryset onto the row columns, plus ``fields`` (e.g.
+    the keys a paginator orders by), as ``values()`` dicts.
+    """
+    extra = [field for field in fields if field not in ROW_FIELDS]
+    return queryset.select_related(None).prefetch_related(None).values(
+        *ROW_FIELDS, *extra, **ROW_EXPRESSIONS
+    )
+
+
+def row_url_formats():
+    """
+    Return ``{url name: %-format}`` for the links of a row. Reversing the
+    three links of every row was most of the time a page of rows took to
+    render; this reverses each once for all of them.
+    """
+    placeholder = str(URL_PK_PLACEHOLDER)
+    return {
+        name: reverse(name, kwargs={'pk': URL_PK_PLACEHOLDER}).replace(
+            '%', '%%'
+        ).replace(placeholder, '%d')
+        for name in ROW_URL_NAMES
+    }
+
+
+def label_pairs(task_ids):
+    """
+    Return (task id, label name) pairs for the tasks in ``task_ids``, the
+    names of each task in order, with one query on the through table.
+    """
+    return Task.labels.through.objects.filter(
+        task_id__in=task_ids
+    ).order_by('task_id', 'label__name').values_list(
+        'task_id', 'label__name'
+    )
+
+
+def build_task_rows(values):
+    """
+    Turn ``task_row_values()`` dicts into TaskRow objects and attach the
+    label names of all of them with one query on the through table.
+    """
+    url_formats = row_url_formats()
+    rows = [TaskRow(row, url_formats) for row in values]
+    by_id = {row.id: row for row in rows}
+    if by_id:
+        for task_id, name in label_pairs(list(by_id)):
+            by_id[task_id].labels.append(name)
+    return rows
+
+
+async def abuild_task_rows(values):
+    """Async version of build_task_rows()."""
+    url_formats = row_url_formats()
+    rows = [TaskRow(row, url_formats) for row in values]
+    by_id = {row.id: row for row in rows}
+    if by_id:
+        async for task_id, name in label_pairs(list(by_id)):
+            by_id[task_id].labels.append(name)
+    return rows
+
+
+async def anext_chunk(rows, size):
+    # list(islice(rows, size)) for an async iterator.
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            break
+    return chunk
+
+
+def task_row_chunks(values, chunk_size=ROW_CHUNK_SIZE):
+    """
+    Yield lists of up to ``chunk_size`` TaskRow objects for the
+    ``task_row_values()`` queryset ``values``, read through a server-side
+    cursor, with one label query per list.
+    """
+    rows = values.iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        yield build_task_rows(chunk)
+
+
+async def atask_row_chunks(values, chunk_size=ROW_CHUNK_SIZE):
+    """Async version of task_row_chunks()."""
+    rows = values.aiterator(chunk_size=chunk_size)
+    while chunk := await anext_chunk(rows, chunk_size):
+        yield await abuild_task_rows(chunk)
+
+
+def task_rows(queryset, chunk_size=ROW_CHUNK_SIZE):
+    """
+    Return the TaskRow objects of every task in ``queryset``, reading
+    ``chunk_size`` rows, and their labels, at a time.
+    """
+    rows = []
+    for chunk in task_row_chunks(task_row_values(queryset), chunk_size):
+        rows.extend(chunk)
+    return rows
@@ -0,0 +1,126 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'russian'
+
+# PostgreSQL keeps a weighted tsvector in a stored generated column,
+# added by migration 0004_task_search, that Django does not know about; it
+# is only ever read through raw SQL below.
+
+# SQLite gets an external-content FTS5 table over tasks_task. Triggers keep
+# it in sync for every write path, including bulk_create and update(). The
+# statements are those of migration 0004_task_search, for
+# ensure_sqlite_fts() to run again.
+SQLITE_FTS_TABLE_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_task_fts USING fts5("
+    "name, description, content='tasks_task', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2');"
+)
+SQLITE_FTS_TRIGGERS_SQL = [
+    'CREATE TRIGGER IF NOT EXISTS tasks_task_fts_insert '
+    'AFTER INSERT ON tasks_task BEGIN '
+    'INSERT INTO tasks_task_fts (rowid, name, description) '
+    'VALUES (new.id, new.name, new.description); END;',
+    'CREATE TRIGGER IF NOT EXISTS tasks_task_fts_delete '
+    'AFTER DELETE ON tasks_task BEGIN '
+    "INSERT INTO tasks_task_fts (tasks_task_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END;",
+    'CREATE TRIGGER IF NOT EXISTS tasks_task_fts_update '
+    'AFTER UPDATE OF name, description ON tasks_task BEGIN '
+    "INSERT INTO tasks_task_fts (tasks_task_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    'INSERT INTO tasks_task_fts (rowid, name, description) '
+    'VALUES (new.id, new.name, new.description); END;',
+]
+SQLITE_FTS_REBUILD_SQL = (
+    "INSERT INTO tasks_task_fts (tasks_task_fts) VALUES ('rebuild');"
+)
+
+
+def ensure_sqlite_fts(using='default'):
+    """
+    Recreate the FTS5 triggers if a migration has rebuilt tasks_task.
+
+    SQLite migrations often copy a table into a new one, and the triggers
+    are dropped together with the old table.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE name IN ('tasks_task', 'tasks_task_fts') "
+            "OR (type = 'trigger' AND tbl_name = 'tasks_task' "
+            "AND name LIKE 'tasks_task_fts_%')"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if 'tasks_task' not in existing:
+            return
+        if len(existing) == 2 + len(SQLITE_FTS_TRIGGERS_SQL):
+            return
+        cursor.execute(SQLITE_FTS_TABLE_SQL)
+        for sql in SQLITE_FTS_TRIGGERS_SQL:
+            cursor.execute(sql)
+        cursor.execute(SQLITE_FTS_REBUILD_SQL)
+
+
+def _sqlite_match_query(query):
+    # Quote every word so user input can never be parsed as FTS5 syntax,
+    # and match prefixes so "задач" finds "задача".
+    words = re.findall(r'\w+', query)
+    return ' '.join('"%s"*' % word for word in words)
+
+
+def search_tasks(queryset, query):
+    """
+    Filter tasks by a free-text query over name and description and
+    annotate them with ``search_rank`` (higher is more relevant).
+    """
+    connection = connections[queryset.db]
+    table = connection.ops.quote_name(queryset.model._meta.db_table)
+
+    if connection.vendor == 'postgresql':
+        ts_query = "websearch_to_tsquery('%s', %%s)" % SEARCH_CONFIG
+        return queryset.annotate(
+            search_rank=RawSQL(
+                'ts_rank(%s.search_vector, %s)::float8' % (table, ts_query),
+                [query],
+                output_field=FloatField(),
+            )
+        ).filter(
+            RawSQL(
+                '%s.search_vector @@ %s' % (table, ts_query),
+                [query],
+                output_field=BooleanField(),
+            )
+        )
+
+    if connection.vendor == 'sqlite':
+        match = _sqlite_match_query(query)
+        if not match:
+            return queryset.annotate(
+                search_rank=Value(0.0, output_field=FloatField())
+            ).none()
+        # bm25() is lower for better matches; name hits weigh more.
+        return queryset.annotate(
+            search_rank=RawSQL(
+                'SELECT -bm25(tasks_task_fts, 10.0, 1.0) FROM tasks_task_fts '
+                'WHERE tasks_task_fts MATCH %%s AND rowid = %s.id' % table,
+                [match],
+                output_field=FloatField(),
+            )
+        ).filter(
+            pk__in=RawSQL(
+                'SELECT rowid FROM tasks_task_fts '
+                'WHERE tasks_task_fts MATCH %s',
+                [match],
+            )
+        )
+
+    return queryset.annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    ).filter(Q(name__icontains=query) | Q(description__icontains=query))
@@ -0,0 +1,56 @@
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+
+ROWS_TEMPLATE = 'tasks/task_rows.html'
+# Rows per flush: small enough that the first ones go out quickly, large
+# enough that the label query and the template call are amortised.
+STREAM_CHUNK_SIZE = 500
+
+
+def render_page_shell(template_names, context, request):
+    """
+    Render the page around its rows and return ``(head, tail)``: what
+    goes before and after them. The template prints ``rows_marker``
+    where the rows go.
+    """
+    marker = 'task-rows-%s' % uuid.uuid4().hex
+    content = render_to_string(
+        template_names, {**context, 'rows_marker': marker}, request
+    )
+    head, tail = content.split(marker)
+    return head, tail
+
+
+def render_rows(rows):
+    return get_template(ROWS_TEMPLATE).render({'tasks': rows})
+
+
+def page_chunks(head, row_chunks, tail):
+    yield head
+    for rows in row_chunks:
+        yield render_rows(rows)
+    yield tail
+
+
+async def apage_chunks(head, row_chunks, tail):
+    """Async version of page_chunks()."""
+    yield head
+    async for rows in row_chunks:
+        yield await sync_to_async(render_rows)(rows)
+    yield tail
+
+
+def streaming_page_response(chunks):
+    """
+    Send ``chunks`` as they are rendered, so the browser gets the page
+    head before the rows are read.
+    """
+    response = StreamingHttpResponse(
+        chunks, content_type='text/html; charset=utf-8'
+    )
+    # Proxies such as nginx would otherwise buffer the whole page.
+    response['X-Accel-Buffering'] = 'no'
+    return response
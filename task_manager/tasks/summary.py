@@ -0,0 +1,346 @@
+from collections import Counter
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DateField, F, Q, Value, When
+from django.db.models.functions import TruncWeek
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from task_manager.tasks.models import (
+    Task,
+    TaskCount,
+    TaskLabel,
+    deleting_in_bulk,
+)
+
+# The task counts of the dashboard live in the TaskCount table, one row
+# per status, assignee, label and creation week. Every write changes the
+# rows it affects in its own transaction: saves, deletes and label
+# changes through the receivers below, update(), bulk_create() and
+# queryset deletes through the record_*() helpers.
+# rebuild_task_counts() starts over from the tasks table, and
+# check_task_counts() compares the two.
+
+# The columns a save can change, with the dimension each one counts.
+CHANGEABLE_FIELDS = (
+    (TaskCount.STATUS, 'status_id'),
+    (TaskCount.ASSIGNEE, 'assignee_id'),
+)
+
+
+def count_key(dimension, value):
+    if value is None:
+        return dimension, ''
+    if dimension == TaskCount.WEEK:
+        return dimension, value.isoformat()
+    return dimension, str(value)
+
+
+def week_start(created_at):
+    # What TruncWeek() gives for the same moment: the Monday of its week
+    # in the current time zone.
+    day = timezone.localdate(created_at)
+    return day - timedelta(days=day.weekday())
+
+
+def task_count_keys(task):
+    return [
+        count_key(TaskCount.STATUS, task.status_id),
+        count_key(TaskCount.ASSIGNEE, task.assignee_id),
+        count_key(TaskCount.WEEK, week_start(task.created_at)),
+    ]
+
+
+def apply_count_deltas(deltas):
+    """
+    Add ``deltas``, a dict of ``(dimension, key)`` and a number, to the
+    stored counts with one UPDATE, then create the rows that are not
+    there yet.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    keys_by_dimension = {}
+    for dimension, key in deltas:
+        keys_by_dimension.setdefault(dimension, []).append(key)
+    rows = TaskCount.objects.filter(reduce(or_, (
+        Q(dimension=dimension, key__in=keys)
+        for dimension, keys in keys_by_dimension.items()
+    )))
+    updated = rows.update(count=F('count') + Case(*(
+        When(dimension=dimension, key=key, then=Value(delta))
+        for (dimension, key), delta in deltas.items()
+    ), default=Value(0)))
+    if updated < len(deltas):
+        existing = set(rows.values_list('dimension', 'key'))
+        _create_counts({
+            key: delta for key, delta in deltas.items()
+            if key not in existing
+        })
+
+
+def _create_counts(deltas):
+    try:
+        # A savepoint, so that losing the race to create a row does not
+        # break the transaction.
+        with transaction.atomic():
+            TaskCount.objects.bulk_create(
+                TaskCount(dimension=dimension, key=key, count=count)
+                for (dimension, key), count in deltas.items()
+            )
+    except IntegrityError:
+        apply_count_deltas(deltas)
+
+
+def record_tasks_created(tasks, task_labels=()):
+    """
+    Count ``tasks`` and the TaskLabel rows ``task_labels`` written with
+    bulk_create().
+    """
+    deltas = Counter()
+    for task in tasks:
+        deltas.update(task_count_keys(task))
+    deltas.update(
+        count_key(TaskCount.LABEL, row.label_id) for row in task_labels
+    )
+    apply_count_deltas(deltas)
+
+
+def record_field_change(queryset, dimension, attname, value):
+    """
+    Move the tasks of ``queryset`` to ``value`` in the counts of
+    ``dimension`` before they are updated to it with update().
+    """
+    deltas = Counter()
+    old_values = queryset.order_by().values(attname).annotate(
+        tasks=Count('pk')
+    ).values_list(attname, 'tasks')
+    for old_value, tasks in old_values:
+        deltas[count_key(dimension, old_value)] -= tasks
+        deltas[count_key(dimension, value)] += tasks
+    apply_count_deltas(deltas)
+
+
+def label_deltas(task_labels, sign):
+    """
+    Return the label count deltas of adding (``sign`` 1) or deleting
+    (-1) the TaskLabel queryset ``task_labels``.
+    """
+    return {
+        count_key(TaskCount.LABEL, label_id): sign * tasks
+        for label_id, tasks in task_labels.order_by().values(
+            'label_id'
+        ).annotate(tasks=Count('pk')).values_list('label_id', 'tasks')
+    }
+
+
+def record_labels_removed(task_labels):
+    """Count the TaskLabel queryset ``task_labels`` out before deleting."""
+    apply_count_deltas(label_deltas(task_labels, -1))
+
+
+def record_labels_added(task_ids, label_ids):
+    """
+    Count the labels before they are given to the tasks with
+    bulk_create(ignore_conflicts=True): only the tasks that do not have
+    one yet get it.
+    """
+    deltas = Counter({
+        count_key(TaskCount.LABEL, label_id): len(task_ids)
+        for label_id in label_ids
+    })
+    deltas.update(label_deltas(TaskLabel.objects.filter(
+        task_id__in=task_ids, label_id__in=label_ids
+    ), -1))
+    apply_count_deltas(deltas)
+
+
+def record_tasks_deleted(tasks):
+    """
+    Count the task queryset ``tasks`` and its TaskLabel rows out before
+    deleting it with the delete receivers switched off.
+    """
+    counts = count_tasks(tasks, TaskLabel.objects.filter(task__in=tasks))
+    apply_count_deltas({key: -count for key, count in counts.items()})
+
+
+def count_tasks(tasks, task_labels):
+    """
+    Count the task queryset ``tasks`` by every dimension, and
+    ``task_labels``, its TaskLabel rows, by label, with GROUP BY queries.
+    """
+    tasks = tasks.order_by()
+    groups = [
+        (TaskCount.STATUS, tasks.values_list('status_id')),
+        (TaskCount.ASSIGNEE, tasks.values_list('assignee_id')),
+        (TaskCount.LABEL, task_labels.order_by().values_list('label_id')),
+        (TaskCount.WEEK, tasks.values_list(
+            TruncWeek('created_at', output_field=DateField())
+        )),
+    ]
+    counts = Counter()
+    for dimension, values in groups:
+        for value, tasks_count in values.annotate(tasks=Count('pk')):
+            counts[count_key(dimension, value)] = tasks_count
+    return counts
+
+
+def live_task_counts(task_model=Task):
+    return count_tasks(
+        task_model.objects.all(), task_model.labels.through.objects.all()
+    )
+
+
+def stored_task_counts():
+    return Counter({
+        (dimension, key): count
+        for dimension, key, count in TaskCount.objects.exclude(
+            count=0
+        ).values_list('dimension', 'key', 'count')
+    })
+
+
+@transaction.atomic
+def rebuild_task_counts(task_model=Task, count_model=TaskCount):
+    """
+    Replace the stored counts with live ones and return how many rows
+    that wrote. The models can be a migration's historical ones.
+    """
+    counts = live_task_counts(task_model)
+    count_model.objects.all().delete()
+    count_model.objects.bulk_create(
+        count_model(dimension=dimension, key=key, count=count)
+        for (dimension, key), count in counts.items()
+    )
+    return len(counts)
+
+
+def check_task_counts():
+    """
+    Return ``(dimension, key, stored, live)`` for every count that does
+    not match the tasks table.
+    """
+    stored = stored_task_counts()
+    live = live_task_counts()
+    return sorted(
+        (dimension, key, stored[dimension, key], live[dimension, key])
+        for dimension, key in stored.keys() | live.keys()
+        if stored[dimension, key] != live[dimension, key]
+    )
+
+
+def get_task_counts():
+    """Return ``{dimension: {key: count}}`` of every stored count."""
+    counts = {
+        dimension: {} for dimension, title in TaskCount.DIMENSION_CHOICES
+    }
+    for dimension, key, count in TaskCount.objects.filter(
+        count__gt=0
+    ).values_list('dimension', 'key', 'count'):
+        counts[dimension][key] = count
+    return counts
+
+
+@receiver(pre_save, sender=Task)
+def task_saving(sender, instance, raw=False, **kwargs):
+    # A task that was not loaded from the database, or without the
+    # columns a save can change, has them read before they are written.
+    if raw or instance.pk is None:
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    missing = [
+        attname for dimension, attname in CHANGEABLE_FIELDS
+        if attname not in loaded
+    ]
+    if missing:
+        loaded.update(
+            Task.objects.filter(pk=instance.pk).values(*missing).first()
+            or {}
+        )
+        instance._loaded_values = loaded
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, raw=False, **kwargs):
+    # Fixtures are loaded raw; run rebuild_task_counts afterwards.
+    if raw:
+        return
+    if created:
+        apply_count_deltas(Counter(task_count_keys(instance)))
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    deltas = Counter()
+    for dimension, attname in CHANGEABLE_FIELDS:
+        old_value = loaded.get(attname)
+        new_value = getattr(instance, attname)
+        if attname in loaded and old_value != new_value:
+            deltas[count_key(dimension, old_value)] -= 1
+            deltas[count_key(dimension, new_value)] += 1
+    apply_count_deltas(deltas)
+
+
+@receiver(pre_delete, sender=Task)
+def task_deleting(sender, instance, **kwargs):
+    if deleting_in_bulk.get():
+        return
+    # Its TaskLabel rows go first, without signals of their own.
+    instance._label_deltas = label_deltas(
+        TaskLabel.objects.filter(task=instance), -1
+    )
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    if deleting_in_bulk.get():
+        return
+    deltas = Counter(getattr(instance, '_label_deltas', {}))
+    deltas.subtract(task_count_keys(instance))
+    apply_count_deltas(deltas)
+
+
+@receiver(m2m_changed, sender=Task.labels.through)
+def task_labels_changed(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    if action == 'post_add' and pk_set:
+        # pk_set only has what was not there yet.
+        if reverse:
+            deltas = {count_key(TaskCount.LABEL, instance.pk): len(pk_set)}
+        else:
+            deltas = {
+                count_key(TaskCount.LABEL, label_id): 1
+                for label_id in pk_set
+            }
+        apply_count_deltas(deltas)
+    elif action in ('pre_remove', 'pre_clear'):
+        # pk_set may have labels (or tasks) that were not there.
+        rows = TaskLabel.objects.filter(
+            **{'label' if reverse else 'task': instance}
+        )
+        if action == 'pre_remove':
+            rows = rows.filter(
+                **{'task_id__in' if reverse else 'label_id__in': pk_set}
+            )
+        instance._label_deltas = label_deltas(rows, -1)
+    elif action in ('post_remove', 'post_clear'):
+        apply_count_deltas(instance._label_deltas)
+
+
+@receiver(pre_delete, sender='users.User')
+def assignee_deleting(sender, instance, **kwargs):
+    # The tasks assigned to a deleted user are set to no assignee without
+    # sending task signals.
+    assigned = Task.objects.filter(assignee=instance).count()
+    apply_count_deltas({
+        count_key(TaskCount.ASSIGNEE, instance.pk): -assigned,
+        count_key(TaskCount.ASSIGNEE, None): assigned,
+    })
@@ -1,10 +1,48 @@
+import asyncio
+import csv
+import gc
+import gzip
+import json
+import os
+import tempfile
+import tracemalloc
 import unittest
-from django.test import TestCase, Client
-from django.urls import reverse
+from io import StringIO
+from unittest.mock import Mock, patch
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, Client, override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from task_manager import reference_data
+from task_manager.cache_versions import get_version
+from task_manager.sql_middleware import QueryCounter, query_shape
 from task_manager.users.models import User
-from task_manager.tasks.models import Task
+from task_manager.tasks import events
+from task_manager.tasks.models import Task, TaskCount, TaskEvent
 from task_manager.statuses.models import Status
 from task_manager.labels.models import Label
+from task_manager.tasks.api import TaskApiListView
+from task_manager.tasks.async_views import (
+    AsyncTaskApiDetailView,
+    AsyncTaskListView,
+)
+from task_manager.tasks.export import aexport_rows, export_rows
+from task_manager.tasks.forms import TaskBulkActionForm
+from task_manager.tasks.importer import TaskImporter
+from task_manager.tasks.merge import merge_label, merge_status
+from task_manager.tasks.pagination import KeysetPaginator
+from task_manager.tasks.rows import task_rows
+from task_manager.tasks.summary import (
+    check_task_counts,
+    get_task_counts,
+    week_start,
+)
+from task_manager.tasks.versions import get_tasks_version
+from task_manager.tasks.views import TaskCreateView, TaskListView
 from django.contrib.messages import get_messages
 
 
@@ -136,6 +174,37 @@ class TaskTests(TestCase):
         self.assertEqual(len(messages), 1)
         self.assertIn('Задача успешно изменена', str(messages[0]))
 
+    def test_task_forms_only_render_selected_choices(self):
+        other_status = Status.objects.create(name='Other Status')
+        other_label = Label.objects.create(name='Other Label')
+        self.client.login(username='testuser1', password='TestPass123')
+        response = self.client.get(self.task_update_url)
+        self.assertContains(
+            response,
+            '<option value="%d" selected>Test Status</option>'
+            % self.status.pk,
+            html=True,
+        )
+        self.assertContains(
+            response,
+            '<option value="%d" selected>Test Label</option>'
+            % self.label.pk,
+            html=True,
+        )
+        self.assertNotContains(response, other_status.name)
+        self.assertNotContains(response, other_label.name)
+
+        # A form re-rendered after an error keeps the valid choices.
+        response = self.client.post(self.task_update_url, {
+            'name': '',
+            'status': other_status.pk,
+            'labels': [other_label.pk],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Other Status')
+        self.assertContains(response, 'Other Label')
+        self.assertNotContains(response, 'Test Label')
+
     def test_task_update_unauthorized(self):
         """Test updating a task by an unauthorized user."""
         self.client.logout()
@@ -228,7 +297,7 @@ class TaskTests(TestCase):
         tasks = response.context['tasks']
         self.assertEqual(len(tasks), 1)
         self.assertEqual(tasks[0], self.task1)
-        self.assertIn(self.label, tasks[0].labels.all())
+        self.assertIn(self.label.name, tasks[0].labels)
 
     def test_task_filter_by_own_tasks(self):
         self.client.login(username='testuser1', password='TestPass123')
@@ -257,5 +326,1785 @@ class TaskTests(TestCase):
         self.assertIn('Необходима авторизация пользователя', str(messages[0]))
 
 
+@patch.object(TaskListView, 'paginate_by', 2)
+class TaskPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='pageuser',
+            password='TestPass123'
+        )
+        self.other = User.objects.create_user(
+            username='otheruser',
+            password='TestPass123'
+        )
+        self.status = Status.objects.create(name='Статус')
+        self.tasks = [
+            Task.objects.create(
+                name=f'Задача {i}',
+                status=self.status,
+                author=self.user if i % 2 else self.other,
+            )
+            for i in range(5)
+        ]
+        self.task_list_url = reverse('task_list')
+        self.client.force_login(self.user)
+
+    def get_page(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_first_page(self):
+        response = self.get_page(self.task_list_url)
+        self.assertEqual(list(response.context['tasks']), self.tasks[:2])
+        self.assertIsNone(response.context['previous_page_url'])
+        self.assertIsNotNone(response.context['next_page_url'])
+
+    def test_walk_forward_and_back(self):
+        response = self.get_page(self.task_list_url)
+        seen = list(response.context['tasks'])
+        while response.context['next_page_url']:
+            response = self.get_page(
+                self.task_list_url + response.context['next_page_url']
+            )
+            seen.extend(response.context['tasks'])
+        self.assertEqual(seen, self.tasks)
+        self.assertIsNone(response.context['next_page_url'])
+
+        response = self.get_page(
+            self.task_list_url + response.context['previous_page_url']
+        )
+        self.assertEqual(list(response.context['tasks']), self.tasks[2:4])
+
+    def test_cursor_keeps_filter(self):
+        response = self.get_page(self.task_list_url, {'own_tasks': 'on'})
+        self.assertEqual(
+            list(response.context['tasks']),
+            [self.tasks[1], self.tasks[3]]
+        )
+        next_url = response.context['next_page_url']
+        self.assertIsNone(next_url)
+
+        response = self.get_page(
+            self.task_list_url,
+            {'status': str(self.status.pk)}
+        )
+        next_url = response.context['next_page_url']
+        self.assertIn('status=%s' % self.status.pk, next_url)
+        response = self.get_page(self.task_list_url + next_url)
+        self.assertEqual(list(response.context['tasks']), self.tasks[2:4])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.task_list_url, {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_malformed_cursor_values(self):
+        paginator = KeysetPaginator(Task.objects.all(), 1)
+        created_at = self.tasks[0].created_at
+        for values in (
+            [{}, 1], [[1], 1], [5, 1], ['abc', 1], [None, 1],
+            [created_at, 'abc'], [created_at, None],
+        ):
+            cursor = paginator.encode_cursor(values, 'next')
+            with self.subTest(values=values):
+                response = self.client.get(
+                    self.task_list_url, {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 404)
+                response = self.client.get(
+                    reverse('api_task_list'), {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_partial_rows(self):
+        page = self.get_page(self.task_list_url)
+        response = self.get_page(self.task_list_url, {'partial': 'rows'})
+        self.assertTemplateUsed(response, 'tasks/task_rows.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(list(response.context['tasks']), self.tasks[:2])
+        content = response.content.decode()
+        self.assertEqual(content.count('<tr '), 2)
+        self.assertIn(
+            reverse('task_update', args=[self.tasks[0].pk]), content
+        )
+        self.assertIn(content.strip(), page.content.decode())
+        # Scrolling follows the header from one page of rows to the next.
+        seen = list(response.context['tasks'])
+        while response.has_header('X-Next-Page'):
+            self.assertIn('partial=rows', response['X-Next-Page'])
+            response = self.get_page(
+                self.task_list_url + response['X-Next-Page']
+            )
+            seen.extend(response.context['tasks'])
+        self.assertEqual(seen, self.tasks)
+
+    def test_partial_rows_are_compressed(self):
+        gzip_headers = {'accept-encoding': 'gzip'}
+        plain = self.get_page(self.task_list_url, {'partial': 'rows'})
+        response = self.client.get(
+            self.task_list_url, {'partial': 'rows'}, headers=gzip_headers
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        # The full page carries the CSRF token, so it is left alone.
+        response = self.client.get(self.task_list_url, headers=gzip_headers)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @patch('task_manager.tasks.views.STREAM_CHUNK_SIZE', 2)
+    def test_show_all_streams_every_row(self):
+        page = self.get_page(self.task_list_url, {'status': self.status.pk})
+        show_all_url = page.context['show_all_url']
+        self.assertContains(page, 'Показать все')
+        response = self.get_page(self.task_list_url + show_all_url)
+        self.assertTrue(response.streaming)
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        # The head with the filter form comes first, then the rows in
+        # chunks of two, then the rest of the page.
+        self.assertIn('id="task-filter"', chunks[0])
+        self.assertNotIn('<tr ', chunks[0])
+        self.assertEqual(
+            [chunk.count('<tr ') for chunk in chunks[1:-1]], [2, 2, 1]
+        )
+        self.assertIn('</html>', chunks[-1])
+        content = ''.join(chunks)
+        self.assertNotIn('task-rows-', content)
+        self.assertNotIn('Показать все', content)
+        for task in self.tasks:
+            self.assertIn(reverse('task_update', args=[task.pk]), content)
+        self.assertLess(
+            content.index('Задача 0'), content.index('Задача 4')
+        )
+
+        response = self.get_page(
+            self.task_list_url, {'show': 'all', 'status': 0}
+        )
+        content = b''.join(response.streaming_content).decode()
+        self.assertNotIn('<tr ', content)
+        self.assertIn('id="task-results" class="d-none"', content)
+
+
+class TaskRowTests(TestCase):
+    ROWS = 10_000
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='rowuser')
+        status = Status.objects.create(name='Новый')
+        labels = Label.objects.bulk_create(
+            [Label(name='bug'), Label(name='api')]
+        )
+        tasks = Task.objects.bulk_create(
+            Task(
+                name='Задача %d' % i,
+                description='Подробное описание задачи. ' * 10,
+                status=status,
+                author=user,
+                assignee=user if i % 2 else None,
+            )
+            for i in range(cls.ROWS)
+        )
+        through = Task.labels.through
+        through.objects.bulk_create(
+            through(task_id=task.pk, label_id=label.pk)
+            for task in tasks[::10] for label in labels
+        )
+        cls.first = tasks[0]
+
+    def measure(self, build):
+        """Return what ``build()`` returns and the memory it retains."""
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = build()
+            retained, _peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return result, retained
+
+    def test_rows_retain_less_memory_than_models(self):
+        models, model_memory = self.measure(lambda: list(
+            Task.objects.select_related(
+                'status', 'author', 'assignee'
+            ).prefetch_related('labels')
+        ))
+        rows, row_memory = self.measure(
+            lambda: task_rows(Task.objects.all())
+        )
+        self.assertEqual(len(rows), len(models))
+        self.assertEqual(len(rows), self.ROWS)
+        self.assertLess(row_memory * 4, model_memory)
+
+    def test_rows_only_read_the_rendered_columns(self):
+        with CaptureQueriesContext(connection) as context:
+            rows = task_rows(Task.objects.filter(pk=self.first.pk))
+        self.assertEqual(len(context), 2)
+        for query in context.captured_queries:
+            self.assertNotIn('description', query['sql'])
+            self.assertNotIn('password', query['sql'])
+        row = rows[0]
+        self.assertEqual(row, self.first)
+        self.assertEqual(row.status_name, 'Новый')
+        self.assertEqual(row.author_username, 'rowuser')
+        self.assertIsNone(row.assignee_username)
+        self.assertEqual(row.labels, ['api', 'bug'])
+        with self.assertRaises(AttributeError):
+            row.description = ''
+
+    def test_row_urls(self):
+        row = task_rows(Task.objects.filter(pk=self.first.pk))[0]
+        for name, url in [
+            ('task_detail', row.detail_url),
+            ('task_update', row.update_url),
+            ('task_delete', row.delete_url),
+        ]:
+            self.assertEqual(url, reverse(name, args=[self.first.pk]))
+
+
+class TaskLabelFilterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='labeluser')
+        status = Status.objects.create(name='Статус')
+        self.bug = Label.objects.create(name='bug')
+        self.urgent = Label.objects.create(name='urgent')
+        self.only_bug = Task.objects.create(
+            name='Только bug', status=status, author=self.user
+        )
+        self.only_bug.labels.add(self.bug)
+        self.only_urgent = Task.objects.create(
+            name='Только urgent', status=status, author=self.user
+        )
+        self.only_urgent.labels.add(self.urgent)
+        self.both = Task.objects.create(
+            name='Обе метки', status=status, author=self.user
+        )
+        self.both.labels.add(self.bug, self.urgent)
+        Task.objects.create(name='Без меток', status=status, author=self.user)
+        self.client.force_login(self.user)
+
+    def get_tasks(self, mode=None):
+        params = {'labels': [self.bug.pk, self.urgent.pk]}
+        if mode:
+            params['labels_mode'] = mode
+        response = self.client.get(reverse('task_list'), params)
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['tasks'])
+
+    def test_any_mode_is_default(self):
+        self.assertEqual(
+            self.get_tasks(),
+            [self.only_bug, self.only_urgent, self.both]
+        )
+        self.assertEqual(self.get_tasks('any'), self.get_tasks())
+
+    def test_all_mode(self):
+        self.assertEqual(self.get_tasks('all'), [self.both])
+
+    def test_filter_uses_exists_without_distinct(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get_tasks('all')
+        task_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'FROM "tasks_task"' in query['sql']
+        ]
+        self.assertTrue(task_queries)
+        for sql in task_queries:
+            self.assertIn('EXISTS', sql)
+            self.assertNotIn('DISTINCT', sql)
+
+
+class TaskSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='searchuser')
+        self.status = Status.objects.create(name='Статус')
+        self.in_name = Task.objects.create(
+            name='Починить авторизацию',
+            description='Пользователи не могут войти',
+            status=self.status,
+            author=self.user,
+        )
+        self.in_description = Task.objects.create(
+            name='Релиз',
+            description='Проверить авторизацию перед выкладкой',
+            status=self.status,
+            author=self.user,
+        )
+        Task.objects.create(
+            name='Обновить зависимости',
+            status=self.status,
+            author=self.user,
+        )
+        self.client.force_login(self.user)
+
+    def search(self, query):
+        response = self.client.get(reverse('task_list'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['tasks'])
+
+    def test_search_by_name_and_description(self):
+        self.assertEqual(
+            self.search('авторизацию'),
+            [self.in_name, self.in_description]
+        )
+
+    def test_search_is_case_insensitive_and_matches_prefixes(self):
+        self.assertEqual(self.search('РЕЛИ'), [self.in_description])
+
+    def test_search_ignores_query_syntax(self):
+        self.assertEqual(self.search('"релиз" OR NOT*'), [])
+        self.assertEqual(self.search('!!!'), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.in_name.name = 'Переименованная задача'
+        self.in_name.description = ''
+        self.in_name.save()
+        self.assertEqual(self.search('авторизацию'), [self.in_description])
+        self.assertEqual(self.search('переименованная'), [self.in_name])
+        self.in_description.delete()
+        self.assertEqual(self.search('авторизацию'), [])
+
+    def test_malformed_search_rank_in_cursor(self):
+        paginator = KeysetPaginator(Task.objects.all(), 1)
+        for rank in ({}, [1], 'abc', None):
+            cursor = paginator.encode_cursor(
+                [rank, self.in_name.created_at, self.in_name.pk], 'next'
+            )
+            params = {'q': 'авторизацию', 'cursor': cursor}
+            with self.subTest(rank=rank):
+                response = self.client.get(reverse('task_list'), params)
+                self.assertEqual(response.status_code, 404)
+                response = self.client.get(reverse('api_task_list'), params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_search_combines_with_filters_and_cursor(self):
+        with patch.object(TaskListView, 'paginate_by', 1):
+            response = self.client.get(
+                reverse('task_list'),
+                {'q': 'авторизацию', 'status': self.status.pk}
+            )
+            self.assertEqual(list(response.context['tasks']), [self.in_name])
+            response = self.client.get(
+                reverse('task_list') + response.context['next_page_url']
+            )
+            self.assertEqual(
+                list(response.context['tasks']),
+                [self.in_description]
+            )
+            self.assertIsNone(response.context['next_page_url'])
+
+
+class TaskQueryPlanTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='planuser')
+        status = Status.objects.create(name='Статус')
+        label = Label.objects.create(name='Метка')
+        for i in range(3):
+            task = Task.objects.create(
+                name=f'Задача {i}',
+                status=status,
+                author=user,
+                assignee=user,
+            )
+            task.labels.add(label)
+
+    def test_every_filter_combination_uses_an_index(self):
+        out = StringIO()
+        call_command('explain_task_filters', stdout=out)
+        self.assertNotIn('FULL SCAN', out.getvalue())
+        self.assertIn('q+status+assignee+labels+own_tasks (cursor)',
+                      out.getvalue())
+
+
 if __name__ == '__main__':
     unittest.main()
+
+
+class TaskReferenceDataTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='refuser',
+            password='TestPass123'
+        )
+        self.status = Status.objects.create(name='Статус')
+        self.label = Label.objects.create(name='Метка')
+        Task.objects.create(
+            name='Задача',
+            status=self.status,
+            author=self.user,
+            assignee=self.user,
+        )
+        self.client.force_login(self.user)
+
+    def test_warm_task_list_skips_reference_queries(self):
+        params = {
+            'status': self.status.pk,
+            'assignee': self.user.pk,
+            'labels': self.label.pk,
+        }
+        load = patch.object(
+            reference_data, '_load', wraps=reference_data._load
+        )
+        with load as loaded:
+            with CaptureQueriesContext(connection) as cold:
+                self.client.get(reverse('task_list'), params)
+            with CaptureQueriesContext(connection) as warm:
+                response = self.client.get(reverse('task_list'), params)
+        self.assertEqual(loaded.call_count, 1)
+        # Statuses and labels; the assignee is looked up on every request.
+        self.assertEqual(len(cold) - len(warm), 2)
+        self.assertEqual(list(response.context['statuses']), [self.status])
+        self.assertEqual(list(response.context['labels']), [self.label])
+
+    def test_saves_and_deletes_invalidate_cache(self):
+        self.assertEqual(reference_data.get_statuses(), [self.status])
+        status = Status.objects.create(name='Новый статус')
+        self.assertEqual(
+            reference_data.get_statuses(),
+            [self.status, status]
+        )
+        self.label.name = 'Переименованная метка'
+        self.label.save()
+        self.assertEqual(
+            reference_data.get_labels()[0].name,
+            'Переименованная метка'
+        )
+        self.label.delete()
+        self.assertEqual(reference_data.get_labels(), [])
+
+    def test_login_does_not_invalidate_cache(self):
+        version = get_version(reference_data.NAMESPACE)
+        self.client.login(username='refuser', password='TestPass123')
+        self.assertEqual(get_version(reference_data.NAMESPACE), version)
+
+    def test_bulk_form_validates_against_cached_choices(self):
+        reference_data.get_reference_data()
+        form = TaskBulkActionForm()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(form.fields['status'].choices), 2)
+            self.assertEqual(
+                form.fields['labels'].clean([str(self.label.pk)]),
+                [self.label]
+            )
+
+        form = TaskBulkActionForm(data={
+            'tasks': ['1'],
+            'action': 'add_labels',
+            'status': self.status.pk,
+            'labels': [self.label.pk],
+        })
+        with self.assertNumQueries(0):
+            self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['status'], self.status)
+        self.assertEqual(form.cleaned_data['labels'], [self.label])
+
+        form = TaskBulkActionForm(data={
+            'tasks': ['1'],
+            'action': 'add_labels',
+            'status': self.status.pk + 100,
+            'labels': [self.label.pk, self.label.pk + 100],
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('status', form.errors)
+        self.assertIn('labels', form.errors)
+
+
+class TaskExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='exportuser')
+        self.status = Status.objects.create(name='В работе')
+        self.other_status = Status.objects.create(name='Готово')
+        self.bug = Label.objects.create(name='bug')
+        self.ui = Label.objects.create(name='ui')
+        self.tasks = []
+        for i in range(5):
+            task = Task.objects.create(
+                name=f'Задача {i}',
+                description=f'Описание, "{i}"',
+                status=self.status if i % 2 == 0 else self.other_status,
+                author=self.user,
+                assignee=self.user if i == 0 else None,
+            )
+            self.tasks.append(task)
+        self.tasks[0].labels.add(self.bug, self.ui)
+        self.tasks[2].labels.add(self.bug)
+        self.client.force_login(self.user)
+
+    def export(self, params):
+        response = self.client.get(reverse('task_export'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_uses_task_filter(self):
+        content = self.export({'status': self.status.pk})
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(
+            rows[0],
+            ['id', 'name', 'description', 'status', 'author', 'assignee',
+             'labels', 'created_at']
+        )
+        self.assertEqual(
+            [row[0] for row in rows[1:]],
+            [str(self.tasks[i].pk) for i in (0, 2, 4)]
+        )
+        self.assertEqual(rows[1][2], 'Описание, "0"')
+        self.assertEqual(rows[1][3:7], ['В работе', 'exportuser',
+                                        'exportuser', 'bug|ui'])
+        self.assertEqual(rows[3][5:7], ['', ''])
+
+    def test_jsonl_export(self):
+        content = self.export({'format': 'jsonl', 'labels': self.bug.pk})
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [row['id'] for row in rows],
+            [self.tasks[0].pk, self.tasks[2].pk]
+        )
+        self.assertEqual(rows[0]['labels'], ['bug', 'ui'])
+        self.assertIsNone(rows[1]['assignee'])
+        self.assertEqual(
+            rows[0]['created_at'],
+            self.tasks[0].created_at.isoformat()
+        )
+
+        content = self.export({'format': 'jsonl', 'q': 'описание 3'})
+        self.assertEqual(
+            [json.loads(line)['id'] for line in content.splitlines()],
+            [self.tasks[3].pk]
+        )
+
+    def test_labels_are_fetched_once_per_chunk(self):
+        queryset = Task.objects.order_by('created_at', 'id')
+        with self.assertNumQueries(4):
+            rows = list(export_rows(queryset, chunk_size=2))
+        self.assertEqual(len(rows), 5)
+
+    def test_async_rows_match_sync_rows(self):
+        queryset = Task.objects.order_by('created_at', 'id')
+
+        async def collect():
+            return [row async for row in aexport_rows(queryset, 2)]
+
+        with self.assertNumQueries(4):
+            rows = async_to_sync(collect)()
+        self.assertEqual(rows, list(export_rows(queryset, chunk_size=2)))
+
+    def test_unknown_format_and_anonymous_user(self):
+        response = self.client.get(reverse('task_export'), {'format': 'xml'})
+        self.assertEqual(response.status_code, 404)
+        self.client.logout()
+        response = self.client.get(reverse('task_export'))
+        self.assertEqual(response.status_code, 302)
+
+
+class TaskImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='importer')
+        self.status = Status.objects.create(name='Новый')
+        self.label = Label.objects.create(name='bug')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, filename, content):
+        path = os.path.join(self.directory.name, filename)
+        with open(path, 'w', encoding='utf-8', newline='') as stream:
+            stream.write(content)
+        return path
+
+    def import_tasks(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_tasks', path, '--author', 'importer', *args,
+            stdout=out, stderr=err,
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_import_csv_creates_missing_references(self):
+        reference_data.get_statuses()
+        path = self.write('tasks.csv', (
+            'name,description,status,author,assignee,labels\n'
+            'Первая,Описание,Новый,,newbie,bug|ui\n'
+            ',Без названия,Новый,,,\n'
+            'Вторая,,В работе,newbie,,\n'
+        ))
+        out, err = self.import_tasks(path, '--batch-size', '2')
+
+        self.assertIn('Imported 2 tasks', out)
+        self.assertIn('skipped 1 rows', out)
+        self.assertIn('Line 3: name is required.', err)
+        first = Task.objects.get(name='Первая')
+        second = Task.objects.get(name='Вторая')
+        newbie = User.objects.get(username='newbie')
+        self.assertEqual(first.author, self.user)
+        self.assertEqual(first.assignee, newbie)
+        self.assertEqual(first.status, self.status)
+        self.assertEqual(
+            sorted(first.labels.values_list('name', flat=True)),
+            ['bug', 'ui']
+        )
+        self.assertEqual(first.labels.get(name='bug'), self.label)
+        self.assertEqual(second.author, newbie)
+        self.assertEqual(second.status.name, 'В работе')
+        self.assertFalse(newbie.has_usable_password())
+        self.assertIn(
+            'В работе',
+            [status.name for status in reference_data.get_statuses()]
+        )
+
+    def test_export_round_trip(self):
+        task = Task.objects.create(
+            name='Экспортированная',
+            description='Описание',
+            status=self.status,
+            author=self.user,
+        )
+        task.labels.add(self.label)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('task_export'), {'format': 'jsonl'})
+        path = self.write(
+            'tasks.jsonl',
+            b''.join(response.streaming_content).decode()
+        )
+        self.import_tasks(path)
+
+        copy = Task.objects.exclude(pk=task.pk).get()
+        self.assertEqual(copy.name, task.name)
+        self.assertEqual(copy.description, task.description)
+        self.assertEqual(copy.status, self.status)
+        self.assertEqual(list(copy.labels.all()), [self.label])
+
+    def test_queries_do_not_grow_with_rows(self):
+        def queries(count):
+            path = self.write('tasks.jsonl', ''.join(
+                json.dumps({
+                    'name': f'Задача {i}',
+                    'status': f'Статус {count}',
+                    'labels': [f'Метка {count}'],
+                }) + '\n'
+                for i in range(count)
+            ))
+            with CaptureQueriesContext(connection) as context:
+                self.import_tasks(path)
+            return len(context)
+
+        self.assertEqual(queries(3), queries(30))
+        self.assertEqual(Task.objects.count(), 33)
+
+
+class TaskMergeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='merger')
+        self.old = Status.objects.create(name='Старый')
+        self.new = Status.objects.create(name='Новый')
+        self.bug = Label.objects.create(name='bug')
+        self.defect = Label.objects.create(name='defect')
+        self.tasks = [
+            Task.objects.create(
+                name=f'Задача {i}', status=self.old, author=self.user
+            )
+            for i in range(3)
+        ]
+        self.tasks[0].labels.add(self.bug)
+        self.tasks[1].labels.add(self.bug, self.defect)
+        self.tasks[2].labels.add(self.defect)
+
+    def test_merge_status(self):
+        Task.objects.create(name='Другая', status=self.new, author=self.user)
+        version = get_tasks_version()
+        # The INSERT ... SELECT of the events of the tasks, their UPDATE
+        # and the one of their counts.
+        with self.assertNumQueries(7):
+            moved = merge_status(self.old, self.new)
+        self.assertEqual(moved, 3)
+        self.assertFalse(Status.objects.filter(pk=self.old.pk).exists())
+        self.assertEqual(Task.objects.filter(status=self.new).count(), 4)
+        self.assertNotEqual(get_tasks_version(), version)
+
+    def test_merge_label(self):
+        before = Task.objects.get(pk=self.tasks[0].pk).updated_at
+        # The tasks are picked by subqueries, never by a list of their ids.
+        with self.assertNumQueries(11):
+            moved = merge_label(self.bug, self.defect)
+        self.assertEqual(moved, 2)
+        self.assertFalse(Label.objects.filter(pk=self.bug.pk).exists())
+        for task in self.tasks:
+            self.assertEqual(
+                list(task.labels.values_list('name', flat=True)),
+                ['defect']
+            )
+        self.assertGreater(
+            Task.objects.get(pk=self.tasks[0].pk).updated_at, before
+        )
+
+    def test_merge_into_itself(self):
+        with self.assertRaises(ValueError):
+            merge_label(self.bug, self.bug)
+        self.assertTrue(Label.objects.filter(pk=self.bug.pk).exists())
+
+    def test_command(self):
+        out = StringIO()
+        call_command('merge_taxonomy', 'label', 'bug', 'defect', stdout=out)
+        self.assertIn('Merged bug into defect, 2 tasks moved.', out.getvalue())
+        call_command(
+            'merge_taxonomy', 'status', str(self.old.pk), str(self.new.pk),
+            '--by-id', stdout=out,
+        )
+        self.assertEqual(Task.objects.filter(status=self.new).count(), 3)
+        with self.assertRaisesMessage(CommandError, 'does not exist'):
+            call_command('merge_taxonomy', 'status', 'Старый', 'Новый')
+
+    def test_command_refuses_ambiguous_names(self):
+        Label.objects.create(name='bug')
+        with self.assertRaisesMessage(CommandError, 'use --by-id'):
+            call_command('merge_taxonomy', 'label', 'bug', 'defect')
+
+
+class TaskBulkActionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='bulkuser')
+        self.other = User.objects.create_user(username='otheruser')
+        self.status = Status.objects.create(name='Новый')
+        self.done = Status.objects.create(name='Готово')
+        self.bug = Label.objects.create(name='bug')
+        self.ui = Label.objects.create(name='ui')
+        self.tasks = [
+            Task.objects.create(
+                name=f'Задача {i}',
+                status=self.status,
+                author=self.user if i < 3 else self.other,
+            )
+            for i in range(4)
+        ]
+        self.tasks[0].labels.add(self.bug)
+        self.ids = [task.pk for task in self.tasks]
+        self.client.force_login(self.user)
+
+    def bulk(self, data):
+        return self.client.post(reverse('task_bulk_action'), data)
+
+    def test_set_status_is_one_update(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.bulk({
+                'tasks': self.ids,
+                'action': 'set_status',
+                'status': self.done.pk,
+            })
+        updates = [query['sql'] for query in context.captured_queries
+                   if query['sql'].startswith('UPDATE "tasks_task"')]
+        self.assertEqual(len(updates), 1)
+        self.assertRedirects(response, reverse('task_list'))
+        self.assertEqual(
+            Task.objects.filter(status=self.done).count(), 4
+        )
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertIn('Изменено задач: 4', messages)
+
+    def test_set_and_clear_assignee(self):
+        self.bulk({
+            'tasks': self.ids[:2],
+            'action': 'set_assignee',
+            'assignee': self.other.pk,
+        })
+        self.assertEqual(
+            Task.objects.filter(assignee=self.other).count(), 2
+        )
+        self.bulk({'tasks': self.ids, 'action': 'set_assignee'})
+        self.assertFalse(Task.objects.filter(assignee__isnull=False))
+
+    def test_add_and_remove_labels(self):
+        self.bulk({
+            'tasks': self.ids,
+            'action': 'add_labels',
+            'labels': [self.bug.pk, self.ui.pk],
+        })
+        for task in self.tasks:
+            self.assertEqual(set(task.labels.all()), {self.bug, self.ui})
+        self.bulk({
+            'tasks': self.ids[:2],
+            'action': 'remove_labels',
+            'labels': [self.bug.pk],
+        })
+        self.assertEqual(list(self.tasks[0].labels.all()), [self.ui])
+        self.assertEqual(
+            set(self.tasks[2].labels.all()), {self.bug, self.ui}
+        )
+
+    def test_delete_only_own_tasks(self):
+        response = self.bulk({'tasks': self.ids, 'action': 'delete'})
+        self.assertEqual(list(Task.objects.all()), [self.tasks[3]])
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertIn('Удалено задач: 3', messages)
+        self.assertIn('Задачу может удалить только ее автор.', messages)
+
+    def test_invalid_requests(self):
+        response = self.bulk({'action': 'set_status'})
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertIn('Выберите хотя бы одну задачу.', messages)
+        response = self.bulk({'tasks': self.ids, 'action': 'add_labels'})
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertIn('Выберите метки.', messages)
+        self.assertEqual(Task.objects.filter(status=self.status).count(), 4)
+
+        next_url = reverse('task_list') + '?status=%d' % self.status.pk
+        response = self.bulk({
+            'tasks': self.ids,
+            'action': 'set_status',
+            'status': self.done.pk,
+            'next': next_url,
+        })
+        self.assertRedirects(response, next_url)
+        response = self.bulk({
+            'tasks': self.ids,
+            'action': 'set_status',
+            'status': self.done.pk,
+            'next': 'https://example.com/',
+        })
+        self.assertRedirects(response, reverse('task_list'))
+
+        self.client.logout()
+        response = self.bulk({'tasks': self.ids, 'action': 'delete'})
+        self.assertRedirects(response, reverse('index'))
+        self.assertEqual(Task.objects.count(), 4)
+
+
+class TaskApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='apiuser')
+        self.other = User.objects.create_user(username='apiother')
+        self.status = Status.objects.create(name='Новый')
+        self.done = Status.objects.create(name='Готово')
+        self.label = Label.objects.create(name='bug')
+        self.task = Task.objects.create(
+            name='Задача API',
+            status=self.status,
+            author=self.user,
+            assignee=self.other,
+        )
+        self.task.labels.add(self.label)
+        self.foreign = Task.objects.create(
+            name='Чужая задача',
+            status=self.done,
+            author=self.other,
+        )
+        self.client.force_login(self.user)
+
+    def send(self, method, url, data):
+        return getattr(self.client, method)(
+            url, json.dumps(data), content_type='application/json'
+        )
+
+    def test_list_is_filtered_and_compact(self):
+        response = self.client.get(
+            reverse('api_task_list'), {'status': self.status.pk}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'results': [{
+                'id': self.task.pk,
+                'name': 'Задача API',
+                'description': '',
+                'status': self.status.pk,
+                'author': self.user.pk,
+                'assignee': self.other.pk,
+                'labels': [self.label.pk],
+                'created_at': self.task.created_at.isoformat(),
+            }],
+            'next': None,
+            'previous': None,
+        })
+        response = self.client.get(
+            reverse('api_task_list'), {'status': 'abc'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status', response.json()['errors'])
+
+    def test_list_cursor_pagination(self):
+        with patch.object(TaskApiListView, 'paginate_by', 1):
+            response = self.client.get(reverse('api_task_list'))
+            data = response.json()
+            self.assertEqual(data['results'][0]['id'], self.task.pk)
+            data = self.client.get(data['next']).json()
+        self.assertEqual(data['results'][0]['id'], self.foreign.pk)
+        self.assertIsNone(data['next'])
+
+    def test_conditional_get_returns_304_until_tasks_change(self):
+        url = reverse('api_task_detail', args=[self.task.pk])
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        self.assertIn('Last-Modified', response)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        # Only the count and the latest updated_at of the task are read.
+        task_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'tasks_task' in query['sql']
+        ]
+        self.assertEqual(len(task_queries), 1)
+        self.assertIn('MAX(', task_queries[0])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        list_response = self.client.get(reverse('api_task_list'))
+        self.assertNotEqual(list_response['ETag'], etag)
+        response = self.client.get(
+            reverse('api_task_list'),
+            HTTP_IF_NONE_MATCH=list_response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+        self.task.labels.clear()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['labels'], [])
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_follows_the_tasks_table(self):
+        url = reverse('api_task_list')
+        etag = self.client.get(url)['ETag']
+        # Bumps no cache version, like a write seen from another worker.
+        Task.objects.filter(pk=self.foreign.pk).update(
+            name='Другое имя', updated_at=timezone.now()
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        # Deleting a task other than the latest only changes the count.
+        self.task.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [task['id'] for task in response.json()['results']],
+            [self.foreign.pk]
+        )
+
+    def test_create_update_and_delete(self):
+        response = self.send('post', reverse('api_task_list'), {
+            'name': 'Новая задача',
+            'status': self.status.pk,
+            'labels': [self.label.pk],
+        })
+        self.assertEqual(response.status_code, 201)
+        task = Task.objects.get(name='Новая задача')
+        self.assertEqual(task.author, self.user)
+        self.assertEqual(
+            response['Location'],
+            reverse('api_task_detail', args=[task.pk])
+        )
+        url = response['Location']
+
+        response = self.send('patch', url, {'status': self.done.pk})
+        self.assertEqual(response.status_code, 200)
+        task.refresh_from_db()
+        self.assertEqual(task.status, self.done)
+        self.assertEqual(list(task.labels.all()), [self.label])
+
+        response = self.send('put', url, {
+            'name': 'Заменённая задача',
+            'status': self.status.pk,
+        })
+        self.assertEqual(response.json()['labels'], [])
+        self.assertEqual(response.json()['name'], 'Заменённая задача')
+
+        response = self.send('put', url, {'name': ''})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            set(response.json()['errors']), {'name', 'status'}
+        )
+
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Task.objects.filter(pk=task.pk).exists())
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_delete_requires_author_and_login(self):
+        url = reverse('api_task_detail', args=[self.foreign.pk])
+        self.assertEqual(self.client.delete(url).status_code, 403)
+        self.client.logout()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue(Task.objects.filter(pk=self.foreign.pk).exists())
+
+
+class TaskConditionalPageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='etaguser')
+        self.status = Status.objects.create(name='Новый')
+        self.label = Label.objects.create(name='bug')
+        self.task = Task.objects.create(
+            name='Задача',
+            status=self.status,
+            author=self.user,
+        )
+        self.client.force_login(self.user)
+
+    def assertRevalidates(self, url, change):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_updated_at_follows_saves_and_labels(self):
+        updated_at = self.task.updated_at
+        self.task.labels.add(self.label)
+        self.task.refresh_from_db()
+        self.assertGreater(self.task.updated_at, updated_at)
+
+        updated_at = self.task.updated_at
+        self.label.task_set.clear()
+        self.task.refresh_from_db()
+        self.assertGreater(self.task.updated_at, updated_at)
+
+        updated_at = self.task.updated_at
+        self.task.name = 'Переименованная'
+        self.task.save()
+        self.assertGreater(self.task.updated_at, updated_at)
+
+    def test_detail_page_revalidates(self):
+        url = reverse('task_detail', args=[self.task.pk])
+        self.assertRevalidates(url, lambda: self.task.labels.add(self.label))
+
+        def rename_status():
+            self.status.name = 'Переименован'
+            self.status.save()
+
+        response = self.assertRevalidates(url, rename_status)
+        self.assertContains(response, 'Переименован')
+
+    def test_list_page_revalidates(self):
+        url = reverse('task_list') + '?status=%d' % self.status.pk
+        self.assertRevalidates(url, lambda: Task.objects.create(
+            name='Ещё задача', status=self.status, author=self.user,
+        ))
+        self.assertRevalidates(url, lambda: self.task.delete())
+
+    def test_bulk_actions_touch_tasks(self):
+        url = reverse('task_list')
+        self.assertRevalidates(url, lambda: self.client.post(
+            reverse('task_bulk_action'),
+            {'tasks': [self.task.pk], 'action': 'add_labels',
+             'labels': [self.label.pk]},
+        ))
+
+    def test_pending_messages_disable_304(self):
+        url = reverse('task_detail', args=[self.task.pk])
+        etag = self.client.get(url)['ETag']
+        self.client.post(reverse('task_update', args=[self.task.pk]), {
+            'name': 'Задача',
+            'status': self.status.pk,
+        })
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Задача успешно изменена')
+
+
+class QueryInstrumentationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='sqluser')
+        self.status = Status.objects.create(name='Новый')
+        self.label = Label.objects.create(name='bug')
+        self.tasks = [
+            Task.objects.create(
+                name=f'Задача {i}',
+                status=self.status,
+                author=self.user,
+            )
+            for i in range(3)
+        ]
+        self.tasks[0].labels.add(self.label)
+        self.client.force_login(self.user)
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('task_list'))
+        self.assertEqual(
+            response['Server-Timing'].split(';dur=')[0],
+            'db;desc="%d queries"' % len(context)
+        )
+
+    @override_settings(SQL_QUERY_BUDGETS={'task_list': 1})
+    def test_over_budget_is_logged(self):
+        with self.assertLogs('task_manager.sql', 'WARNING') as logs:
+            self.client.get(reverse('task_list'))
+        self.assertIn('GET task_list ran', logs.output[0])
+        self.assertIn('over its budget of 1', logs.output[0])
+
+    @override_settings(SQL_QUERY_BUDGETS={'task_list': {'POST': 1}})
+    def test_budget_per_method(self):
+        with self.assertNoLogs('task_manager.sql', 'WARNING'):
+            self.client.get(reverse('task_list'))
+
+    def test_repeated_query_shapes(self):
+        self.assertEqual(
+            query_shape('SELECT 1 WHERE id IN (%s, %s, %s)'),
+            'SELECT 1 WHERE id IN (%s...)'
+        )
+        self.assertEqual(
+            query_shape('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO t (a, b) VALUES (%s...)...'
+        )
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            for task in Task.objects.all():
+                task.status.name
+        self.assertEqual(counter.count, 4)
+        [(shape, count)] = counter.repeated_shapes(3)
+        self.assertEqual(count, 3)
+        self.assertIn('statuses_status', shape)
+
+    @override_settings(SQL_N_PLUS_ONE_THRESHOLD=2)
+    def test_task_detail_has_no_repeated_queries(self):
+        with self.assertNoLogs('task_manager.sql', 'WARNING'):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(
+                    reverse('task_detail', args=[self.tasks[0].pk])
+                )
+        self.assertContains(response, 'bug')
+        label_queries = [query for query in context.captured_queries
+                         if 'labels_label' in query['sql']]
+        self.assertEqual(len(label_queries), 1)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='metricsuser')
+        self.status = Status.objects.create(name='Новый')
+        Task.objects.create(
+            name='Задача', status=self.status, author=self.user
+        )
+        self.client.force_login(self.user)
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_request_metrics(self):
+        latency = dict(view='task_list', method='GET')
+        before = (
+            self.sample('django_http_request_duration_seconds_count',
+                        **latency),
+            self.sample('django_http_responses_total',
+                        status='200', **latency),
+            self.sample('django_db_queries_total', view='task_list'),
+        )
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('task_list'))
+        after = (
+            self.sample('django_http_request_duration_seconds_count',
+                        **latency),
+            self.sample('django_http_responses_total',
+                        status='200', **latency),
+            self.sample('django_db_queries_total', view='task_list'),
+        )
+        self.assertEqual(after[0] - before[0], 1)
+        self.assertEqual(after[1] - before[1], 1)
+        self.assertEqual(after[2] - before[2], len(context))
+
+    def test_unresolved_paths_share_a_label(self):
+        labels = dict(view='<unresolved>', method='GET', status='404')
+        before = self.sample('django_http_responses_total', **labels)
+        self.client.get('/no-such-page/')
+        self.client.get('/another-missing-page/')
+        after = self.sample('django_http_responses_total', **labels)
+        self.assertEqual(after - before, 2)
+
+    def test_cache_hits_and_misses(self):
+        reference_data.invalidate()
+        hits = self.sample('django_cache_requests_total', result='hit')
+        misses = self.sample('django_cache_requests_total', result='miss')
+        reference_data.get_statuses()
+        self.assertGreater(
+            self.sample('django_cache_requests_total', result='miss'),
+            misses
+        )
+        reference_data.get_statuses()
+        self.assertGreater(
+            self.sample('django_cache_requests_total', result='hit'),
+            hits
+        )
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('task_list'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response,
+            'django_http_responses_total{method="GET",'
+            'status="200",view="task_list"}'
+        )
+        self.assertContains(response, 'django_cache_requests_total')
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        self.client.logout()
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(ROOT_URLCONF='task_manager.asgi_urls')
+class AsyncTaskViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='asyncuser')
+        self.status = Status.objects.create(name='Новый')
+        self.label = Label.objects.create(name='bug')
+        self.tasks = [
+            Task.objects.create(
+                name=f'Задача {i}',
+                status=self.status,
+                author=self.user,
+            )
+            for i in range(3)
+        ]
+        self.tasks[0].labels.add(self.label)
+
+    def test_asgi_urls(self):
+        self.assertIs(
+            resolve(reverse('task_list')).func.view_class,
+            AsyncTaskListView
+        )
+        self.assertIs(
+            resolve(reverse('api_task_detail', args=[1])).func.view_class,
+            AsyncTaskApiDetailView
+        )
+        # Views without an async version fall through to the sync URLs.
+        self.assertIs(
+            resolve(reverse('task_create')).func.view_class,
+            TaskCreateView
+        )
+
+    async def test_task_list(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            reverse('task_list'), {'status': self.status.pk}
+        )
+        self.assertContains(response, 'Задача 2')
+        self.assertContains(response, 'bug')
+        # The middleware counted the queries of the ORM's thread.
+        count = int(response['Server-Timing'].split('"')[1].split()[0])
+        self.assertGreater(count, 0)
+        response = await self.async_client.get(
+            reverse('task_list'),
+            {'status': self.status.pk},
+            headers={'if-none-match': response['ETag']},
+        )
+        self.assertEqual(response.status_code, 304)
+        response = await self.async_client.get(
+            reverse('task_list'),
+            {'partial': 'rows'},
+            headers={'accept-encoding': 'gzip'},
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(response.content).decode().count('<tr '), 3
+        )
+
+        response = await self.async_client.get(
+            reverse('task_list'), {'cursor': 'bad'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+        await self.async_client.alogout()
+        response = await self.async_client.get(reverse('task_list'))
+        self.assertRedirects(
+            response, reverse('index'), fetch_redirect_response=False
+        )
+
+    async def test_task_detail(self):
+        await self.async_client.aforce_login(self.user)
+        url = reverse('task_detail', args=[self.tasks[0].pk])
+        response = await self.async_client.get(url)
+        self.assertContains(response, 'Задача 0')
+        self.assertContains(response, 'bug')
+        response = await self.async_client.get(
+            url, headers={'if-none-match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
+        response = await self.async_client.get(
+            reverse('task_detail', args=[0])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_export(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            reverse('task_export'), {'format': 'jsonl'}
+        )
+        self.assertTrue(response.streaming)
+        content = b''.join([
+            chunk async for chunk in response.streaming_content
+        ]).decode()
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [row['id'] for row in rows],
+            [task.pk for task in self.tasks]
+        )
+        self.assertEqual(rows[0]['labels'], ['bug'])
+
+    async def test_task_list_show_all(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            reverse('task_list'), {'show': 'all'}
+        )
+        self.assertTrue(response.streaming)
+        content = b''.join([
+            chunk async for chunk in response.streaming_content
+        ]).decode()
+        self.assertEqual(content.count('<tr '), 3)
+        self.assertIn('bug', content)
+        self.assertIn('</html>', content)
+
+    async def test_api(self):
+        response = await self.async_client.get(reverse('api_task_list'))
+        self.assertEqual(response.status_code, 401)
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('api_task_list'))
+        results = response.json()['results']
+        self.assertEqual(
+            [task['id'] for task in results],
+            [task.pk for task in self.tasks]
+        )
+        self.assertEqual(results[0]['labels'], [self.label.pk])
+        response = await self.async_client.get(
+            reverse('api_task_list'),
+            headers={'if-none-match': response['ETag']},
+        )
+        self.assertEqual(response.status_code, 304)
+
+        url = reverse('api_task_detail', args=[self.tasks[1].pk])
+        response = await self.async_client.patch(
+            url, json.dumps({'name': 'Новое имя'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['name'], 'Новое имя')
+        response = await self.async_client.get(url)
+        self.assertEqual(response.json()['name'], 'Новое имя')
+        response = await self.async_client.delete(url)
+        self.assertEqual(response.status_code, 204)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+
+class TaskEventTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='eventuser')
+        self.status = Status.objects.create(name='Новый')
+        self.done = Status.objects.create(name='Готово')
+        self.label = Label.objects.create(name='bug')
+        self.task = Task.objects.create(
+            name='Задача', status=self.status, author=self.user
+        )
+
+    def last_events(self, count):
+        return [
+            (event.task_id, event.action, event.fields)
+            for event in TaskEvent.objects.order_by('-pk')[:count][::-1]
+        ]
+
+    def stream(self, **kwargs):
+        response = self.client.get(reverse('task_events'), **kwargs)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return response.content.decode()
+
+    def test_signals_record_changed_fields(self):
+        self.assertEqual(self.last_events(1), [(
+            self.task.pk, 'created',
+            {'name': 'Задача', 'status': 'Новый', 'assignee': None},
+        )])
+        task = Task.objects.get(pk=self.task.pk)
+        task.name = 'Другая задача'
+        task.save()
+        task.save()
+        task.labels.add(self.label)
+        task.labels.add(self.label)
+        self.label.task_set.remove(task)
+        task.status = self.done
+        task.assignee = self.user
+        task.save()
+        task.delete()
+        self.assertEqual(self.last_events(5), [
+            (self.task.pk, 'updated', {'name': 'Другая задача'}),
+            (self.task.pk, 'updated', {'labels': None}),
+            (self.task.pk, 'updated', {'labels': None}),
+            (self.task.pk, 'updated',
+             {'status': 'Готово', 'assignee': 'eventuser'}),
+            (self.task.pk, 'deleted', {}),
+        ])
+
+    def test_bulk_actions_record_events(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('task_bulk_action'), {
+            'tasks': [self.task.pk, 999],
+            'action': 'set_status',
+            'status': self.done.pk,
+        })
+        self.client.post(reverse('task_bulk_action'), {
+            'tasks': [self.task.pk],
+            'action': 'add_labels',
+            'labels': [self.label.pk],
+        })
+        self.assertEqual(self.last_events(2), [
+            (self.task.pk, 'updated', {'status': 'Готово'}),
+            (self.task.pk, 'updated', {'labels': None}),
+        ])
+        other = Task.objects.create(
+            name='Вторая', status=self.status, author=self.user
+        )
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(reverse('task_bulk_action'), {
+                'tasks': [self.task.pk, other.pk, 999],
+                'action': 'delete',
+            })
+        inserts = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('INSERT INTO "tasks_taskevent"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(self.last_events(3), [
+            (other.pk, 'created',
+             {'name': 'Вторая', 'status': 'Новый', 'assignee': None}),
+            (self.task.pk, 'deleted', {}),
+            (other.pk, 'deleted', {}),
+        ])
+
+    def test_merges_and_imports_record_events(self):
+        other = Task.objects.create(
+            name='Вторая', status=self.status, author=self.user
+        )
+        other.labels.add(self.label)
+        merge_status(self.status, self.done)
+        self.assertEqual(self.last_events(2), [
+            (self.task.pk, 'updated', {'status': 'Готово'}),
+            (other.pk, 'updated', {'status': 'Готово'}),
+        ])
+        merge_label(self.label, Label.objects.create(name='defect'))
+        self.assertEqual(self.last_events(1), [
+            (other.pk, 'updated', {'labels': None}),
+        ])
+
+        importer = TaskImporter(self.user)
+        importer.run(enumerate([
+            {'name': 'Импорт', 'status': 'Готово', 'assignee': 'eventuser'},
+            {'name': 'Ещё', 'status': 'Новый'},
+        ], 1))
+        first, second = Task.objects.filter(
+            name__in=['Импорт', 'Ещё']
+        ).order_by('pk')
+        self.assertEqual(self.last_events(2), [
+            (first.pk, 'created',
+             {'name': 'Импорт', 'status': 'Готово', 'assignee': 'eventuser'}),
+            (second.pk, 'created',
+             {'name': 'Ещё', 'status': 'Новый', 'assignee': None}),
+        ])
+
+    def test_event_stream(self):
+        self.assertEqual(self.client.get(reverse('task_events')).status_code,
+                         403)
+        self.client.force_login(self.user)
+        created = TaskEvent.objects.get()
+        self.task.labels.add(self.label)
+        updated = TaskEvent.objects.latest('pk')
+
+        content = self.stream(data={'after': 0})
+        self.assertEqual(content.count('event: task'), 2)
+        self.assertIn('id: %d\nevent: task\ndata: %s\n\n' % (
+            updated.pk,
+            json.dumps({'id': self.task.pk, 'action': 'updated',
+                        'fields': {'labels': ['bug']}}),
+        ), content)
+        self.assertTrue(content.endswith(
+            'id: %d\nretry: 5000\n\n' % updated.pk
+        ))
+        # Reconnects resume after Last-Event-ID.
+        content = self.stream(
+            data={'after': 0}, HTTP_LAST_EVENT_ID=str(created.pk)
+        )
+        self.assertEqual(content.count('event: task'), 1)
+        # Without a position the stream starts at the latest event.
+        self.assertEqual(
+            self.stream(), 'id: %d\nretry: 5000\n\n' % updated.pk
+        )
+
+    def test_task_list_passes_last_event_id(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('task_list'))
+        self.assertContains(
+            response,
+            '%s?after=%d' % (reverse('task_events'),
+                             TaskEvent.objects.latest('pk').pk),
+        )
+        self.assertContains(response, 'data-task-id="%d"' % self.task.pk)
+
+    def test_cursor_rereads_skipped_ids(self):
+        TaskEvent.objects.all().delete()
+        first, skipped, last = TaskEvent.objects.bulk_create(
+            TaskEvent(task_id=self.task.pk, action='updated')
+            for _ in range(3)
+        )
+        skipped_pk = skipped.pk
+        skipped.delete()
+        cursor = events.EventCursor(first.pk - 1)
+        self.assertEqual(cursor.fetch(), [first, last])
+        self.assertEqual(list(cursor.gaps), [skipped_pk])
+        # The skipped id commits late.
+        TaskEvent.objects.create(
+            pk=skipped_pk, task_id=self.task.pk, action='deleted'
+        )
+        self.assertEqual(cursor.fetch(), [TaskEvent(pk=skipped_pk)])
+        self.assertEqual((cursor.fetch(), cursor.gaps), ([], {}))
+
+    @override_settings(ROOT_URLCONF='task_manager.asgi_urls')
+    @patch.object(events, 'POLL_INTERVAL', 0.01)
+    # It would end the test's transaction.
+    @patch.object(events, 'close_old_connections')
+    async def test_async_stream(self, close_old_connections):
+        await self.async_client.aforce_login(self.user)
+        created = await TaskEvent.objects.aget()
+        response = await self.async_client.get(
+            reverse('task_events'), {'after': created.pk - 1}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = aiter(response.streaming_content)
+        self.assertEqual(
+            await anext(content),
+            ('id: %d\nretry: 5000\n\n' % (created.pk - 1)).encode()
+        )
+        self.assertIn(b'"action": "created"', await anext(content))
+        # Events recorded while the stream is open arrive through the
+        # broker's poller.
+        await sync_to_async(self.task.labels.add)(self.label)
+        self.assertIn(b'"labels": ["bug"]', await anext(content))
+        await content.aclose()
+        close_old_connections.assert_called()
+
+    @patch.object(events, 'close_old_connections')
+    async def test_poller_backs_off_after_errors(self, close_old_connections):
+        broker = events.TaskEventBroker()
+        queue = asyncio.Queue()
+        broker.queues.add(queue)
+        event = TaskEvent(pk=1, task_id=self.task.pk, action='deleted')
+        results = [OperationalError('gone')] * 3 + [[event], []]
+
+        def fetch():
+            result = results.pop(0)
+            if not results:
+                broker.queues.discard(queue)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        cursor = Mock(fetch=fetch)
+        with patch.object(events.asyncio, 'sleep') as sleep, \
+                self.assertLogs(events.logger, 'ERROR'):
+            await broker.poll(cursor)
+        self.assertEqual(
+            [call.args[0] for call in sleep.call_args_list], [1, 2, 4, 8, 1]
+        )
+        self.assertEqual(queue.get_nowait(), event)
+        # Before each of the five reads, and after each of the failures.
+        self.assertEqual(close_old_connections.call_count, 8)
+
+
+class TaskSummaryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='summaryuser')
+        self.other = User.objects.create_user(
+            username='other', first_name='Иван', last_name='Петров'
+        )
+        self.new = Status.objects.create(name='Новый')
+        self.done = Status.objects.create(name='Готово')
+        self.bug = Label.objects.create(name='bug')
+        self.ui = Label.objects.create(name='ui')
+        self.tasks = [
+            Task.objects.create(
+                name=f'Задача {i}',
+                status=self.new,
+                author=self.user,
+                assignee=self.other if i % 2 else None,
+            )
+            for i in range(3)
+        ]
+        self.tasks[0].labels.add(self.bug, self.ui)
+        self.client.force_login(self.user)
+
+    def assertCounts(self, dimension, expected):
+        self.assertEqual(check_task_counts(), [])
+        self.assertEqual(get_task_counts()[dimension], {
+            '' if key is None else str(key): count
+            for key, count in expected.items()
+        })
+
+    def test_saves_and_deletes(self):
+        week = week_start(self.tasks[0].created_at).isoformat()
+        self.assertCounts(TaskCount.STATUS, {self.new.pk: 3})
+        self.assertCounts(TaskCount.ASSIGNEE, {None: 2, self.other.pk: 1})
+        self.assertCounts(TaskCount.LABEL, {self.bug.pk: 1, self.ui.pk: 1})
+        self.assertCounts(TaskCount.WEEK, {week: 3})
+
+        task = Task.objects.get(pk=self.tasks[1].pk)
+        task.status = self.done
+        task.assignee = None
+        task.save()
+        # Saving again changes nothing.
+        task.save()
+        # Neither does saving a task that was not loaded.
+        Task(
+            pk=task.pk, name='Задача', status=self.done, author=self.user,
+            created_at=task.created_at,
+        ).save()
+        self.assertCounts(TaskCount.STATUS, {self.new.pk: 2, self.done.pk: 1})
+        self.assertCounts(TaskCount.ASSIGNEE, {None: 3})
+
+        self.tasks[0].delete()
+        self.assertCounts(TaskCount.STATUS, {self.new.pk: 1, self.done.pk: 1})
+        self.assertCounts(TaskCount.LABEL, {})
+        self.assertCounts(TaskCount.WEEK, {week: 2})
+
+    def test_label_changes(self):
+        task = self.tasks[1]
+        task.labels.add(self.bug, self.bug)
+        task.labels.remove(self.ui)
+        self.assertCounts(TaskCount.LABEL, {self.bug.pk: 2, self.ui.pk: 1})
+        self.bug.task_set.add(self.tasks[2])
+        self.ui.task_set.remove(self.tasks[0], self.tasks[2])
+        self.assertCounts(TaskCount.LABEL, {self.bug.pk: 3})
+        task.labels.set([self.ui])
+        self.assertCounts(TaskCount.LABEL, {self.bug.pk: 2, self.ui.pk: 1})
+        self.tasks[0].labels.clear()
+        self.bug.task_set.clear()
+        self.assertCounts(TaskCount.LABEL, {self.ui.pk: 1})
+
+    def test_set_based_writes(self):
+        ids = [task.pk for task in self.tasks]
+        for data in (
+            {'action': 'set_status', 'status': self.done.pk},
+            {'action': 'set_assignee', 'assignee': self.other.pk},
+            {'action': 'add_labels', 'labels': [self.bug.pk]},
+            {'action': 'remove_labels', 'labels': [self.ui.pk]},
+        ):
+            self.client.post(
+                reverse('task_bulk_action'), {'tasks': ids, **data}
+            )
+        self.assertCounts(TaskCount.STATUS, {self.done.pk: 3})
+        self.assertCounts(TaskCount.ASSIGNEE, {self.other.pk: 3})
+        self.assertCounts(TaskCount.LABEL, {self.bug.pk: 3})
+
+        merge_label(self.bug, self.ui)
+        merge_status(self.done, self.new)
+        self.assertCounts(TaskCount.LABEL, {self.ui.pk: 3})
+        self.assertCounts(TaskCount.STATUS, {self.new.pk: 3})
+
+        self.client.post(
+            reverse('task_bulk_action'), {'tasks': ids[1:], 'action': 'delete'}
+        )
+        self.assertCounts(TaskCount.STATUS, {self.new.pk: 1})
+        self.assertCounts(TaskCount.ASSIGNEE, {self.other.pk: 1})
+        self.assertCounts(TaskCount.LABEL, {self.ui.pk: 1})
+        self.assertCounts(TaskCount.WEEK, {
+            week_start(self.tasks[0].created_at).isoformat(): 1
+        })
+
+    def test_deleted_assignee(self):
+        Task.objects.filter(assignee=self.other).update(author=self.other)
+        Task.objects.exclude(assignee=self.other).delete()
+        assignee = User.objects.create_user(username='assignee')
+        Task.objects.create(
+            name='Задача', status=self.new, author=self.other,
+            assignee=assignee,
+        )
+        assignee.delete()
+        self.assertCounts(TaskCount.ASSIGNEE, {None: 1, self.other.pk: 1})
+
+    def test_import(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tasks.jsonl')
+            with open(path, 'w', encoding='utf-8') as stream:
+                for i in range(3):
+                    stream.write(json.dumps({
+                        'name': f'Импорт {i}',
+                        'status': 'Новый',
+                        'labels': ['bug', 'импорт'],
+                    }) + '\n')
+            call_command(
+                'import_tasks', path, '--author', 'summaryuser',
+                stdout=StringIO(), stderr=StringIO(),
+            )
+        self.assertCounts(TaskCount.STATUS, {self.new.pk: 6})
+        imported = Label.objects.get(name='импорт')
+        self.assertCounts(
+            TaskCount.LABEL,
+            {self.bug.pk: 4, self.ui.pk: 1, imported.pk: 3}
+        )
+
+    def test_rebuild_and_check(self):
+        out = StringIO()
+        call_command('rebuild_task_counts', '--check', stdout=out)
+        self.assertIn('up to date', out.getvalue())
+
+        TaskCount.objects.filter(dimension=TaskCount.STATUS).update(count=9)
+        TaskCount.objects.filter(dimension=TaskCount.WEEK).delete()
+        self.assertEqual(len(check_task_counts()), 2)
+        err = StringIO()
+        with self.assertRaisesMessage(CommandError, '2 task counts'):
+            call_command('rebuild_task_counts', '--check', stderr=err)
+        self.assertIn(
+            'status %s: stored 9, live 3' % self.new.pk, err.getvalue()
+        )
+
+        call_command('rebuild_task_counts', stdout=StringIO())
+        self.assertCounts(TaskCount.STATUS, {self.new.pk: 3})
+
+    def test_week_matches_the_database(self):
+        task = self.tasks[0]
+        for created_at in ('2026-10-18 23:30Z', '2026-10-19 00:30Z'):
+            Task.objects.filter(pk=task.pk).update(created_at=created_at)
+            task.refresh_from_db()
+            call_command('rebuild_task_counts', stdout=StringIO())
+            self.assertIn(
+                week_start(task.created_at).isoformat(),
+                get_task_counts()[TaskCount.WEEK],
+            )
+        self.assertEqual(
+            week_start(task.created_at).isoformat(), '2026-10-19'
+        )
+
+    def test_dashboard(self):
+        url = reverse('task_dashboard')
+        # The session, the user, the counts, the statuses and labels they
+        # are named by and the assignees shown; no task is read.
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+        self.assertEqual(response.context['total'], 3)
+        self.assertEqual(response.context['status_counts'], [
+            ('Новый', 3, reverse('task_list') + '?status=%s' % self.new.pk),
+        ])
+        self.assertEqual(response.context['assignee_counts'], [
+            ('Не назначен', 2, None),
+            ('Иван Петров', 1,
+             reverse('task_list') + '?assignee=%s' % self.other.pk),
+        ])
+        self.assertEqual(
+            [name for name, count, url in response.context['label_counts']],
+            ['bug', 'ui']
+        )
+        self.assertEqual(
+            [count for week, count in response.context['week_counts']], [3]
+        )
+        self.assertContains(response, 'Иван Петров')
+
+        with patch('task_manager.tasks.views.TaskDashboardView'
+                   '.assignees_shown', 1):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['assignee_counts']), 1)
+        self.assertEqual(response.context['other_assignees'], 1)
+
+        self.client.logout()
+        response = self.client.get(url)
+        self.assertRedirects(response, reverse('index'))
+
@@ -1,6 +1,11 @@
 from django.urls import path
+from .api import TaskApiDetailView, TaskApiListView
 from .views import (
     TaskListView,
+    TaskDashboardView,
+    TaskEventsView,
+    TaskExportView,
+    TaskBulkActionView,
     TaskDetailView,
     TaskCreateView,
     TaskUpdateView,
@@ -10,6 +15,20 @@ from .views import (
 
 urlpatterns = [
     path('', TaskListView.as_view(), name='task_list'),
+    path('export/', TaskExportView.as_view(), name='task_export'),
+    path(
+        'dashboard/',
+        TaskDashboardView.as_view(),
+        name='task_dashboard'
+        ),
+    path('events/', TaskEventsView.as_view(), name='task_events'),
+    path('bulk/', TaskBulkActionView.as_view(), name='task_bulk_action'),
+    path('api/', TaskApiListView.as_view(), name='api_task_list'),
+    path(
+        'api/<int:pk>/',
+        TaskApiDetailView.as_view(),
+        name='api_task_detail'
+        ),
     path('<int:pk>/', TaskDetailView.as_view(), name='task_detail'),
     path('create/', TaskCreateView.as_view(), name='task_create'),
     path(
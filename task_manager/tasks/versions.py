@@ -0,0 +1,59 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from task_manager.cache_versions import bump_version, get_version
+from task_manager.tasks.models import Task
+
+NAMESPACE = 'tasks'
+
+
+def get_tasks_version():
+    return get_version(NAMESPACE)
+
+
+def tasks_changed():
+    """
+    Invalidate everything derived from the tasks table. Code that writes
+    with update(), bulk_create() or raw SQL must call it, as no signals
+    are sent for those.
+    """
+    bump_version(NAMESPACE)
+
+
+def touch_tasks(tasks):
+    """Set updated_at on a task queryset written to without save()."""
+    return tasks.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(m2m_changed, sender=Task.labels.through)
+# Deleting a user sets the assignee of their tasks to NULL without
+# sending task signals. Labels in use are protected from deletion.
+@receiver(post_delete, sender='users.User')
+def task_data_changed(sender, **kwargs):
+    tasks_changed()
+
+
+@receiver(m2m_changed, sender=Task.labels.through)
+def task_labels_changed(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    if reverse:
+        # label.task_set.clear() only lists the tasks before the clear.
+        if action == 'pre_clear':
+            touch_tasks(Task.objects.filter(labels=instance))
+        elif action in ('post_add', 'post_remove'):
+            touch_tasks(Task.objects.filter(pk__in=pk_set))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        touch_tasks(Task.objects.filter(pk=instance.pk))
+
+
+@receiver(pre_delete, sender='users.User')
+def user_deleted(sender, instance, **kwargs):
+    touch_tasks(Task.objects.filter(assignee=instance))
@@ -1,43 +1,301 @@
+import hashlib
+from datetime import date
+
+from django import forms
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from task_manager.users.models import User
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse
 from django.shortcuts import redirect
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
 from django.views.generic import (
     CreateView,
     DetailView,
+    FormView,
+    TemplateView,
     UpdateView,
     DeleteView,
+    View,
 )
 from django_filters.views import FilterView
-from task_manager.tasks.filters import TaskFilter
-from task_manager.tasks.models import Task
+from task_manager import reference_data
+from task_manager.cache_versions import get_version
+from task_manager.mixins import SingleFetchObjectMixin
+from task_manager.reference_data import get_labels, get_statuses
+from task_manager.tasks.bulk import (
+    BULK_ACTION_CHOICES,
+    BULK_DELETE,
+    apply_bulk_action,
+)
+from task_manager.tasks.events import (
+    EventCursor,
+    event_message,
+    latest_event_id,
+    position_message,
+)
+from task_manager.tasks.export import EXPORT_FORMATS, export_response
+from task_manager.tasks.filters import LABELS_MODE_CHOICES, TaskFilter
+from task_manager.tasks.forms import TaskBulkActionForm, TaskForm
+from task_manager.tasks.models import Task, TaskCount
+from task_manager.tasks.pagination import InvalidCursor, KeysetPaginator
+from task_manager.tasks.rows import (
+    build_task_rows,
+    task_row_chunks,
+    task_row_values,
+)
+from task_manager.tasks.streaming import (
+    STREAM_CHUNK_SIZE,
+    page_chunks,
+    render_page_shell,
+    streaming_page_response,
+)
+from task_manager.tasks.summary import get_task_counts
+from task_manager.users.models import User
+
+
+def get_selected_choices(form, names):
+    """
+    Return ``{name: [objects]}`` for the model choice fields ``names`` of
+    ``form``. Their selects are rendered with the chosen options only and
+    the autocomplete fetches the others.
+    """
+    cleaned_data = getattr(form, 'cleaned_data', {})
+    instance = getattr(form, 'instance', None)
+    selected = {}
+    for name in names:
+        field = form.fields[name]
+        multiple = isinstance(field, forms.ModelMultipleChoiceField)
+        if name in cleaned_data:
+            value = cleaned_data[name]
+        elif not form.is_bound and instance is not None and instance.pk:
+            # select_related and prefetch_related on the view's queryset
+            # already loaded these.
+            value = getattr(instance, name)
+            if multiple:
+                value = value.all()
+        else:
+            try:
+                value = field.clean(form[name].value())
+            except ValidationError:
+                value = None
+        if multiple:
+            selected[name] = list(value or [])
+        else:
+            selected[name] = [] if value is None else [value]
+    return selected
+
 
+class ConditionalPageMixin:
+    """
+    Answer conditional GETs with 304 before the page is rendered. The ETag
+    covers get_etag_parts() and everything else the page shows: the user,
+    the reference data and the session the CSRF token belongs to. Pages
+    with pending messages, or without parts, are always rendered.
+    """
 
-class TaskListView(LoginRequiredMixin, FilterView):
+    def get_etag_parts(self):
+        return None
+
+    def get(self, request, *args, **kwargs):
+        view = cache_control(private=True, no_cache=True)(super().get)
+        return condition(etag_func=self.get_etag)(view)(
+            request, *args, **kwargs
+        )
+
+    def get_etag(self, request, *args, **kwargs):
+        if len(messages.get_messages(request)):
+            return None
+        parts = self.get_etag_parts()
+        if parts is None:
+            return None
+        key = repr((
+            request.user.pk,
+            # Login rotates both the session key and the CSRF secret.
+            request.session.session_key,
+            get_version(reference_data.NAMESPACE),
+            request.get_full_path(),
+            parts,
+        ))
+        return hashlib.sha1(key.encode()).hexdigest()
+
+
+class TaskListView(LoginRequiredMixin, ConditionalPageMixin, FilterView):
     model = Task
     template_name = 'tasks/task_list.html'
+    # ?partial=rows renders only the table rows, for the filter form and
+    # the infinite scroll to swap in without the rest of the page.
+    rows_template_name = 'tasks/task_rows.html'
+    partial_kwarg = 'partial'
+    # ?show=all lists every matching task on one page, streamed.
+    show_kwarg = 'show'
     context_object_name = 'tasks'
     filterset_class = TaskFilter
+    ordering = ('created_at', 'id')
+    paginate_by = 50
+    page_kwarg = 'cursor'
+
+    def is_partial(self):
+        return self.request.GET.get(self.partial_kwarg) == 'rows'
+
+    def is_streaming(self):
+        return self.request.GET.get(self.show_kwarg) == 'all' and \
+            not self.is_partial()
+
+    def get_paginate_by(self, queryset):
+        if self.is_streaming():
+            return None
+        return super().get_paginate_by(queryset)
+
+    def get(self, request, *args, **kwargs):
+        get = super().get
+        if self.is_partial():
+            # Only the rows are compressed: unlike the full page they hold
+            # no CSRF token and echo no query for BREACH to guess at.
+            get = gzip_page(get)
+        return get(request, *args, **kwargs)
+
+    def get_template_names(self):
+        if self.is_partial():
+            return [self.rows_template_name]
+        return super().get_template_names()
 
     def get_queryset(self):
-        queryset = Task.objects.all().select_related(
-            'status', 'author', 'assignee'
-        ).prefetch_related('labels')
+        queryset = Task.objects.all()
         if self.request.GET.get('own_tasks') == 'on':
             queryset = queryset.filter(author=self.request.user)
         return queryset
 
+    def get_ordering(self):
+        # Search results come most relevant first; created_at and id keep
+        # the ordering unique so cursors stay stable.
+        filterset = self.filterset
+        if filterset.is_bound and filterset.is_valid() and \
+                filterset.form.cleaned_data.get('q'):
+            return ('-search_rank',) + self.ordering
+        return self.ordering
+
+    def get_etag_parts(self):
+        # The newest change and the row count of the filtered set change
+        # whenever a task in it is edited, added or removed.
+        filterset = self.get_filterset(self.get_filterset_class())
+        if filterset.is_bound and not filterset.is_valid():
+            return None
+        stats = filterset.qs.order_by().aggregate(
+            last_update=Max('updated_at'),
+            count=Count('pk'),
+        )
+        return stats['last_update'], stats['count']
+
+    def get_filtered_queryset(self):
+        # What FilterView.get() lists: nothing when the filters are invalid.
+        self.filterset = self.get_filterset(self.get_filterset_class())
+        if self.filterset.is_bound and not self.filterset.is_valid():
+            return self.filterset.queryset.none()
+        return self.filterset.qs
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return KeysetPaginator(queryset, per_page, self.get_ordering())
+
+    def get_row_queryset(self, queryset):
+        # Only the rendered columns and the cursor keys are read.
+        return task_row_values(queryset, *(
+            field.lstrip('-') for field in self.get_ordering()
+        ))
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.get_paginator(
+            self.get_row_queryset(queryset), page_size
+        )
+        try:
+            page = paginator.page(self.request.GET.get(self.page_kwarg))
+        except InvalidCursor:
+            raise Http404('Некорректный курсор страницы.')
+        page.object_list = build_task_rows(page.object_list)
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_export_query(self):
+        query = self.request.GET.copy()
+        query.pop(self.page_kwarg, None)
+        query.pop(self.partial_kwarg, None)
+        query.pop('format', None)
+        return query.urlencode()
+
+    def get_page_url(self, cursor):
+        if cursor is None:
+            return None
+        query = self.request.GET.copy()
+        query[self.page_kwarg] = cursor
+        return '?' + query.urlencode()
+
+    def get_show_all_url(self):
+        query = self.request.GET.copy()
+        query.pop(self.page_kwarg, None)
+        query[self.show_kwarg] = 'all'
+        return '?' + query.urlencode()
+
+    def get_stream_queryset(self):
+        return task_row_values(
+            self.object_list.order_by(*self.get_ordering())
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        page = context['page_obj']
+        if self.is_streaming():
+            # The rows are streamed after the rest of the page; this only
+            # decides whether the table or "no tasks" is shown.
+            context['tasks'] = self.object_list.exists()
+        else:
+            context['next_page_url'] = self.get_page_url(page.next_cursor)
+        if self.is_partial():
+            # The rows need nothing else; the URL of the page after them
+            # goes in a header.
+            return context
+        if not self.is_streaming():
+            context['previous_page_url'] = self.get_page_url(
+                page.previous_cursor
+            )
+            if page.has_other_pages():
+                context['show_all_url'] = self.get_show_all_url()
         context['filter'] = self.filterset
-        context['statuses'] = Task._meta.get_field(
-            'status').remote_field.model.objects.all()
-        context['users'] = User.objects.all()
-        context['labels'] = Task._meta.get_field(
-            'labels').remote_field.model.objects.all()
+        context['export_query'] = self.get_export_query()
+        context['bulk_actions'] = BULK_ACTION_CHOICES
+        context['labels_modes'] = LABELS_MODE_CHOICES
+        context['statuses'] = get_statuses()
+        context['selected'] = get_selected_choices(
+            self.filterset.form, ['assignee']
+        )
+        context['labels'] = get_labels()
+        # Where the live updates of the page start.
+        context['last_event_id'] = latest_event_id()
         return context
 
+    def render_to_response(self, context, **response_kwargs):
+        if self.is_streaming():
+            head, tail = render_page_shell(
+                self.get_template_names(), context, self.request
+            )
+            rows = task_row_chunks(
+                self.get_stream_queryset(), STREAM_CHUNK_SIZE
+            )
+            return streaming_page_response(page_chunks(head, rows, tail))
+        response = super().render_to_response(context, **response_kwargs)
+        if self.is_partial() and context['next_page_url']:
+            response['X-Next-Page'] = context['next_page_url']
+        return response
+
+    def get_filterset(self, filterset_class):
+        # The ETag and the page share one filterset, so the filter form and
+        # its assignee lookup are only validated once.
+        if getattr(self, '_filterset', None) is None:
+            self._filterset = super().get_filterset(filterset_class)
+        return self._filterset
+
     def get_filterset_kwargs(self, filterset_class):
         kwargs = super().get_filterset_kwargs(filterset_class)
         kwargs['request'] = self.request
@@ -54,10 +312,184 @@ class TaskListView(LoginRequiredMixin, FilterView):
         return redirect('index')
 
 
+class TaskExportView(TaskListView):
+    """Stream the filtered task list as CSV or JSON Lines."""
+
+    def get(self, request, *args, **kwargs):
+        export_format = self.get_export_format()
+        return export_response(self.get_export_queryset(), export_format)
+
+    def get_export_format(self):
+        export_format = self.request.GET.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            raise Http404('Неизвестный формат экспорта.')
+        return export_format
+
+    def get_export_queryset(self):
+        return self.get_filtered_queryset().order_by(*self.get_ordering())
+
+
+class TaskEventsView(LoginRequiredMixin, View):
+    """
+    Server-Sent Events for the live task list. Each request gets the
+    events after the last one the browser saw and tells it when to
+    reconnect, so no worker is held by an open stream; the ASGI version
+    keeps the stream open instead.
+    """
+
+    # EventSource gives up on an error status instead of following a
+    # redirect to the login page.
+    raise_exception = True
+
+    def get_last_event_id(self):
+        # Reconnects send Last-Event-ID; the page passes the first one.
+        value = self.request.headers.get('Last-Event-ID') or \
+            self.request.GET.get('after')
+        try:
+            return max(int(value), 0)
+        except (TypeError, ValueError):
+            return None
+
+    def get(self, request, *args, **kwargs):
+        last_id = self.get_last_event_id()
+        if last_id is None:
+            last_id = latest_event_id()
+        cursor = EventCursor(last_id)
+        body = ''.join(map(event_message, cursor.fetch()))
+        body += position_message(cursor.last_id)
+        return self.no_cache(
+            HttpResponse(body, content_type='text/event-stream')
+        )
+
+    def no_cache(self, response):
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+class TaskDashboardView(LoginRequiredMixin, TemplateView):
+    """
+    Task counts by status, assignee, label and creation week, read from
+    the TaskCount table instead of counting the tasks.
+    """
+
+    template_name = 'tasks/task_dashboard.html'
+    # The assignees with the most tasks; the rest are summed up.
+    assignees_shown = 50
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        counts = get_task_counts()
+        task_list = reverse('task_list')
+        statuses = counts[TaskCount.STATUS]
+        labels = counts[TaskCount.LABEL]
+        context['total'] = sum(statuses.values())
+        context['status_counts'] = self.by_count([
+            (status.name, statuses[str(status.pk)],
+             '%s?status=%s' % (task_list, status.pk))
+            for status in get_statuses() if str(status.pk) in statuses
+        ])
+        context['label_counts'] = self.by_count([
+            (label.name, labels[str(label.pk)],
+             '%s?labels=%s' % (task_list, label.pk))
+            for label in get_labels() if str(label.pk) in labels
+        ])
+        context['assignee_counts'], context['other_assignees'] = \
+            self.get_assignee_counts(counts[TaskCount.ASSIGNEE], task_list)
+        context['week_counts'] = sorted((
+            (date.fromisoformat(key), count)
+            for key, count in counts[TaskCount.WEEK].items()
+        ), reverse=True)
+        return context
+
+    def by_count(self, rows):
+        return sorted(rows, key=lambda row: (-row[1], row[0]))
+
+    def get_assignee_counts(self, assignees, task_list):
+        """
+        Return the rows of the assignees_shown assignees with the most
+        tasks, and how many tasks the others have.
+        """
+        keys = sorted(assignees, key=lambda key: (-assignees[key], key))
+        shown = keys[:self.assignees_shown]
+        users = User.objects.only(
+            'username', 'first_name', 'last_name'
+        ).in_bulk([int(key) for key in shown if key])
+        rows = []
+        for key in shown:
+            if not key:
+                rows.append(('Не назначен', assignees[key], None))
+            elif int(key) in users:
+                user = users[int(key)]
+                rows.append((
+                    user.get_full_name() or user.username,
+                    assignees[key],
+                    '%s?assignee=%s' % (task_list, key),
+                ))
+        others = sum(assignees[key] for key in keys[self.assignees_shown:])
+        return rows, others
+
+    def handle_no_permission(self):
+        messages.error(
+            self.request,
+            'Необходима авторизация пользователя.'
+        )
+        return redirect('index')
+
+
+class TaskBulkActionView(LoginRequiredMixin, FormView):
+    """Apply one change to the tasks selected on the task list."""
+
+    form_class = TaskBulkActionForm
+    http_method_names = ['post']
+
+    def form_valid(self, form):
+        data = form.cleaned_data
+        count = apply_bulk_action(
+            self.request.user,
+            data['tasks'],
+            data['action'],
+            status=data['status'],
+            assignee=data['assignee'],
+            labels=data['labels'],
+        )
+        if data['action'] == BULK_DELETE:
+            messages.success(self.request, f'Удалено задач: {count}')
+            if count < len(data['tasks']):
+                messages.error(
+                    self.request,
+                    'Задачу может удалить только ее автор.'
+                )
+        else:
+            messages.success(self.request, f'Изменено задач: {count}')
+        return redirect(self.get_success_url())
+
+    def form_invalid(self, form):
+        for errors in form.errors.values():
+            messages.error(self.request, errors[0])
+        return redirect(self.get_success_url())
+
+    def get_success_url(self):
+        next_url = self.request.POST.get('next')
+        if next_url and url_has_allowed_host_and_scheme(
+            next_url,
+            allowed_hosts={self.request.get_host()},
+            require_https=self.request.is_secure(),
+        ):
+            return next_url
+        return reverse('task_list')
+
+    def handle_no_permission(self):
+        messages.error(
+            self.request,
+            'Необходима авторизация пользователя.'
+        )
+        return redirect('index')
+
+
 class TaskCreateView(LoginRequiredMixin, CreateView):
     model = Task
     template_name = 'tasks/task_create.html'
-    fields = ['name', 'description', 'status', 'assignee', 'labels']
+    form_class = TaskForm
     success_url = reverse_lazy('task_list')
 
     def form_valid(self, form):
@@ -87,20 +519,22 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['statuses'] = Task._meta.get_field(
-            'status'
-        ).remote_field.model.objects.all()
-        context['users'] = User.objects.all()
-        context['labels'] = Task._meta.get_field(
-            'labels'
-        ).remote_field.model.objects.all()
+        context['selected'] = get_selected_choices(
+            context['form'], ['status', 'assignee', 'labels']
+        )
         return context
 
 
-class TaskDetailView(LoginRequiredMixin, DetailView):
+class TaskDetailView(LoginRequiredMixin, ConditionalPageMixin, DetailView):
     model = Task
     template_name = 'tasks/task_detail.html'
     context_object_name = 'task'
+    queryset = Task.objects.select_related('status', 'author', 'assignee')
+
+    def get_etag_parts(self):
+        return Task.objects.filter(pk=self.kwargs['pk']).values_list(
+            'updated_at', flat=True
+        ).first()
 
     def handle_no_permission(self):
         messages.error(
@@ -110,10 +544,14 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
         return redirect('index')
 
 
-class TaskUpdateView(LoginRequiredMixin, UpdateView):
+class TaskUpdateView(LoginRequiredMixin, SingleFetchObjectMixin, UpdateView):
     model = Task
+    # The form's initial values and the template share one query.
+    queryset = Task.objects.select_related(
+        'status', 'assignee'
+    ).prefetch_related('labels')
     template_name = 'tasks/task_update.html'
-    fields = ['name', 'description', 'status', 'assignee', 'labels']
+    form_class = TaskForm
     success_url = reverse_lazy('task_list')
 
     def form_valid(self, form):
@@ -142,24 +580,24 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['statuses'] = Task._meta.get_field(
-            'status'
-        ).remote_field.model.objects.all()
-        context['users'] = User.objects.all()
-        context['labels'] = Task._meta.get_field(
-            'labels'
-        ).remote_field.model.objects.all()
+        context['selected'] = get_selected_choices(
+            context['form'], ['status', 'assignee', 'labels']
+        )
         return context
 
 
-class TaskDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class TaskDeleteView(
+    LoginRequiredMixin,
+    UserPassesTestMixin,
+    SingleFetchObjectMixin,
+    DeleteView,
+):
     model = Task
     template_name = 'tasks/task_delete.html'
     success_url = reverse_lazy('task_list')
 
     def test_func(self):
-        task = self.get_object()
-        return self.request.user == task.author
+        return self.get_object().author_id == self.request.user.pk
 
     def handle_no_permission(self):
         if not self.request.user.is_authenticated:
@@ -0,0 +1,370 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from task_manager import benchmark
+from task_manager.cache_versions import check_shared_cache
+from task_manager.labels.models import Label
+from task_manager.rollbar_middleware import CustomRollbarNotifierMiddleware
+from task_manager.statuses.models import Status
+from task_manager.tasks.models import Task
+from task_manager.tasks.summary import rebuild_task_counts
+from task_manager.users.models import User
+
+try:
+    from rollbar.lib.session import get_current_session
+except ImportError:
+    get_current_session = None
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_is_reproducible(self):
+        benchmark.seed(tasks=30, users=5, labels=4, statuses=2)
+        first = list(Task.objects.order_by('pk').values_list(
+            'name', 'status__name', 'author__username', 'assignee__username'
+        ))
+        first_labels = Task.labels.through.objects.count()
+        Task.objects.all().delete()
+        User.objects.all().delete()
+        Label.objects.all().delete()
+        Status.objects.all().delete()
+
+        benchmark.seed(tasks=30, users=5, labels=4, statuses=2)
+        self.assertEqual(Task.objects.count(), 30)
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(list(Task.objects.order_by('pk').values_list(
+            'name', 'status__name', 'author__username', 'assignee__username'
+        )), first)
+        self.assertEqual(Task.labels.through.objects.count(), first_labels)
+
+    def test_run_reports_percentiles_and_queries(self):
+        benchmark.seed(tasks=20, users=3, labels=3, statuses=2)
+        results = benchmark.run(
+            repeat=2, warmup=0,
+            only={'task_list', 'task_create', 'task_list_all'},
+        )
+        self.assertEqual(
+            set(results), {'task_list', 'task_create', 'task_list_all'}
+        )
+        for result in results.values():
+            self.assertLessEqual(result['p50'], result['p99'])
+            self.assertLessEqual(result['ttfb_p50'], result['p50'])
+            self.assertGreater(result['queries'], 0)
+            self.assertGreater(result['peak_kb'], 0)
+            self.assertEqual(result['runs'], 2)
+        # The whole list, not just the head sent first, was read.
+        self.assertGreater(
+            results['task_list_all']['bytes'], results['task_list']['bytes']
+        )
+        # Writes are rolled back between runs.
+        self.assertEqual(Task.objects.count(), 20)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 50), 50)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile([7], 95), 7)
+
+    def test_compare(self):
+        baseline = {'task_list': {'p50': 10, 'p95': 20, 'p99': 30,
+                                  'queries': 5}}
+        within = {'task_list': {'p50': 11, 'p95': 23, 'p99': 30,
+                                'queries': 5}}
+        self.assertEqual(benchmark.compare(baseline, within, 0.2), [])
+        worse = {'task_list': {'p50': 10, 'p95': 30, 'p99': 30,
+                               'queries': 6}}
+        regressions = benchmark.compare(baseline, worse, 0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('task_list p95', regressions[0])
+        self.assertIn('task_list queries: 5 -> 6', regressions[1])
+
+    def test_compare_command(self):
+        report = {'results': {'task_list': {'p50': 10, 'p95': 20, 'p99': 30,
+                                            'queries': 5}}}
+        slower = {'results': {'task_list': {'p50': 10, 'p95': 20, 'p99': 90,
+                                            'queries': 5}}}
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for name, data in (('base', report), ('new', slower)):
+                path = os.path.join(directory, name + '.json')
+                with open(path, 'w') as stream:
+                    json.dump(data, stream)
+                paths.append(path)
+            stderr = StringIO()
+            call_command(
+                'benchmark', results=paths[0], compare=paths[0],
+                stderr=stderr,
+            )
+            self.assertIn('No regressions', stderr.getvalue())
+            with self.assertRaisesMessage(CommandError, 'task_list p99'):
+                call_command(
+                    'benchmark', results=paths[1], compare=paths[0],
+                    stderr=StringIO(),
+                )
+
+
+class QueryCountTests(TestCase):
+    """
+    Render every page with N and then 10N rows: the number of queries has
+    to stay the same and within SQL_QUERY_BUDGETS, so an N+1 fails here
+    long before production data makes it slow.
+    """
+
+    N = 3
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='budgetuser')
+        self.created = 0
+        self.client.force_login(self.user)
+
+    def add_rows(self, count):
+        """Add ``count`` statuses, labels, users and tasks with labels."""
+        start, self.created = self.created, self.created + count
+        numbers = range(start, self.created)
+        statuses = Status.objects.bulk_create(
+            Status(name='Статус %d' % i) for i in numbers
+        )
+        labels = Label.objects.bulk_create(
+            Label(name='Метка %d' % i) for i in numbers
+        )
+        users = User.objects.bulk_create(
+            User(username='user%d' % i, first_name='Имя', last_name='%d' % i)
+            for i in numbers
+        )
+        tasks = Task.objects.bulk_create(
+            Task(
+                name='Задача %d' % i,
+                status=status,
+                author=self.user,
+                assignee=assignee,
+            )
+            for i, status, assignee in zip(numbers, statuses, users)
+        )
+        # The detail pages show the first task, which gets every label.
+        self.task = getattr(self, 'task', tasks[0])
+        through = Task.labels.through
+        through.objects.bulk_create(
+            [through(task_id=self.task.pk, label_id=label.pk)
+             for label in labels]
+            + [through(task_id=task.pk, label_id=label.pk)
+               for task in tasks[1:] for label in labels if label.pk % 2]
+        )
+        rebuild_task_counts()
+
+    def pages(self):
+        status = Status.objects.first()
+        label_ids = list(Label.objects.values_list('pk', flat=True)[:2])
+        return [
+            ('index', reverse('index'), {}),
+            ('task_list', reverse('task_list'), {}),
+            ('task_list', reverse('task_list'),
+             {'status': status.pk, 'labels': label_ids, 'own_tasks': 'on'}),
+            ('task_detail', reverse('task_detail', args=[self.task.pk]), {}),
+            ('task_events', reverse('task_events'), {'after': 0}),
+            ('task_dashboard', reverse('task_dashboard'), {}),
+            ('task_create', reverse('task_create'), {}),
+            ('task_update', reverse('task_update', args=[self.task.pk]), {}),
+            ('api_task_list', reverse('api_task_list'), {}),
+            ('api_task_detail',
+             reverse('api_task_detail', args=[self.task.pk]), {}),
+            ('user_list', reverse('user_list'), {}),
+            ('user_list', reverse('user_list'), {'q': 'user'}),
+            ('user_autocomplete', reverse('user_autocomplete'), {'q': 'user'}),
+            ('status_list', reverse('status_list'), {}),
+            ('status_autocomplete', reverse('status_autocomplete'),
+             {'q': 'статус'}),
+            ('label_list', reverse('label_list'), {}),
+            ('label_autocomplete', reverse('label_autocomplete'),
+             {'q': 'метка'}),
+        ]
+
+    def count_queries(self):
+        counts = {}
+        for name, url, params in self.pages():
+            # Both runs go through the cold path, including the queries
+            # that fill the reference data cache.
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200, url)
+            counts[url, str(params)] = name, len(context)
+        return counts
+
+    def test_query_counts_do_not_grow_with_data(self):
+        self.add_rows(self.N)
+        small = self.count_queries()
+        self.add_rows(self.N * 9)
+        large = self.count_queries()
+
+        budgets = settings.SQL_QUERY_BUDGETS
+        for page, (name, count) in large.items():
+            with self.subTest(page=page):
+                self.assertEqual(count, small[page][1])
+                budget = budgets[name]
+                if isinstance(budget, dict):
+                    budget = budget['GET']
+                self.assertLessEqual(count, budget)
+
+    def count_bulk_delete_queries(self):
+        task_ids = list(Task.objects.values_list('pk', flat=True))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse('task_bulk_action'), {
+                'tasks': task_ids, 'action': 'delete',
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Task.objects.exists())
+        # The next rows get a task of their own for the detail pages.
+        del self.task
+        return len(context)
+
+    def test_bulk_delete_queries_do_not_grow_with_tasks(self):
+        self.add_rows(self.N)
+        small = self.count_bulk_delete_queries()
+        self.add_rows(self.N * 9)
+        large = self.count_bulk_delete_queries()
+        self.assertEqual(large, small)
+        self.assertLessEqual(
+            large, settings.SQL_QUERY_BUDGETS['task_bulk_action']['POST']
+        )
+
+
+class SingleFetchTests(TestCase):
+    """Update and delete views read their object with a single query."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='fetchuser')
+        self.status = Status.objects.create(name='Новый')
+        self.label = Label.objects.create(name='bug')
+        self.task = Task.objects.create(
+            name='Задача', status=self.status, author=self.user
+        )
+        self.task.labels.add(self.label)
+        self.client.force_login(self.user)
+
+    def assertFetchedOnce(self, method, url, table, session_reads=0):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url)
+        self.assertIn(response.status_code, (200, 302))
+        reads = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "%s"' % table in query['sql']
+            and 'WHERE "%s"."id" =' % table in query['sql']
+        ]
+        self.assertEqual(len(reads), 1 + session_reads, reads)
+
+    def test_update_and_delete_pages(self):
+        pages = [
+            ('task_update', self.task, 'tasks_task'),
+            ('task_delete', self.task, 'tasks_task'),
+            ('status_update', self.status, 'statuses_status'),
+            ('status_delete', self.status, 'statuses_status'),
+            ('label_update', self.label, 'labels_label'),
+            ('label_delete', self.label, 'labels_label'),
+        ]
+        for name, obj, table in pages:
+            with self.subTest(name=name):
+                self.assertFetchedOnce(
+                    'get', reverse(name, args=[obj.pk]), table
+                )
+        # Loading the session's user is the other read.
+        self.assertFetchedOnce(
+            'get', reverse('user_update', args=[self.user.pk]), 'auth_user',
+            session_reads=1,
+        )
+        self.assertFetchedOnce(
+            'get', reverse('user_delete', args=[self.user.pk]), 'auth_user',
+        )
+
+    def test_refused_deletes(self):
+        # ProtectedError refuses these deletes without reading them again.
+        for name, obj, table in [
+            ('status_delete', self.status, 'statuses_status'),
+            ('label_delete', self.label, 'labels_label'),
+        ]:
+            with self.subTest(name=name):
+                self.assertFetchedOnce(
+                    'post', reverse(name, args=[obj.pk]), table
+                )
+                self.assertTrue(type(obj).objects.filter(pk=obj.pk).exists())
+
+    def test_deletes(self):
+        self.task.delete()
+        for name, obj, table in [
+            ('status_delete', self.status, 'statuses_status'),
+            ('label_delete', self.label, 'labels_label'),
+        ]:
+            with self.subTest(name=name):
+                self.assertFetchedOnce(
+                    'post', reverse(name, args=[obj.pk]), table
+                )
+                self.assertFalse(
+                    type(obj).objects.filter(pk=obj.pk).exists()
+                )
+
+    def test_task_delete_does_not_load_the_author(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(reverse('task_delete', args=[self.task.pk]))
+        self.assertFalse(Task.objects.filter(pk=self.task.pk).exists())
+        user_reads = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "auth_user"' in query['sql']
+        ]
+        # Only the session's user.
+        self.assertEqual(len(user_reads), 1)
+
+
+class SharedCacheTests(SimpleTestCase):
+    def test_several_workers_need_a_shared_cache(self):
+        check_shared_cache(1)
+        with self.assertRaises(ImproperlyConfigured):
+            check_shared_cache(4)
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'task_manager.cache_backends.FileBasedCache',
+            'LOCATION': tempfile.gettempdir(),
+        }}):
+            check_shared_cache(4)
+
+
+@unittest.skipIf(get_current_session is None, 'rollbar has no sessions')
+class RollbarMiddlewareTests(SimpleTestCase):
+    @override_settings(ROLLBAR={
+        'access_token': 'token',
+        'patch_debugview': False,
+    })
+    def test_async_response_keeps_the_session(self):
+        sessions = []
+
+        async def get_response(request):
+            await asyncio.sleep(0)
+            sessions.append(get_current_session())
+            return HttpResponse()
+
+        # Nothing is reported: rollbar itself is not initialised.
+        with patch('rollbar.init'), patch('rollbar.BASE_DATA_HOOK'):
+            middleware = CustomRollbarNotifierMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        async_to_sync(middleware)(RequestFactory().get('/'))
+        self.assertTrue(sessions[0])
+        self.assertFalse(get_current_session())
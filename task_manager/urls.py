@@ -7,6 +7,7 @@ from task_manager.views import (
     CustomLogoutView,
 )
 from django.contrib import admin
+from task_manager.metrics import metrics
 
 urlpatterns = [
     path('', index, name='index'),
@@ -19,4 +20,5 @@ urlpatterns = [
     path('tasks/', include('task_manager.tasks.urls')),
     path('labels/', include('task_manager.labels.urls')),
     path('test-error/', TestErrorView.as_view(), name='test_error'),
+    path('metrics', metrics, name='metrics'),
 ]
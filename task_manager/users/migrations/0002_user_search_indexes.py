@@ -0,0 +1,51 @@
+from django.db import migrations
+
+from task_manager.migration_operations import RunSQLForVendor
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        RunSQLForVendor(
+            'postgresql',
+            sql=[
+                'CREATE EXTENSION IF NOT EXISTS pg_trgm;',
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS '
+                'user_username_trgm_idx '
+                'ON auth_user USING GIN (lower(username) gin_trgm_ops);',
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS '
+                'user_first_name_trgm_idx '
+                'ON auth_user USING GIN (lower(first_name) gin_trgm_ops);',
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS '
+                'user_last_name_trgm_idx '
+                'ON auth_user USING GIN (lower(last_name) gin_trgm_ops);',
+            ],
+            reverse_sql=[
+                'DROP INDEX CONCURRENTLY IF EXISTS user_username_trgm_idx;',
+                'DROP INDEX CONCURRENTLY IF EXISTS user_first_name_trgm_idx;',
+                'DROP INDEX CONCURRENTLY IF EXISTS user_last_name_trgm_idx;',
+            ],
+        ),
+        RunSQLForVendor(
+            'sqlite',
+            sql=[
+                'CREATE INDEX IF NOT EXISTS user_username_lower_idx '
+                'ON auth_user (lower(username));',
+                'CREATE INDEX IF NOT EXISTS user_first_name_lower_idx '
+                'ON auth_user (lower(first_name));',
+                'CREATE INDEX IF NOT EXISTS user_last_name_lower_idx '
+                'ON auth_user (lower(last_name));',
+            ],
+            reverse_sql=[
+                'DROP INDEX IF EXISTS user_username_lower_idx;',
+                'DROP INDEX IF EXISTS user_first_name_lower_idx;',
+                'DROP INDEX IF EXISTS user_last_name_lower_idx;',
+            ],
+        ),
+    ]
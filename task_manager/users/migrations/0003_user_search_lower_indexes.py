@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from task_manager.migration_operations import RunSQLForVendor
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_search_indexes'),
+    ]
+
+    # Databases that indexed unicode_lower() of the search fields get back
+    # the lower() indexes of 0002_user_search_indexes; on the others this
+    # does nothing.
+    operations = [
+        RunSQLForVendor(
+            'sqlite',
+            sql=[
+                'DROP INDEX IF EXISTS user_username_unicode_lower_idx;',
+                'DROP INDEX IF EXISTS user_first_name_unicode_lower_idx;',
+                'DROP INDEX IF EXISTS user_last_name_unicode_lower_idx;',
+                'CREATE INDEX IF NOT EXISTS user_username_lower_idx '
+                'ON auth_user (lower(username));',
+                'CREATE INDEX IF NOT EXISTS user_first_name_lower_idx '
+                'ON auth_user (lower(first_name));',
+                'CREATE INDEX IF NOT EXISTS user_last_name_lower_idx '
+                'ON auth_user (lower(last_name));',
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,15 @@
+from task_manager.prefix_search import prefix_search
+
+SEARCH_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def search_users(queryset, query):
+    """
+    Filter users whose username, first name or last name starts with
+    ``query``, ignoring case.
+    """
+    return prefix_search(queryset, SEARCH_FIELDS, query)
+
+
+def user_label(user):
+    return user.get_full_name() or user.username
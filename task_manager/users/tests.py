@@ -2,6 +2,8 @@ import unittest
 from django.test import TestCase, Client
 from django.urls import reverse
 from task_manager.users.models import User
+from task_manager.statuses.models import Status
+from task_manager.tasks.models import Task
 from django.contrib.messages import get_messages
 
 
@@ -172,6 +174,19 @@ class UserTests(TestCase):
         self.assertEqual(str(messages[0]), 'Пользователь успешно удален')
         self.assertRedirects(response, reverse('user_list'))
 
+    def test_delete_user_with_tasks(self):
+        status = Status.objects.create(name='Новый')
+        Task.objects.create(name='Задача', status=status, author=self.user)
+        self.client.force_login(self.user)
+        response = self.client.post(self.delete_url)
+        self.assertRedirects(response, self.list_url)
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+        messages = list(get_messages(response.wsgi_request))
+        self.assertEqual(
+            str(messages[0]),
+            'Невозможно удалить пользователя, потому что он используется'
+        )
+
     def test_delete_user_unauthenticated(self):
         response = self.client.post(self.delete_url)
         self.assertEqual(response.status_code, 302)
@@ -179,5 +194,69 @@ class UserTests(TestCase):
         self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
 
 
+
+class UserDirectoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='ivanov', first_name='Ivan', last_name='Petrov'
+        )
+        User.objects.bulk_create(
+            User(username='member%02d' % i, first_name='Anna',
+                 last_name='Smirnova')
+            for i in range(55)
+        )
+
+    def test_list_is_paginated(self):
+        response = self.client.get(reverse('user_list'))
+        self.assertEqual(len(response.context['users']), 50)
+        response = self.client.get(reverse('user_list'), {'page': 2})
+        self.assertEqual(len(response.context['users']), 6)
+
+    def test_list_searches_name_prefixes(self):
+        for query in ('iva', 'IVAN', 'pet', ' Petrov '):
+            with self.subTest(query=query):
+                response = self.client.get(reverse('user_list'), {'q': query})
+                self.assertEqual(list(response.context['users']), [self.user])
+        response = self.client.get(reverse('user_list'), {'q': 'van'})
+        self.assertContains(response, 'Пользователи не найдены.')
+        response = self.client.get(reverse('user_list'), {'q': 'member5'})
+        self.assertEqual(len(response.context['users']), 5)
+        response = self.client.get(reverse('user_list'), {'q': 'member'})
+        self.assertContains(response, '?q=member&amp;page=2')
+
+    def test_autocomplete(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('user_autocomplete'), {'q': 'i'})
+        self.assertEqual(response.json(), {
+            'results': [{'id': self.user.pk, 'text': 'Ivan Petrov'}],
+        })
+        response = self.client.get(reverse('user_autocomplete'), {'q': 'an'})
+        results = response.json()['results']
+        self.assertEqual(len(results), 20)
+        self.assertEqual(results[0]['text'], 'Anna Smirnova')
+
+    def test_autocomplete_requires_login(self):
+        response = self.client.get(reverse('user_autocomplete'), {'q': 'i'})
+        self.assertEqual(response.status_code, 401)
+
+    def test_task_form_only_renders_the_assignee(self):
+        status = Status.objects.create(name='Новый')
+        task = Task.objects.create(
+            name='Задача', status=status, author=self.user,
+            assignee=self.user,
+        )
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('task_update', args=[task.pk]))
+        self.assertContains(
+            response,
+            '<option value="%d" selected>Ivan Petrov</option>' % self.user.pk,
+            html=True,
+        )
+        self.assertNotContains(response, 'Anna Smirnova')
+        response = self.client.get(reverse('task_create'))
+        self.assertNotContains(response, 'Ivan Petrov')
+        self.assertContains(response, reverse('user_autocomplete'))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -4,11 +4,17 @@ from .views import (
     UserCreateView,
     UserUpdateView,
     UserDeleteView,
+    UserAutocompleteView,
 )
 
 urlpatterns = [
     path('', UserListView.as_view(), name='user_list'),
     path('create/', UserCreateView.as_view(), name='user_create'),
+    path(
+        'autocomplete/',
+        UserAutocompleteView.as_view(),
+        name='user_autocomplete',
+    ),
     path('<int:pk>/update/', UserUpdateView.as_view(), name='user_update'),
     path('<int:pk>/delete/', UserDeleteView.as_view(), name='user_delete'),
 ]
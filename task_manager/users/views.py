@@ -1,3 +1,4 @@
+from django.db.models import ProtectedError
 from django.shortcuts import redirect
 from django.views.generic import (
     ListView,
@@ -6,7 +7,11 @@ from django.views.generic import (
     DeleteView,
 )
 from django.urls import reverse_lazy
+from task_manager.mixins import SingleFetchObjectMixin
+from task_manager.reference_data import USER_FIELDS
 from task_manager.users.models import User
+from task_manager.users.search import SEARCH_FIELDS, search_users, user_label
+from task_manager.views import AutocompleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth import (
     get_user_model,
@@ -22,12 +27,29 @@ class UserListView(ListView):
     model = get_user_model()
     template_name = 'users/user_list.html'
     context_object_name = 'users'
+    paginate_by = 50
+
+    def get_search_query(self):
+        return self.request.GET.get('q', '').strip()
 
     def get_queryset(self):
-        return User.objects.all()
+        return search_users(
+            User.objects.order_by('pk'), self.get_search_query()
+        )
 
     def get_context_data(self, **kwargs):
-        return super().get_context_data(**kwargs)
+        context = super().get_context_data(**kwargs)
+        context['search_query'] = self.get_search_query()
+        return context
+
+
+class UserAutocompleteView(AutocompleteView):
+    queryset = User.objects.only(*USER_FIELDS)
+    search_fields = SEARCH_FIELDS
+    ordering = ('username',)
+
+    def get_label(self, obj):
+        return user_label(obj)
 
 
 class UserCreateView(CreateView):
@@ -53,7 +75,12 @@ class UserCreateView(CreateView):
         return self.render_to_response(self.get_context_data(form=form))
 
 
-class UserUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class UserUpdateView(
+    LoginRequiredMixin,
+    UserPassesTestMixin,
+    SingleFetchObjectMixin,
+    UpdateView,
+):
     model = get_user_model()
     form_class = UserChangeForm
     template_name = 'users/user_update.html'
@@ -89,11 +116,22 @@ class UserUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         return super().form_invalid(form)
 
 
-class UserDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class UserDeleteView(
+    LoginRequiredMixin,
+    UserPassesTestMixin,
+    SingleFetchObjectMixin,
+    DeleteView,
+):
     model = get_user_model()
     template_name = 'users/user_delete.html'
     success_url = reverse_lazy('user_list')
 
+    def get_object(self, queryset=None):
+        # Users may only delete themselves, and that row is already loaded.
+        if queryset is None and self.kwargs['pk'] == self.request.user.pk:
+            return self.request.user
+        return super().get_object(queryset)
+
     def test_func(self):
         return self.request.user.is_authenticated and \
             self.request.user == self.get_object()
@@ -108,7 +146,14 @@ class UserDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     def form_valid(self, form):
         user = self.get_object()
         is_self = self.request.user == user
-        user.delete()
+        try:
+            user.delete()
+        except ProtectedError:
+            messages.error(
+                self.request,
+                'Невозможно удалить пользователя, потому что он используется'
+            )
+            return redirect(self.success_url)
         messages.success(self.request, 'Пользователь успешно удален')
         if is_self:
             logout(self.request)
@@ -122,5 +167,5 @@ class UserDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['user'] = self.get_object()
+        context['user'] = self.object
         return context
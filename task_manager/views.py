@@ -1,10 +1,12 @@
 import rollbar
 from django.shortcuts import render, redirect
-from django.http import HttpResponse, HttpResponseServerError
+from django.http import HttpResponse, HttpResponseServerError, JsonResponse
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth import login, logout
 from django.views import View
 from django.contrib import messages
+from task_manager.mixins import ApiLoginRequiredMixin
+from task_manager.prefix_search import prefix_search
 
 
 def index(request):
@@ -48,3 +50,32 @@ class CustomLogoutView(View):
         logout(request)
         messages.success(request, 'Вы разлогинены')
         return redirect('index')
+
+
+class AutocompleteView(ApiLoginRequiredMixin, View):
+    """
+    Return the first objects with one of ``search_fields`` starting with
+    the ``q`` prefix as JSON, for the pickers of the task pages that load
+    their options on demand.
+    """
+
+    queryset = None
+    search_fields = ()
+    ordering = ('pk',)
+    limit = 20
+
+    def get_label(self, obj):
+        return str(obj)
+
+    def get(self, request, *args, **kwargs):
+        objects = prefix_search(
+            self.queryset.all(),
+            self.search_fields,
+            request.GET.get('q', ''),
+        ).order_by(*self.ordering)[:self.limit]
+        return JsonResponse({
+            'results': [
+                {'id': obj.pk, 'text': self.get_label(obj)}
+                for obj in objects
+            ],
+        })